@@ -0,0 +1,78 @@
+"""Console capture benchmark.
+
+Redirects stdout the way `wandb.init()` does, runs a print and progress bar
+heavy workload, and reports how many times the console callback ran, which is
+how many output records are published to the internal process, with the
+callback called per pipe read and through `redirect.BufferedCallback`. Each
+mode runs in its own process, since stdout is redirected at the fd level.
+
+    python standalone_tests/console_capture_bench.py --lines 100000 --updates 100000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from wandb.lib import redirect
+
+
+class Counter(object):
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def __call__(self, name, data):
+        self.calls += 1
+        self.bytes += len(data)
+
+
+def workload(args):
+    for i in range(args.lines):
+        print("epoch %i step %i loss %f" % (i // 1000, i, 1.0 / (i + 1)))
+    for i in range(args.updates):
+        # what tqdm writes for every update of a progress bar
+        sys.stdout.write("\r%3i%%|%-50s| %i/%i" % (
+            100 * i // args.updates, "#" * (50 * i // args.updates), i, args.updates))
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+
+
+def bench(args, buffered):
+    counter = Counter()
+    cb = redirect.BufferedCallback(counter) if buffered else counter
+    capture = redirect.Capture(name="stdout", cb=cb, output_writer=None)
+    redir = redirect.Redirect(src="stdout", dest=capture, unbuffered=True)
+    redir.install()
+    start = time.time()
+    workload(args)
+    redir.uninstall()
+    if buffered:
+        cb.close()
+    return time.time() - start, counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--mode", choices=("per-read", "buffered"))
+    args = parser.parse_args()
+
+    if args.mode:
+        elapsed, counter = bench(args, args.mode == "buffered")
+        sys.stderr.write(
+            "%-8s  %6.2fs  %8i callbacks  %10i bytes\n"
+            % (args.mode, elapsed, counter.calls, counter.bytes)
+        )
+        return
+    with open(os.devnull, "w") as devnull:
+        for mode in ("per-read", "buffered"):
+            subprocess.check_call(
+                [sys.executable] + sys.argv + ["--mode", mode], stdout=devnull
+            )
+
+
+if __name__ == "__main__":
+    main()
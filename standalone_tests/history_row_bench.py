@@ -0,0 +1,57 @@
+"""History row conversion microbenchmark.
+
+Times the per-row work `wandb.log` does before a history record is
+published: `history_dict_to_json` followed by `json_dumps_safer_history` of
+every value, for rows of 10, 1k and 10k scalar keys.
+
+    python standalone_tests/history_row_bench.py --repeat 20
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from wandb import data_types
+from wandb import util
+
+
+def make_row(num_keys, kind):
+    rng = np.random.RandomState(0)
+    if kind == "float":
+        values = [float(v) for v in rng.rand(num_keys)]
+    elif kind == "int":
+        values = [int(v) for v in rng.randint(0, 1000, num_keys)]
+    else:
+        values = list(rng.rand(num_keys).astype(np.float32))
+    row = {"metric_%i" % i: v for i, v in enumerate(values)}
+    row["_step"] = 0
+    return row
+
+
+def convert(row):
+    row = data_types.history_dict_to_json(None, dict(row))
+    return [util.json_dumps_safer_history(v) for v in row.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for kind in ("float", "int", "numpy"):
+        for num_keys in (10, 1000, 10000):
+            row = make_row(num_keys, kind)
+            number = max(1, 100000 // num_keys)
+            best = min(
+                timeit.repeat(lambda: convert(row), number=number, repeat=args.repeat)
+            )
+            per_row = best / number
+            print(
+                "%-5s %6i keys: %9.1f us/row  %6.3f us/key"
+                % (kind, num_keys, per_row * 1e6, per_row * 1e6 / num_keys)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""wandb.watch parameter histogram memory benchmark.
+
+Measures the peak resident memory of logging the parameter histograms of a
+large model once, the way `wandb.watch(log="parameters")` does on every logged
+forward pass. "copy" is the previous behaviour, `log_tensor_stats(data.cpu())`
+per parameter; "batched" is the current `log_tensor_stats_batch`, which reads
+large tensors in chunks. Each mode runs in its own process so that the peaks
+don't mix.
+
+    python standalone_tests/torch_param_memory_bench.py --embedding 50000000 --layers 8
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import torch
+
+from wandb.wandb_torch import TorchHistory
+
+
+class NullHistory(object):
+    compute = True
+
+    def _row_update(self, row):
+        pass
+
+
+def max_rss_mb():
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(args):
+    model = torch.nn.Sequential(
+        torch.nn.Embedding(args.embedding // args.width, args.width),
+        *[torch.nn.Linear(args.width, args.width) for _ in range(args.layers)]
+    )
+    history = NullHistory()
+    torch_history = TorchHistory(history)
+    named = [("parameters/" + name, p.data) for name, p in model.named_parameters()]
+    before = max_rss_mb()
+    start = time.time()
+    if args.mode == "copy":
+        for name, data in named:
+            torch_history.log_tensor_stats(data.cpu(), name)
+    else:
+        torch_history.log_tensor_stats_batch(named)
+    print(
+        "%-8s  %6.2fs  model %8.1f MB  peak increase %8.1f MB"
+        % (args.mode, time.time() - start, before, max_rss_mb() - before)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedding", type=int, default=50000000)
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--mode", choices=("copy", "batched"))
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args)
+        return
+    for mode in ("copy", "batched"):
+        subprocess.check_call([sys.executable] + sys.argv + ["--mode", mode])
+
+
+if __name__ == "__main__":
+    main()
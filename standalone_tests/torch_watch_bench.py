@@ -0,0 +1,68 @@
+"""wandb.watch gradient histogram benchmark.
+
+Times a backward pass through a deep stack of linear layers with gradient
+histograms computed per parameter, as `wandb.watch` does by default, and in
+one batched pass with `wandb.watch(..., batched=True)`.
+
+    python standalone_tests/torch_watch_bench.py --layers 300 --width 256 --device cpu
+"""
+
+import argparse
+import time
+
+import torch
+
+from wandb.wandb_torch import TorchHistory
+
+
+class NullHistory(object):
+    compute = True
+
+    def _row_update(self, row):
+        pass
+
+
+def make_model(args):
+    layers = []
+    for _ in range(args.layers):
+        layers += [torch.nn.Linear(args.width, args.width), torch.nn.LayerNorm(args.width)]
+    return torch.nn.Sequential(*layers).to(args.device)
+
+
+def bench(args, batched):
+    history = NullHistory()
+    torch_history = TorchHistory(history)
+    model = make_model(args)
+    torch_history.add_log_hooks_to_pytorch_module(
+        model, log_parameters=False, log_freq=1, batched=batched
+    )
+    data = torch.randn(args.batch, args.width, device=args.device)
+    times = []
+    for _ in range(args.repeat):
+        model.zero_grad()
+        loss = model(data).sum()
+        if args.device != "cpu":
+            torch.cuda.synchronize()
+        start = time.time()
+        loss.backward()
+        if args.device != "cpu":
+            torch.cuda.synchronize()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layers", type=int, default=300)
+    parser.add_argument("--width", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    for name, batched in (("per tensor", False), ("batched", True)):
+        print("%-10s  backward with histograms %8.1f ms" % (name, bench(args, batched) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Video encoding benchmark.
+
+Compares the memory peak and encode time of logging a rollout as a single
+array with `wandb.Video(array)` against streaming it frame by frame with
+`wandb.Video.stream()`.
+
+    python standalone_tests/video_encode_bench.py --frames 2000 --size 128 --format mp4
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+import wandb
+
+
+def rollout(frames, size, batch):
+    rng = np.random.RandomState(0)
+    for _ in range(frames):
+        yield rng.randint(0, 255, size=(batch, 3, size, size), dtype=np.uint8)
+
+
+def bench_array(args):
+    data = np.stack(list(rollout(args.frames, args.size, args.batch)), axis=1)
+    start = time.time()
+    video = wandb.Video(data, fps=args.fps, format=args.format)
+    returned = time.time() - start
+    video._wait_encoded()
+    return returned, time.time() - start
+
+
+def bench_stream(args):
+    start = time.time()
+    stream = wandb.Video.stream(fps=args.fps, format=args.format)
+    for frame in rollout(args.frames, args.size, args.batch):
+        stream.add_frame(frame)
+    returned = time.time() - start
+    wandb.Video(stream)
+    return returned, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--format", default="gif", choices=wandb.Video.EXTS)
+    args = parser.parse_args()
+
+    for name, bench in (("array", bench_array), ("stream", bench_stream)):
+        tracemalloc.start()
+        returned, total = bench(args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            "%-6s  frames added in %6.2fs  encoded in %6.2fs  peak memory %8.1f MB"
+            % (name, returned, total, peak / 1e6)
+        )
+
+
+if __name__ == "__main__":
+    main()
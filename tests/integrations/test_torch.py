@@ -1,4 +1,5 @@
 import wandb
+import numpy as np
 import pytest
 import sys
 try:
@@ -132,6 +133,22 @@ def conv3x3(in_channels, out_channels, **kwargs):
     return layer
 
 
+class History(object):
+    """Collects the rows TorchHistory logs, in place of a run's history"""
+
+    def __init__(self):
+        self.compute = True
+        self.row = {}
+
+    def _row_update(self, row):
+        self.row.update(row)
+
+
+@pytest.fixture
+def history():
+    return History()
+
+
 def test_all_logging(wandb_init_run):
     net = ConvNet()
     wandb.watch(net, log="all", log_freq=1)
@@ -148,6 +165,90 @@ def test_all_logging(wandb_init_run):
     assert(len(wandb.run._backend.history) == 3)
 
 
+def test_batched_logging(wandb_init_run, monkeypatch):
+    # Models watched by earlier tests would prefix the keys with graph_<n>
+    monkeypatch.setattr(wandb.wandb_sdk.wandb_watch, "_global_watch_idx", 0)
+    net = ConvNet()
+    wandb.watch(net, log_freq=1, batched=True)
+    output = net(dummy_torch_tensor((32, 1, 28, 28)))
+    output.backward(torch.ones(32, 10))
+    wandb.log({"a": 2})
+    row = wandb.run._backend.history[0]
+    assert len([k for k in row if k.startswith("gradients/")]) == 8
+    assert len(row['gradients/fc2.bias']['bins']) == 65
+
+
+def test_log_tensor_stats_batch(history):
+    torch_history = wandb.wandb_torch.TorchHistory(history)
+    tensors = [torch.randn(10, 10), torch.tensor([1., float("nan"), float("inf"), -2.]),
+               torch.randn(5).half(), torch.tensor([float("nan")])]
+    for i, tensor in enumerate(tensors):
+        torch_history.log_tensor_stats(tensor, str(i))
+    expected = {k: v.to_json() for k, v in history.row.items()}
+    history.row = {}
+    torch_history.log_tensor_stats_batch([(str(i), t) for i, t in enumerate(tensors)])
+    assert sorted(history.row) == ["0", "1", "2"]
+    for name, hist in history.row.items():
+        assert hist.histogram == expected[name]["values"]
+        assert hist.bins == pytest.approx(expected[name]["bins"], rel=1e-5, abs=1e-6)
+
+    # Large tensors are binned in chunks
+    batched = {k: v.to_json() for k, v in history.row.items()}
+    history.row = {}
+    torch_history._chunk_size = 7
+    torch_history.log_tensor_stats_batch([(str(i), t) for i, t in enumerate(tensors)])
+    assert {k: v.to_json() for k, v in history.row.items()} == batched
+
+
+def test_batched_stats_after_failed_backward(history):
+    torch_history = wandb.wandb_torch.TorchHistory(history)
+    param = torch.ones(3, requires_grad=True)
+    fail = [True]
+
+    def maybe_raise(grad):
+        if fail[0]:
+            raise RuntimeError("failed backward")
+
+    param.register_hook(lambda grad: torch_history._queue_tensor_stats(grad, "param"))
+    param.register_hook(maybe_raise)
+    with pytest.raises(RuntimeError):
+        (param * 2).sum().backward()
+    assert history.row == {}
+
+    # The gradient of the failed pass is dropped, not logged or kept
+    fail[0] = False
+    (param * 2).sum().backward()
+    assert sum(history.row["param"].histogram) == 3
+    assert torch_history._pending_stats == []
+    history.row = {}
+    (param * 2).sum().backward()
+    assert sum(history.row["param"].histogram) == 3
+
+
+def test_sampled_tensor_stats(history):
+    torch_history = wandb.wandb_torch.TorchHistory(history)
+    torch_history._histogram_max_error = 0.01
+    tensor = torch.randn(1000000)
+    torch_history.log_tensor_stats(tensor, "single")
+    torch_history.log_tensor_stats_batch([("batch", tensor)])
+    for hist in history.row.values():
+        exact = np.histogram(tensor.numpy(), bins=np.array(hist.bins))[0]
+        assert abs(sum(hist.histogram) - tensor.numel()) < 1000
+        assert np.abs(np.array(hist.histogram) - exact).max() < 0.01 * tensor.numel()
+
+
+def test_sample_generator_seeded(history):
+    tensor = torch.randn(1000000)
+    seeds = set()
+    for _ in range(2):
+        torch_history = wandb.wandb_torch.TorchHistory(history)
+        torch_history._histogram_max_error = 0.01
+        torch_history._sample_tensor(tensor)
+        seeds.add(torch_history._sample_generator.initial_seed())
+    # Every process would otherwise sample the same indices
+    assert len(seeds) == 2
+
+
 def test_double_log(wandb_init_run):
     net = ConvNet()
     wandb.watch(net)
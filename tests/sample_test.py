@@ -34,3 +34,36 @@ def test_all():
         for n in range(1000):
             l = doit(n, samples=s)
             check(n, l, samples=s)
+
+
+def test_sampled_history_keys():
+    """Keys are sampled independently and the least recently logged is dropped."""
+    h = sample.SampledHistory(max_keys=2, min_samples=8)
+    for n in range(500):
+        h.add("a", n)
+        h.add("b", n * 0.5)
+    assert h.get("a") == doit(500, samples=8)
+    assert h.get("b") == tuple(v * 0.5 for v in doit(500, samples=8))
+    assert all(isinstance(v, int) for v in h.get("a"))
+    h.add("a", 500)
+    h.add("c", 1.5)
+    assert h.keys() == ["a", "c"]
+    assert h.get("b") == ()
+    assert h.get("c") == (1.5,)
+
+
+def test_sampled_history_large_ints():
+    """Integers beyond double precision come back exact until a float is logged."""
+    h = sample.SampledHistory(max_keys=2, min_samples=8)
+    big = 2 ** 60 + 1
+    for n in range(100):
+        h.add("a", big + n)
+    assert h.get("a") == tuple(big + v for v in doit(100, samples=8))
+    h.add("a", 0.5)
+    assert all(isinstance(v, float) for v in h.get("a"))
+    h.add("b", 2 ** 70)
+    assert h.get("b") == (float(2 ** 70),)
+    # a reused key starts out integral again
+    h.add("c", big)
+    assert h.keys() == ["b", "c"]
+    assert h.get("c") == (big,)
@@ -1,3 +1,4 @@
+import json
 import wandb
 from wandb import data_types
 import numpy as np
@@ -33,6 +34,17 @@ def test_manual_histogram():
     assert len(wbhist.histogram) == 3
 
 
+def test_sampled_histogram():
+    values = np.random.RandomState(0).randn(1000000)
+    wbhist = wandb.Histogram(values, max_error=0.01)
+    exact = np.histogram(values, bins=np.array(wbhist.bins))[0]
+    assert len(wbhist.histogram) == 64
+    assert abs(sum(wbhist.histogram) - values.size) < 1000
+    assert np.abs(np.array(wbhist.histogram) - exact).max() < 0.01 * values.size
+    # Small sequences are not sampled
+    assert wandb.Histogram(data, max_error=0.01).histogram == wandb.Histogram(data).histogram
+
+
 def test_invalid_histogram():
     with pytest.raises(ValueError):
         wandb.Histogram(np_histogram=([1, 2, 3], [1]))
@@ -53,6 +65,101 @@ def test_bind_image(mocked_run):
     assert wb_image.is_bound()
 
 
+def test_image_encoded_from_copy(mocked_run):
+    pixels = np.zeros((28, 28))
+    wb_image = wandb.Image(pixels)
+    # the caller may reuse its buffer while the image is still encoding
+    pixels[:] = 255
+    wb_image.bind_to_run(mocked_run, 'stuff', 10)
+    assert wb_image._image.getextrema() == (0, 0)
+    assert (wb_image._width, wb_image._height) == (28, 28)
+
+
+def test_image_sha256_while_encoding(mocked_run):
+    wb_image = wandb.Image(image)
+    wb_image.bind_to_run(mocked_run, 'stuff', 10)
+    assert wb_image._sha256 == wandb.util.sha256_file(wb_image._path)
+
+
+def test_bind_image_dedup(mocked_run):
+    first = wandb.Image(image)
+    first.bind_to_run(mocked_run, 'reference', 1)
+    second = wandb.Image(image)
+    second.bind_to_run(mocked_run, 'reference', 2)
+    assert second._path == first._path
+    assert second.to_json(mocked_run)['path'] == first.to_json(mocked_run)['path']
+    media_dir = os.path.join(mocked_run.dir, wandb.Image.get_media_subdir())
+    assert os.listdir(media_dir) == [os.path.basename(first._path)]
+
+
+def test_image_from_batch(mocked_run):
+    batch = np.random.randn(4, 3, 16, 12)
+    images = wandb.Image.from_batch(batch, captions=["a", "b", "c", "d"])
+    for wb_image, single in zip(images, batch):
+        expected = wandb.Image(single.transpose(1, 2, 0))
+        expected._wait_encoded()
+        assert wb_image._image.tobytes() == expected._image.tobytes()
+
+    meta = data_types.val_to_json(mocked_run, "examples", images, namespace=1)
+    assert meta["_type"] == "images/separated"
+    assert meta["count"] == 4
+    assert (meta["width"], meta["height"]) == (12, 16)
+    assert meta["captions"] == ["a", "b", "c", "d"]
+
+
+def test_image_encoding_options(mocked_run):
+    wb_image = wandb.Image(np.random.rand(28, 40, 3), file_type="jpg", quality=50, max_dimension=20)
+    wb_image.bind_to_run(mocked_run, 'stuff', 10)
+    meta = wb_image.to_json(mocked_run)
+    assert meta["format"] == "jpg"
+    assert meta["path"].endswith(".jpg")
+    assert (meta["width"], meta["height"]) == (20, 14)
+    assert PIL.Image.open(wb_image._path).size == (20, 14)
+
+
+def test_image_seq_mixed_formats(mocked_run, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(wandb, "termwarn", lambda msg, **kwargs: warnings.append(msg))
+    images = [wandb.Image(image), wandb.Image(image, file_type="webp")]
+    meta = data_types.val_to_json(mocked_run, "mixed", images, namespace=1)
+    assert meta["format"] == "png"
+    assert meta["count"] == 2
+    assert len(warnings) == 1
+
+
+def test_history_dict_to_json_scalars(mocked_run):
+    row = {"_step": 3, "loss": 0.5, "name": "", "np": np.float32(2.0), "nested": {"acc": 1}}
+    assert data_types.history_dict_to_json(mocked_run, dict(row)) == row
+
+
+def test_bind_image_run_without_media_paths(tmpdir):
+    # Run-like objects, like public API runs, have no media index
+    class ApiRun(object):
+        dir = str(tmpdir)
+
+    run = ApiRun()
+    first = wandb.Image(image)
+    first.bind_to_run(run, 'reference', 1)
+    second = wandb.Image(image)
+    second.bind_to_run(run, 'reference', 2)
+    assert second._path != first._path
+    assert second.to_json(run)['path'].startswith(wandb.Image.get_media_subdir())
+
+
+def test_media_encoder_errors():
+    encoder = data_types._MediaEncoder(num_workers=2, max_pending=1)
+    tasks = [encoder.submit(lambda: None) for _ in range(4)]
+
+    def fail():
+        raise ValueError("bad pixels")
+
+    failed = encoder.submit(fail)
+    for task in tasks:
+        task.wait()
+    with pytest.raises(ValueError):
+        failed.wait()
+
+
 full_box = {
     "position": {
         "middle": (0.5, 0.5), "width": 0.1, "height": 0.2
@@ -236,13 +343,22 @@ def test_pil():
     assert img._image == pil
 
 
+def test_pil_encoded_from_copy(mocked_run):
+    pil = PIL.Image.new("L", (28, 28))
+    img = wandb.Image(pil)
+    # the caller may keep drawing on its image while it is still encoding
+    pil.paste(255, (0, 0, 28, 28))
+    img.bind_to_run(mocked_run, "stuff", 10)
+    assert img._image.getextrema() == (0, 0)
+
+
 def test_matplotlib_image():
     plt.plot([1, 2, 2, 4])
     img = wandb.Image(plt)
     assert img._image.width == 640
 
 
-@pytest.mark.skipif(sys.version_info < (3, 6), reason="No moviepy.editor in py2")
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="No imageio in py2")
 def test_video_numpy(mocked_run):
     video = np.random.randint(255, size=(10, 3, 28, 28))
     vid = wandb.Video(video)
@@ -250,7 +366,7 @@ def test_video_numpy(mocked_run):
     assert vid.to_json(mocked_run)["path"].endswith(".gif")
 
 
-@pytest.mark.skipif(sys.version_info < (3, 6), reason="No moviepy.editor in py2")
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="No imageio in py2")
 def test_video_numpy_multi(mocked_run):
     video = np.random.random(size=(2, 10, 3, 28, 28))
     vid = wandb.Video(video)
@@ -258,7 +374,37 @@ def test_video_numpy_multi(mocked_run):
     assert vid.to_json(mocked_run)["path"].endswith(".gif")
 
 
-@pytest.mark.skipif(sys.version_info < (3, 6), reason="No moviepy.editor in py2")
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="No imageio in py2")
+def test_video_stream(mocked_run):
+    stream = wandb.Video.stream(fps=10)
+    frame = np.zeros((2, 3, 28, 20), dtype=np.uint8)
+    for i in range(10):
+        frame[:] = i * 20
+        stream.add_frame(frame)
+    vid = wandb.Video(stream)
+    vid.bind_to_run(mocked_run, "videos", 0)
+    meta = vid.to_json(mocked_run)
+    assert meta["path"].endswith(".gif")
+    assert (meta["width"], meta["height"]) == (40, 28)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="No imageio in py2")
+def test_video_stream_mp4_keeps_size(mocked_run):
+    pytest.importorskip("imageio_ffmpeg")
+    import imageio
+
+    stream = wandb.Video.stream(fps=10, format="mp4")
+    for i in range(4):
+        stream.add_frame(np.full((3, 28, 20), i * 20, dtype=np.uint8))
+    vid = wandb.Video(stream)
+    vid.bind_to_run(mocked_run, "videos", 0)
+    meta = vid.to_json(mocked_run)
+    assert meta["path"].endswith(".mp4")
+    reader = imageio.get_reader(os.path.join(mocked_run.dir, meta["path"]))
+    assert reader.get_data(0).shape == (28, 20, 3)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason="No imageio in py2")
 def test_video_numpy_invalid():
     video = np.random.random(size=(3, 28, 28))
     with pytest.raises(ValueError):
@@ -348,6 +494,65 @@ def test_table_custom():
     assert table._to_table_json() == table_df._to_table_json()
 
 
+def test_columnar_table(mocked_run):
+    table = wandb.ColumnarTable(["id", "score", "label"], chunk_rows=64)
+    for i in range(100):
+        table.add_data(i, i / 2.0, "row %i" % i)
+    table.add_columns(np.arange(100, 300), np.zeros(200), ["bulk"] * 200)
+    table.bind_to_run(mocked_run, "predictions", 0)
+    meta = table.to_json(mocked_run)
+    assert meta["_type"] == "columnar-table-file"
+    assert meta["nrows"] == 300
+    assert meta["path"].endswith(".table.bin")
+
+    columns = wandb.ColumnarTable.read(table._path)
+    assert list(columns) == ["id", "score", "label"]
+    assert columns["id"].tolist() == list(range(300))
+    assert columns["score"][99] == 49.5
+    assert columns["label"][0] == "row 0"
+    assert columns["label"][-1] == "bulk"
+    with pytest.raises(ValueError):
+        table.add_data(1, 2.0, "late")
+
+
+def test_columnar_table_mixed_types(mocked_run):
+    table = wandb.ColumnarTable(["value"], chunk_rows=2)
+    table.add_data(1)
+    table.add_data(2)
+    table.add_data(2.75)
+    table.add_data(True)
+    table.bind_to_run(mocked_run, "mixed", 0)
+    assert wandb.ColumnarTable.read(table._path)["value"].tolist() == [1, 2, 2.75, 1]
+
+    fixed = wandb.ColumnarTable(["value"], dtypes={"value": "int32"})
+    fixed.add_data(3)
+    with pytest.raises(TypeError):
+        fixed.add_data(1.5)
+    with pytest.raises(TypeError):
+        fixed.add_data("text")
+    fixed.close()
+    assert not os.path.exists(fixed._tmp_path)
+    with pytest.raises(ValueError):
+        fixed.add_data(4)
+
+
+def test_columnar_table_out_of_range(mocked_run):
+    fixed = wandb.ColumnarTable(["value"], dtypes={"value": "int8"})
+    fixed.add_columns(np.array([-128, 127]))
+    with pytest.raises(TypeError):
+        fixed.add_columns(np.array([1000]))
+    with pytest.raises(TypeError):
+        fixed.add_data(-129)
+    fixed.close()
+
+    inferred = wandb.ColumnarTable(["value"], chunk_rows=2)
+    inferred.add_columns(np.array([1, 2, 3], dtype=np.uint8))
+    inferred.add_columns(np.array([-1, 100000]))
+    inferred.bind_to_run(mocked_run, "inferred", 0)
+    values = wandb.ColumnarTable.read(inferred._path)["value"].tolist()
+    assert values == [1, 2, 3, -1, 100000]
+
+
 point_cloud_1 = np.array([[0, 0, 0, 1],
                           [0, 0, 1, 13],
                           [0, 1, 0, 2],
@@ -376,6 +581,20 @@ def test_object3d_numpy(mocked_run):
     assert obj3.to_json(mocked_run)["_type"] == "object3D-file"
 
 
+def test_object3d_numpy_binary(mocked_run):
+    obj = wandb.Object3D(point_cloud_3, binary=True, voxel_size=0.5)
+    obj.bind_to_run(mocked_run, "object3d", 0)
+    assert obj.to_json(mocked_run)["path"].endswith(".pts.bin")
+    with open(obj._path, "rb") as f:
+        raw = f.read()
+    header_len = np.frombuffer(raw[:4], dtype="<u4")[0]
+    header = json.loads(raw[4:4 + header_len].decode("utf-8"))
+    # the duplicate point was dropped by the voxel grid
+    assert header["count"] == 3
+    assert [f["name"] for f in header["fields"]] == ["position", "rgb"]
+    assert len(raw) == 4 + header_len + 3 * (3 * 4 + 3)
+
+
 def test_object3d_obj(mocked_run):
     obj = wandb.Object3D(utils.fixture_open("cube.obj"))
     obj.bind_to_run(mocked_run, "object3D", 0)
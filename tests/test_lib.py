@@ -1,5 +1,6 @@
 from wandb import lib
 import os
+import time
 
 
 def test_write_netrc():
@@ -8,4 +9,61 @@ def test_write_netrc():
     with open(os.path.expanduser("~/.netrc")) as f:
         assert f.read() == ("machine localhost\n"
                             "  login vanpelt\n"
-                            "  password %s\n" % api_key)
\ No newline at end of file
+                            "  password %s\n" % api_key)
+
+
+def test_buffered_console_callback():
+    calls = []
+    cb = lib.redirect.BufferedCallback(
+        lambda name, data: calls.append((name, data)), max_bytes=16, max_seconds=60)
+    cb("stdout", b"one\ntw")
+    cb("stderr", "err\n")
+    assert calls == []
+    # Full buffers are passed on up to their last newline
+    cb("stdout", b"o\nthree\nfo")
+    assert calls == [("stdout", b"one\ntwo\nthree\n")]
+    # A partial line is held back until it is longer than max_bytes
+    cb("stdout", b"ur")
+    assert len(calls) == 1
+    cb("stdout", b"-and-a-long-line")
+    assert calls[-1] == ("stdout", b"four-and-a-long-line")
+    cb("stdout", b"five")
+    cb.close()
+    assert set(calls[-2:]) == set([("stdout", b"five"), ("stderr", "err\n")])
+
+
+def test_buffered_console_callback_partial_lines():
+    calls = []
+    cb = lib.redirect.BufferedCallback(
+        lambda name, data: calls.append((name, data)), max_seconds=0.05)
+    cb("stdout", b"\r10%")
+    cb("stdout", b"\r20%")
+    # Progress without a newline is passed on once it is max_seconds old
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == [("stdout", b"\r10%\r20%")]
+    cb.close()
+
+
+def test_relay_buffer_spill():
+    buf = lib.redirect.RelayBuffer(max_bytes=8)
+    buf.put(b"12345")
+    buf.put(b"678")
+    # Over the limit, output goes through the spill file
+    buf.put(b"abc")
+    # Stays in the spill file until it is drained, to keep the order
+    buf.put(b"d")
+    assert buf.delayed_bytes == 4
+    # Buffered writes are coalesced
+    assert buf.get() == b"12345678"
+    buf.put(b"e")
+    assert buf.get() == b"abcde"
+    # Back in memory once the spill file is drained
+    buf.put(b"f")
+    buf.close()
+    assert buf.get() == b"f"
+    assert buf.get() is None
+    assert buf.delayed_bytes == 5
+    assert buf.dropped_bytes == 0
+    buf.release()
@@ -12,6 +12,7 @@ import platform
 
 import wandb
 from wandb import Api
+from wandb.apis.artifact_download import ArtifactDownloader
 
 
 @pytest.fixture
@@ -257,7 +258,7 @@ def test_artifact_get_path(runner, mock_server, api):
         path = art.get_path("digits.h5")
         res = path.download()
         path = os.path.join(os.path.expanduser("~"), ".cache", "wandb", "artifacts",
-                            "obj", "md5", "4d", "e489e31c57834a21b8be7111dab613")
+                            "obj", "md5", "97", "257c4b449917ff8c9d1d665319f7a1")
         assert res == path
 
 
@@ -291,6 +292,78 @@ def test_artifact_download(runner, mock_server, api):
         assert path == os.path.join(".", "artifacts", part)
 
 
+@pytest.mark.skipif(platform.system() == "Windows",
+                    reason="links require extra privileges on Windows")
+def test_artifact_download_hardlink(runner, mock_server, api):
+    with runner.isolated_filesystem():
+        art = api.artifact("entity/project/mnist:v0", type="dataset")
+        path = art.download(root="linked", materialize="hardlink")
+        cache_path = art.get_path("digits.h5").download()
+        assert os.path.samefile(os.path.join(path, "digits.h5"), cache_path)
+        with pytest.raises(ValueError):
+            art.download(materialize="bogus")
+
+
+def test_artifact_download_progress(runner, mock_server, api):
+    with runner.isolated_filesystem():
+        art = api.artifact("entity/project/mnist:v0", type="dataset")
+        reports = []
+        art.download(progress_callback=reports.append)
+        assert reports[-1].files_done == reports[-1].files_total == 1
+        assert reports[-1].bytes_done == reports[-1].bytes_total == 18
+        assert reports[-1].failed == 0
+
+
+def test_artifact_downloader_retries_largest_first():
+    calls = []
+
+    def download(name, progress_callback):
+        calls.append(name)
+        if name == "flaky" and calls.count("flaky") == 1:
+            raise ValueError("flaky")
+
+    downloader = ArtifactDownloader(
+        download, [("small", 1), ("flaky", 5), ("big", 10)],
+        min_workers=1, max_workers=1)
+    downloader.run()
+    assert calls == ["big", "flaky", "small", "flaky"]
+
+
+def test_artifact_downloader_failure():
+    def download(name, progress_callback):
+        if name == "broken":
+            raise ValueError("broken")
+
+    downloader = ArtifactDownloader(
+        download, [("fine", 1), ("broken", 1)], attempts=2)
+    with pytest.raises(wandb.CommError):
+        downloader.run()
+    assert downloader.progress().failed == 1
+    assert downloader.progress().files_done == 2
+
+
+def test_artifact_get_path_open(runner, mock_server, api):
+    art = api.artifact("entity/project/mnist:v0", type="dataset")
+    with art.get_path("digits.h5").open() as f:
+        assert f.read() == b"ARTIFACT digits.h5"
+    with pytest.raises(ValueError):
+        art.get_path("digits.h5").open("w")
+
+
+def test_artifact_view(runner, mock_server, api):
+    art = api.artifact("entity/project/mnist:v0", type="dataset")
+    view = art.view()
+    assert view.listdir() == ["digits.h5"]
+    assert "digits.h5" in view
+    assert view.isfile("digits.h5")
+    assert not view.isdir("digits.h5")
+    with pytest.raises(KeyError):
+        view.listdir("missing")
+    view.prefetch(["digits.h5"]).join()
+    with view.open("digits.h5", "r") as f:
+        assert f.read() == "ARTIFACT digits.h5"
+
+
 def test_artifact_run_used(runner, mock_server, api):
     run = api.run("test/test/test")
     arts = run.used_artifacts()
@@ -335,10 +408,14 @@ def test_artifact_manual_error(runner, mock_server, api):
 @pytest.mark.skipif(platform.system() == "Windows",
                     reason="Verify is broken on Windows")
 def test_artifact_verify(runner, mock_server, api):
-    art = api.artifact("entity/project/mnist:v0", type="dataset")
-    art.download()
-    with pytest.raises(ValueError):
+    with runner.isolated_filesystem():
+        art = api.artifact("entity/project/mnist:v0", type="dataset")
+        path = art.download()
         art.verify()
+        with open(os.path.join(path, "digits.h5"), "w") as f:
+            f.write("corrupted")
+        with pytest.raises(ValueError):
+            art.verify()
 
 
 def test_sweep(runner, mock_server, api):
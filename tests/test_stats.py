@@ -0,0 +1,144 @@
+"""system stats tests."""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+import wandb
+from wandb.internal import stats
+
+
+class Interface(object):
+    def __init__(self):
+        self.published = []
+
+    def publish_stats(self, stats):
+        self.published.append(stats)
+
+
+def system_stats(samples, settings=None):
+    interface = Interface()
+    system = stats.SystemStats(pid=os.getpid(), interface=interface, settings=settings)
+    samples = iter(samples)
+    system.stats = lambda: next(samples)
+    return system, interface
+
+
+def test_sample_schedule_defaults():
+    system, _ = system_stats([])
+    assert system.sample_rate_seconds == stats.SAMPLE_RATE_SECONDS
+    assert system.samples_to_average == stats.SAMPLES_TO_AVERAGE
+    settings = wandb.Settings(system_sample_seconds=0.1, system_samples=100)
+    system, _ = system_stats([], settings)
+    assert system.sample_rate_seconds == 0.5
+    assert system.samples_to_average == 30
+
+
+def test_sampler_mean():
+    system, interface = system_stats(
+        [
+            {"cpu": 1, "disk": 10.0, "network": {"sent": 1}},
+            {"cpu": 4, "disk": 20.0, "network": {"sent": 2}},
+        ]
+    )
+    system.sample()
+    system.sample()
+    system.flush()
+    assert interface.published == [{"cpu": 2.5, "disk": 15.0, "network": {"sent": 2}}]
+    # Nothing is published until there are new samples
+    system.flush()
+    assert len(interface.published) == 1
+
+
+def test_sampler_spread():
+    settings = wandb.Settings(system_sample_spread=True)
+    system, interface = system_stats(
+        [{"cpu": 3}, {"cpu": 1}, {"cpu": 2}, {"cpu": 5, "gpu.0.gpu": 7}], settings
+    )
+    for _ in range(4):
+        system.sample()
+    system.flush()
+    assert interface.published == [
+        {
+            "cpu": 2.75,
+            "cpu.min": 1,
+            "cpu.max": 5,
+            "gpu.0.gpu": 7,
+            "gpu.0.gpu.min": 7,
+            "gpu.0.gpu.max": 7,
+        }
+    ]
+
+
+def sleeper(code="import time; time.sleep(30)"):
+    """Starts a python process, returning once it runs `code`"""
+    code = "import sys; print('started'); sys.stdout.flush()\n" + code
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE)
+    proc.stdout.readline()
+    return proc
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs procfs")
+def test_read_proc_stat():
+    proc = psutil.Process()
+    rss, threads = stats.read_proc_stat(proc.pid)
+    assert threads == proc.num_threads()
+    assert abs(rss - proc.memory_info().rss) < 16 * 1024 * 1024
+    assert stats.read_proc_stat(2 ** 22 + 1) is None
+
+
+def test_process_usage():
+    child = sleeper()
+    proc = psutil.Process(child.pid)
+    rss, cpu, _, _, _ = stats.process_usage(proc)
+    assert rss > 0
+    assert cpu >= 0
+    child.kill()
+    child.communicate()
+    assert stats.process_usage(proc) is None
+
+
+def test_process_tree_excludes_wandb():
+    user = sleeper()
+    # Stands in for the wandb internal process, with a child of its own
+    internal = sleeper(
+        "import subprocess, sys, time; "
+        "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+        "time.sleep(30)"
+    )
+    internal_proc = psutil.Process(internal.pid)
+    try:
+        for _ in range(100):
+            if internal_proc.children():
+                break
+            time.sleep(0.1)
+        assert internal_proc.children()
+        internal_pids = set([internal.pid, internal_proc.children()[0].pid])
+        tree = stats.ProcessTree(psutil.Process(), exclude=internal_proc)
+        usage, count = tree.children_usage(time.time())
+        assert user.pid in tree._children
+        assert not internal_pids & set(tree._children)
+        assert count == len(tree._children)
+        assert usage[0] > 0
+        # Exited children are dropped when sampled
+        user.kill()
+        user.wait()
+        tree.children_usage(time.time())
+        assert user.pid not in tree._children
+    finally:
+        for child in internal_proc.children():
+            child.kill()
+        for proc in (user, internal):
+            proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+
+def test_process_tree_of_user_process():
+    system, _ = system_stats([])
+    assert system.process_tree._exclude is None
+    system = stats.SystemStats(pid=os.getppid(), interface=Interface())
+    assert system.process_tree._exclude.pid == os.getpid()
@@ -0,0 +1,153 @@
+"""tensorboard watcher tests."""
+
+import os
+import threading
+import time
+
+import pytest
+from six.moves import queue
+from wandb.internal import tb_watcher
+
+
+class LineLoader(object):
+    """Loads the lines of a file as events, resuming after the last read"""
+
+    def __init__(self, path):
+        self._path = path
+        self._offset = 0
+
+    def Load(self):  # noqa: N802
+        with open(self._path) as f:
+            f.seek(self._offset)
+            for line in f:
+                self._offset += len(line)
+                yield line.strip()
+
+
+def test_file_reader_incremental(tmpdir):
+    path = str(tmpdir.join("events.tfevents.1"))
+    with open(path, "w") as f:
+        f.write("a\nb\n")
+    events = []
+    reader = tb_watcher.TBFileReader(
+        path, LineLoader, os.path.getsize, events.append
+    )
+    assert reader.has_new_data()
+    reader.load()
+    assert events == ["a", "b"]
+    # Nothing new since the last read
+    assert not reader.has_new_data()
+    with open(path, "a") as f:
+        f.write("c\n")
+    assert reader.has_new_data()
+    reader.load()
+    assert events == ["a", "b", "c"]
+
+
+def test_reader_pool_drains_on_finish(tmpdir):
+    class SlowLoader(LineLoader):
+        def Load(self):  # noqa: N802
+            time.sleep(0.1)
+            return super(SlowLoader, self).Load()
+
+    events = []
+    lock = threading.Lock()
+
+    def callback(event):
+        with lock:
+            events.append(event)
+
+    pool = tb_watcher.TBReaderPool(2)
+    pool.start()
+    for i in range(5):
+        path = str(tmpdir.join("events.tfevents.%i" % i))
+        with open(path, "w") as f:
+            f.write("%i\n" % i)
+        reader = tb_watcher.TBFileReader(path, SlowLoader, os.path.getsize, callback)
+        pool.schedule(reader)
+        assert not reader.has_new_data()
+    pool.finish()
+    assert sorted(events) == ["0", "1", "2", "3", "4"]
+
+
+def test_dir_watcher_polls(tmpdir):
+    event_file_writer = pytest.importorskip(
+        "tensorboard.summary.writer.event_file_writer"
+    )
+    event_pb2 = pytest.importorskip("tensorboard.compat.proto.event_pb2")
+
+    class Settings(object):
+        _start_time = time.time() - 10
+
+    class Watcher(object):
+        _settings = Settings()
+        _interface = None
+
+    def write(writer, step):
+        event = event_pb2.Event(step=step, wall_time=time.time())
+        event.summary.value.add(tag="loss", simple_value=step)
+        writer.add_event(event)
+        writer.flush()
+
+    logdir = str(tmpdir)
+    tmpdir.join("notes.txt").write("not events")
+    writer = event_file_writer.EventFileWriter(logdir)
+    write(writer, 0)
+    # A writer opened before launch that only writes afterwards
+    old_writer = event_file_writer.EventFileWriter(logdir, filename_suffix=".old")
+    old_writer.flush()
+    old_path = [p for p in os.listdir(logdir) if p.endswith(".old")][0]
+    old_time = Settings._start_time - 60
+    os.utime(os.path.join(logdir, old_path), (old_time, old_time))
+
+    events = queue.Queue()
+    pool = tb_watcher.TBReaderPool(2)
+    pool.start()
+    watcher = tb_watcher.TBDirWatcher(Watcher(), logdir, False, None, events, pool)
+
+    def poll():
+        watcher._poll()
+        for reader in watcher._readers.values():
+            reader.wait()
+        steps = []
+        while not events.empty():
+            steps.append(events.get().event.step)
+        return steps
+
+    assert poll() == [0]
+    assert watcher._rejected == set([str(tmpdir.join("notes.txt"))])
+    assert watcher._file_version is not None
+    # Only the events written since the last poll are read
+    write(writer, 1)
+    write(writer, 2)
+    assert poll() == [1, 2]
+    assert poll() == []
+    write(old_writer, 10)
+    assert poll() == [10]
+    writer.close()
+    old_writer.close()
+    pool.finish()
+
+
+def test_event_consumer_delay(monkeypatch):
+    class TFEvent(object):
+        def __init__(self, step):
+            self.step = step
+            self.wall_time = step
+
+    monkeypatch.setattr(tb_watcher.internal_run, "InternalRun", lambda *args: None)
+    handled = []
+    events = queue.PriorityQueue()
+    consumer = tb_watcher.TBEventConsumer(None, events, None, None, delay=60)
+    consumer._handle_events = lambda batch, history=None: handled.extend(batch)
+    consumer.start()
+    events.put(tb_watcher.Event(TFEvent(1), None))
+    events.put(tb_watcher.Event(TFEvent(0), None))
+    time.sleep(0.2)
+    # Events wait for the delay...
+    assert handled == []
+    start = time.time()
+    consumer.finish()
+    # ...which finish() cuts short
+    assert time.time() - start < 5
+    assert [event.event.step for event in handled] == [0, 1]
@@ -160,6 +160,15 @@ def test_tensorflow_json_nd_large():
     tensorflow_json_friendly_test(nested_list(3, 3, 3, 3, 3, 3, 3, 3))
 
 
+def test_json_friendly_scalars():
+    assert util.json_friendly(3) == (3, False)
+    assert util.json_friendly(None) == (None, False)
+    value, converted = util.json_friendly(numpy.float32(1.5))
+    assert (value, type(value), converted) == (1.5, float, True)
+    assert util.json_dumps_safer_history(float("nan")) == "NaN"
+    assert util.json_dumps_safer_history(numpy.int64(7)) == "7"
+
+
 def test_image_from_docker_args_simple():
     image = util.image_from_docker_args([
         "run", "-v", "/foo:/bar", "-e", "NICE=foo", "-it", "wandb/deepo", "/bin/bash"])
@@ -229,3 +238,25 @@ def test_sizeof_fmt():
     assert util.sizeof_fmt(1000) == "1000.0B"
     assert util.sizeof_fmt(1000000) == "976.6KiB"
     assert util.sizeof_fmt(5000000) == "4.8MiB"
+
+
+@pytest.mark.skipif(platform.system() == "Windows",
+                    reason="links require extra privileges on Windows")
+def test_materialize_file(runner):
+    with runner.isolated_filesystem():
+        with open("cached", "w") as f:
+            f.write("hello")
+        assert util.materialize_file("cached", "copied") == "copy"
+        assert not os.path.samefile("cached", "copied")
+        assert util.materialize_file("cached", "linked", "hardlink") == "hardlink"
+        assert os.path.samefile("cached", "linked")
+        assert util.materialize_file("cached", "sym", "symlink") == "symlink"
+        assert os.path.islink("sym")
+        # Re-materializing over a link must not write through it
+        assert util.materialize_file("cached", "sym") == "copy"
+        assert not os.path.islink("sym")
+        assert util.materialize_file("cached", "auto", "auto") in (
+            "reflink", "hardlink", "copy")
+        assert open("auto").read() == "hello"
+        with pytest.raises(ValueError):
+            util.materialize_file("cached", "bad", "bogus")
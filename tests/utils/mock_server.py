@@ -633,7 +633,7 @@ def create_app(user_ctx=None):
                 "storagePolicy": "wandb-storage-policy-v1",
                 "storagePolicyConfig": {},
                 "contents": {
-                    "digits.h5": {"digest": "TeSJ4xxXg0ohuL5xEdq2Ew==", "size": 81299},
+                    "digits.h5": {"digest": "lyV8S0SZF/+MnR1mUxn3oQ==", "size": 18},
                 },
             }
         elif file == "metadata.json":
@@ -642,6 +642,8 @@ def create_app(user_ctx=None):
 
     @app.route("/artifacts/<entity>/<digest>", methods=["GET", "POST"])
     def artifact_file(entity, digest):
+        if digest == "97257c4b449917ff8c9d1d665319f7a1":
+            return "ARTIFACT digits.h5", 200
         return "ARTIFACT %s" % digest, 200
 
     @app.route("/files/<entity>/<project>/<run>/file_stream", methods=["POST"])
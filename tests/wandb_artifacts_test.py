@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 from wandb import util
@@ -348,3 +349,101 @@ def test_add_reference_unknown_handler(runner):
         manifest = artifact.manifest.to_manifest_json()
         assert manifest['contents']['ref'] == {
             'digest': 'ref://example.com/somefile.txt', 'ref': 'ref://example.com/somefile.txt'}
+
+
+def mock_range_session(content):
+    class Response(object):
+        def __init__(self, status_code, data):
+            self.status_code = status_code
+            self.data = data
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size=1024):
+            for i in range(0, len(self.data), chunk_size):
+                yield self.data[i:i + chunk_size]
+
+    class Session(object):
+        def __init__(self):
+            self.requests = []
+
+        def get(self, url, stream=False, headers=None, **kwargs):
+            self.requests.append(headers)
+            if "Range" in headers:
+                start = int(headers["Range"][len("bytes="):-1])
+                return Response(206, content[start:])
+            return Response(200, content)
+
+    return Session()
+
+
+def test_download_to_cache_path_resumes(runner):
+    from wandb.interface.artifacts import md5_string
+    download_to_cache_path = wandb.wandb_sdk.wandb_artifacts.download_to_cache_path
+    with runner.isolated_filesystem():
+        with open('obj.partial', 'wb') as f:
+            f.write(b'hello ')
+        session = mock_range_session(b'hello world')
+        path = download_to_cache_path(
+            session, 'http://example.com/obj', 'obj', size=11,
+            md5_digest=md5_string('hello world'))
+
+        assert path == 'obj'
+        assert session.requests == [{'Range': 'bytes=6-'}]
+        assert open('obj', 'rb').read() == b'hello world'
+        assert not os.path.exists('obj.partial')
+
+
+def test_download_to_cache_path_digest_mismatch(runner):
+    from wandb.interface.artifacts import md5_string
+    download_to_cache_path = wandb.wandb_sdk.wandb_artifacts.download_to_cache_path
+    with runner.isolated_filesystem():
+        session = mock_range_session(b'corrupted!!')
+        with pytest.raises(ValueError):
+            download_to_cache_path(
+                session, 'http://example.com/obj', 'obj', size=11,
+                md5_digest=md5_string('hello world'))
+        assert not os.path.exists('obj')
+        assert not os.path.exists('obj.partial')
+
+
+def test_manifest_stream_roundtrip(runner):
+    from wandb.interface.artifacts import ArtifactManifest
+    with runner.isolated_filesystem():
+        for name in ['b/x.txt', 'a.txt', 'b/y.txt']:
+            with open(name.replace('/', '_'), 'w') as f:
+                f.write(name)
+        artifact = wandb.Artifact(type='dataset', name='my-arty')
+        for name in ['b/x.txt', 'a.txt', 'b/y.txt']:
+            artifact.add_file(name.replace('/', '_'), name=name)
+        manifest = artifact.manifest
+
+        with open('wandb_manifest.json', 'w') as fp:
+            manifest.write_manifest_json(fp)
+        text = open('wandb_manifest.json').read()
+        assert json.loads(text) == manifest.to_manifest_json()
+
+        chunks = [text[i:i + 5].encode() for i in range(0, len(text), 5)]
+        loaded = ArtifactManifest.from_manifest_stream(None, chunks)
+        assert loaded.to_manifest_json() == manifest.to_manifest_json()
+        assert loaded.digest() == artifact.digest
+        assert [e.path for e in loaded.entries_with_prefix('b/')] == [
+            'b/x.txt', 'b/y.txt']
+
+
+def test_manifest_sorted_paths_tracks_entries():
+    from wandb.interface.artifacts import ArtifactManifest
+
+    manifest = ArtifactManifest(None, None, {"b": 1, "a": 2})
+    assert manifest.sorted_paths() == ["a", "b"]
+    # replacing a path keeps the number of entries the same
+    manifest.entries.pop("b")
+    manifest.entries["c"] = 3
+    assert manifest.sorted_paths() == ["a", "c"]
+    del manifest.entries["a"]
+    manifest.entries.update({"0": 4})
+    assert manifest.sorted_paths() == ["0", "c"]
+    assert [e for e in manifest.entries_with_prefix("c")] == [3]
+    manifest.entries = {"z": 5}
+    assert manifest.sorted_paths() == ["z"]
@@ -2,6 +2,8 @@
 history test.
 """
 
+import random
+
 import pytest  # type: ignore
 
 from wandb import wandb_sdk
@@ -30,3 +32,40 @@ def test_row_update(mocked_run):
     h._set_callback(m.callback)
     h._row_update(dict(this=2)) 
     assert m.row is None
+
+
+def test_row_aggregate(mocked_run):
+    m = MockCallback()
+    h = wandb_sdk.History(mocked_run)
+    h._set_callback(m.callback)
+    h.aggregate(steps=3, stats=("min", "max", "count"))
+    for i in range(4):
+        h._row_add(dict(loss=float(i), label="step %i" % i))
+        if i < 2:
+            assert m.row is None
+    assert m.row["loss"] == 1.0
+    assert m.row["loss/min"] == 0.0
+    assert m.row["loss/max"] == 2.0
+    assert m.row["loss/count"] == 3
+    assert m.row["label"] == "step 2"
+    assert m.row["_step"] == 2
+
+    h._flush_aggregate()
+    assert m.row["loss"] == 3.0
+    assert m.row["_step"] == 3
+
+    with pytest.raises(ValueError):
+        h.aggregate(steps=3, stats=("median",))
+
+
+def test_row_aggregate_histogram_keeps_random_state(mocked_run):
+    m = MockCallback()
+    h = wandb_sdk.History(mocked_run)
+    h._set_callback(m.callback)
+    h.aggregate(steps=5000, histogram=True)
+    state = random.getstate()
+    for i in range(2000):
+        h._row_add(dict(loss=float(i)))
+    assert random.getstate() == state
+    h._flush_aggregate()
+    assert m.row["loss"] == 999.5
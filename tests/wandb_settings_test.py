@@ -71,6 +71,32 @@ def test_ignore_globs_env():
     assert s.ignore_globs == ("foo", "bar",)
 
 
+def test_system_samples_env():
+    s = Settings()
+    s._apply_environ(
+        {
+            "WANDB_SYSTEM_SAMPLE_SECONDS": "2.5",
+            "WANDB_SYSTEM_SAMPLES": "10",
+            "WANDB_SYSTEM_SAMPLE_SPREAD": "true",
+        }
+    )
+    s.setdefaults()
+    assert s.system_sample_seconds == 2.5
+    assert s.system_samples == 10
+    assert s.system_sample_spread is True
+
+
+def test_system_samples_env_invalid():
+    s = Settings()
+    s._apply_environ(
+        {"WANDB_SYSTEM_SAMPLES": "abc", "WANDB_SYSTEM_SAMPLE_SECONDS": "3"}
+    )
+    s.setdefaults()
+    # the invalid value is ignored, leaving the default to the stats thread
+    assert s.system_samples is None
+    assert s.system_sample_seconds == 3
+
+
 @pytest.mark.skip(reason="I need to make my mock work properly with new settings")
 def test_ignore_globs_settings(local_settings):
     with open(os.path.join(os.getcwd(), ".config", "wandb", "settings"), "w") as f:
@@ -2,6 +2,7 @@
 
 import pprint
 
+import numpy as np
 import os
 import six
 import tensorflow as tf
@@ -91,6 +92,70 @@ def test_tf_log(mocked_run):
     }
 
 
+def test_tf_log_events(mocked_run):
+    history = wandb_sdk.History(mocked_run)
+    summaries_logged = []
+
+    def spy_cb(row, step=None):
+        summaries_logged.append(row)
+
+    history._set_callback(spy_cb)
+
+    wandb.tensorboard.reset_state()
+    wandb.tensorboard.log_events(
+        [(SUMMARY_PB, 0, ""), (SUMMARY_PB, 1, ""), (SUMMARY_PB, 1, "")],
+        history=history,
+    )
+    history.add({})  # Flush the previous row.
+    assert len(summaries_logged) == 2
+    for summary in summaries_logged:
+        assert len(summary["input_reshape_input_image"]) == 10
+        assert summary["accuracy_1"] == 0.8799999952316284
+
+    single = wandb.tensorboard.tf_summary_to_dict(SUMMARY_PB)
+    bulk = wandb.tensorboard.tf_summaries_to_dicts([(SUMMARY_PB, "")])[0]
+    assert list(bulk) == list(single)
+    assert all(
+        bulk[k] == single[k]
+        for k in single
+        if not isinstance(single[k], (list, wandb.Histogram))
+    )
+
+
+def test_tf_summaries_scalar_tensors():
+    summary = tf.compat.v1.Summary()
+    summary.value.add(tag="t").tensor.CopyFrom(tf.make_tensor_proto(np.float32(1.5)))
+    summary.value.add(tag="i").tensor.CopyFrom(tf.make_tensor_proto(np.int64(7)))
+    single = wandb.tensorboard.tf_summary_to_dict(summary)
+    bulk = wandb.tensorboard.tf_summaries_to_dicts([(summary, ""), (summary, "")])
+    for values in bulk:
+        for key, expected in [("t", 1.5), ("i", 7)]:
+            # Same 0-d arrays make_ndarray returns
+            assert isinstance(values[key], np.ndarray)
+            assert values[key].shape == ()
+            assert values[key].dtype == single[key].dtype
+            assert values[key] == expected
+
+
+def test_tf_summaries_bad_image(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(wandb, "termwarn", lambda msg, **kwargs: warnings.append(msg))
+    buf = six.BytesIO()
+    wandb.Image(np.zeros((4, 4, 3), dtype=np.uint8))._image.save(buf, format="PNG")
+    good = tf.compat.v1.Summary()
+    good.value.add(tag="img").image.encoded_image_string = buf.getvalue()
+    bad = tf.compat.v1.Summary()
+    bad.value.add(tag="img").image.encoded_image_string = b"not an image"
+    bad.value.add(tag="loss", simple_value=0.5)
+    values = wandb.tensorboard.tf_summaries_to_dicts(
+        [(good, ""), (bad, ""), (good, "")]
+    )
+    # Only the image that fails to decode is dropped
+    assert [len(v["img"]) for v in values[::2]] == [1, 1]
+    assert values[1] == {"loss": 0.5}
+    assert len(warnings) == 1
+
+
 def test_hook(mocked_run):
     history = wandb_sdk.History(mocked_run)
     summaries_logged = []
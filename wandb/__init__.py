@@ -66,6 +66,7 @@ from wandb.data_types import Plotly
 from wandb.data_types import Video
 from wandb.data_types import Audio
 from wandb.data_types import Table
+from wandb.data_types import ColumnarTable
 from wandb.data_types import Html
 from wandb.data_types import Object3D
 from wandb.data_types import Molecule
@@ -172,6 +173,7 @@ __all__ = [
     "Video",
     "Audio",
     "Table",
+    "ColumnarTable",
     "Html",
     "Object3D",
     "Molecule",
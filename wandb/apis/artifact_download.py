@@ -0,0 +1,253 @@
+"""
+artifact_download.
+"""
+
+from collections import deque, namedtuple
+import logging
+import threading
+import time
+
+from wandb.errors.error import CommError
+
+logger = logging.getLogger(__name__)
+
+# Bounds for the number of concurrent downloads. The upper bound matches the
+# connection pool size of the artifacts storage policy.
+MIN_WORKERS = 4
+MAX_WORKERS = 64
+INITIAL_WORKERS = 16
+
+# How many times a single entry is attempted before the download fails.
+ENTRY_ATTEMPTS = 3
+
+# Relative throughput change needed before concurrency is adjusted.
+_RATE_THRESHOLD = 0.1
+
+# Smoothing factor for the reported bytes/sec.
+_RATE_SMOOTHING = 0.3
+
+DownloadProgress = namedtuple(
+    "DownloadProgress",
+    [
+        "files_done",
+        "files_total",
+        "bytes_done",
+        "bytes_total",
+        "bytes_per_sec",
+        "eta_seconds",
+        "concurrency",
+        "failed",
+    ],
+)
+
+
+class ArtifactDownloader(object):
+    """Downloads artifact entries with a self-tuning pool of threads.
+
+    Entries are scheduled largest first so that big files don't end up
+    downloading alone at the tail. Every `report_interval` seconds the
+    observed throughput is compared with the previous interval and the number
+    of workers is moved up or down (hill climbing) within
+    [min_workers, max_workers]. Failed entries are retried individually and
+    only fail the download once all other entries have been attempted.
+
+    Arguments:
+        download_fn: called as `download_fn(name, progress_callback)` for each
+            entry, where `progress_callback(new_bytes, total_bytes)` may be
+            called as data is received.
+        entries: iterable of `(name, size)` tuples.
+        callback: optional, called with a `DownloadProgress` every
+            `report_interval` seconds and once when the download finishes.
+    """
+
+    def __init__(
+        self,
+        download_fn,
+        entries,
+        callback=None,
+        min_workers=MIN_WORKERS,
+        max_workers=MAX_WORKERS,
+        initial_workers=INITIAL_WORKERS,
+        attempts=ENTRY_ATTEMPTS,
+        report_interval=1.0,
+    ):
+        self._download_fn = download_fn
+        self._callback = callback
+        self._min_workers = max(1, min_workers)
+        self._max_workers = max(self._min_workers, max_workers)
+        self._target = min(max(initial_workers, self._min_workers), self._max_workers)
+        self._attempts = attempts
+        self._report_interval = report_interval
+
+        entries = sorted(entries, key=lambda e: e[1] or 0, reverse=True)
+        self._sizes = dict(entries)
+        self._pending = deque((name, 0) for name, _ in entries)
+        self._files_total = len(entries)
+        self._bytes_total = sum(size or 0 for _, size in entries)
+
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+        self._entry_bytes = {}
+        self._in_flight = 0
+        self._files_done = 0
+        self._failed = {}
+        self._workers = 0
+
+        self._direction = 1
+        self._prev_rate = None
+        self._rate = 0.0
+        self._thread = None
+
+    def start(self):
+        """Runs the download in a background thread, see `join`."""
+        self._thread = threading.Thread(target=self._run_background)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run_background(self):
+        try:
+            self.run()
+        except CommError:
+            # Failures were logged by run(), callers will retry on access.
+            pass
+
+    def run(self):
+        """Downloads all entries, blocking until done.
+
+        Raises:
+            CommError: if any entry failed after all of its attempts.
+        """
+        if self._files_total == 0:
+            self._report()
+            return
+        self._spawn_workers()
+        last_bytes = 0
+        last_time = time.time()
+        while not self._done_event.wait(self._report_interval):
+            now = time.time()
+            bytes_done = self._bytes_done()
+            rate = (bytes_done - last_bytes) / max(now - last_time, 1e-6)
+            last_bytes, last_time = bytes_done, now
+            self._rate = (
+                _RATE_SMOOTHING * rate + (1 - _RATE_SMOOTHING) * self._rate
+                if self._prev_rate is not None
+                else rate
+            )
+            self._adjust_concurrency(rate)
+            self._spawn_workers()
+            self._report()
+        self._report()
+
+        if self._failed:
+            names = sorted(self._failed)
+            for name in names:
+                logger.error(
+                    "Failed to download artifact file %s: %s", name, self._failed[name]
+                )
+            raise CommError(
+                "Failed to download %i artifact files, first failure %s: %s"
+                % (len(names), names[0], self._failed[names[0]]),
+                exc=self._failed[names[0]],
+            )
+
+    def progress(self):
+        bytes_done = self._bytes_done()
+        remaining = max(self._bytes_total - bytes_done, 0)
+        eta = remaining / self._rate if self._rate > 0 else None
+        with self._lock:
+            return DownloadProgress(
+                files_done=self._files_done,
+                files_total=self._files_total,
+                bytes_done=bytes_done,
+                bytes_total=self._bytes_total,
+                bytes_per_sec=self._rate,
+                eta_seconds=eta,
+                concurrency=self._workers,
+                failed=len(self._failed),
+            )
+
+    def _report(self):
+        if self._callback is not None:
+            self._callback(self.progress())
+
+    def _bytes_done(self):
+        with self._lock:
+            return sum(self._entry_bytes.values())
+
+    def _adjust_concurrency(self, rate):
+        prev_rate = self._prev_rate
+        self._prev_rate = rate
+        if prev_rate is None or rate > prev_rate * (1 + _RATE_THRESHOLD):
+            # Keep moving in the direction that helped
+            step = self._direction
+        elif rate < prev_rate * (1 - _RATE_THRESHOLD):
+            self._direction = -self._direction
+            step = self._direction
+        else:
+            return
+        with self._lock:
+            delta = max(1, self._target // 4)
+            self._target = min(
+                max(self._target + step * delta, self._min_workers), self._max_workers
+            )
+
+    def _spawn_workers(self):
+        with self._lock:
+            count = min(self._target, len(self._pending)) - self._workers
+            self._workers += max(count, 0)
+        for _ in range(count):
+            thread = threading.Thread(target=self._worker)
+            thread.daemon = True
+            thread.start()
+
+    def _next_entry(self):
+        with self._lock:
+            if self._workers > self._target or not self._pending:
+                self._workers -= 1
+                return None
+            self._in_flight += 1
+            return self._pending.popleft()
+
+    def _worker(self):
+        while True:
+            item = self._next_entry()
+            if item is None:
+                return
+            name, attempt = item
+
+            def progress_callback(new_bytes, total_bytes, name=name):
+                with self._lock:
+                    self._entry_bytes[name] = total_bytes
+
+            try:
+                self._download_fn(name, progress_callback)
+            except Exception as e:
+                logger.warning(
+                    "Error downloading artifact file %s (attempt %i): %s",
+                    name,
+                    attempt + 1,
+                    e,
+                )
+                with self._lock:
+                    if attempt + 1 < self._attempts:
+                        self._pending.append((name, attempt + 1))
+                    else:
+                        self._failed[name] = e
+                        self._files_done += 1
+                    self._finish_entry()
+                continue
+
+            with self._lock:
+                self._entry_bytes[name] = self._sizes.get(name) or 0
+                self._files_done += 1
+                self._finish_entry()
+
+    def _finish_entry(self):
+        # Must be called with self._lock held.
+        self._in_flight -= 1
+        if self._in_flight == 0 and not self._pending:
+            self._done_event.set()
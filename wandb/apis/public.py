@@ -1,11 +1,9 @@
 import datetime
-from functools import partial
 import json
 import logging
 import os
 import platform
 import re
-import shutil
 import tempfile
 import time
 
@@ -17,6 +15,7 @@ import six
 from six.moves import urllib
 import wandb
 from wandb import __version__, env, util
+from wandb.apis.artifact_download import ArtifactDownloader
 from wandb.apis.internal import Api as InternalApi
 from wandb.apis.normalize import normalize_exceptions
 from wandb.errors.term import termlog
@@ -2493,7 +2492,7 @@ class Artifact(object):
 
         class ArtifactEntry(object):
             @staticmethod
-            def copy(cache_path, target_path):
+            def copy(cache_path, target_path, materialize="copy"):
                 # can't have colons in Windows
                 if platform.system() == "Windows":
                     head, tail = os.path.splitdrive(target_path)
@@ -2505,25 +2504,38 @@ class Artifact(object):
                 )
                 if need_copy:
                     util.mkdir_exists_ok(os.path.dirname(target_path))
-                    # We use copy2, which preserves file metadata including modified
-                    # time (which we use above to check whether we should do the copy).
-                    shutil.copy2(cache_path, target_path)
+                    # Copies preserve file metadata including modified time (which
+                    # we use above to check whether we should do the copy), links
+                    # share it with the cache object.
+                    util.materialize_file(cache_path, target_path, materialize)
                 return target_path
 
             @staticmethod
-            def download(root=None):
+            def download(root=None, materialize="copy", progress_callback=None):
                 if entry.ref is not None:
                     return storage_policy.load_reference(
                         self, name, manifest.entries[name], local=True
                     )
 
                 cache_path = storage_policy.load_file(
-                    self, name, manifest.entries[name]
+                    self,
+                    name,
+                    manifest.entries[name],
+                    progress_callback=progress_callback,
                 )
                 if root is not None:
-                    return ArtifactEntry().copy(cache_path, os.path.join(root, name))
+                    return ArtifactEntry().copy(
+                        cache_path, os.path.join(root, name), materialize
+                    )
                 return cache_path
 
+            @staticmethod
+            def open(mode="rb"):
+                """Fetches the file into the cache if needed and opens it read-only."""
+                if any(c in mode for c in "wax+"):
+                    raise ValueError("Artifact files can only be opened for reading")
+                return open(ArtifactEntry().download(), mode)
+
             @staticmethod
             def ref():
                 if entry.ref is not None:
@@ -2534,16 +2546,31 @@ class Artifact(object):
 
         return ArtifactEntry()
 
-    def download(self, root=None):
+    def download(self, root=None, materialize="copy", progress_callback=None):
         """Download the artifact to dir specified by the <root>
 
         Args:
             root (str, optional): directory to download artifact to. If None
                 artifact will be downloaded to './artifacts/<self.name>/'
+            materialize (str, optional): how files are placed in <root> from the
+                local artifacts cache. One of "copy" (default), "hardlink",
+                "symlink", "reflink" or "auto" (reflink, then hardlink). Link
+                modes fall back to copying when a link can't be created, e.g.
+                across filesystems. Linked files share storage with the cache
+                and must not be modified in place.
+            progress_callback (callable, optional): called about once per second
+                with a `DownloadProgress` namedtuple reporting files and bytes
+                done, bytes/sec, the estimated seconds remaining and the current
+                number of concurrent downloads.
 
         Returns:
             The path to the downloaded contents.
         """
+        if materialize not in util.MATERIALIZE_MODES:
+            raise ValueError(
+                "Invalid materialize mode %s, must be one of: %s"
+                % (materialize, ", ".join(util.MATERIALIZE_MODES))
+            )
         dirpath = root
         if dirpath is None:
             dirpath = os.path.join(".", "artifacts", self.name)
@@ -2566,13 +2593,21 @@ class Artifact(object):
         start_time = time.time()
 
         # Force all the files to download into the same directory.
-        # Download in parallel
-        import multiprocessing.dummy  # this uses threads
+        # Download in parallel, largest files first, with adaptive concurrency.
+        def download_entry(name, entry_progress_callback):
+            self._download_file(
+                name,
+                dirpath,
+                materialize=materialize,
+                progress_callback=entry_progress_callback,
+            )
 
-        pool = multiprocessing.dummy.Pool(32)
-        pool.map(partial(self._download_file, dirpath=dirpath), manifest.entries)
-        pool.close()
-        pool.join()
+        downloader = ArtifactDownloader(
+            download_entry,
+            [(name, entry.size) for name, entry in manifest.entries.items()],
+            callback=progress_callback,
+        )
+        downloader.run()
 
         self._is_downloaded = True
 
@@ -2580,6 +2615,14 @@ class Artifact(object):
             termlog("Done. %.1fs" % (time.time() - start_time), prefix=False)
         return dirpath
 
+    def view(self):
+        """Returns a read-only `ArtifactView` of the artifact's files.
+
+        Unlike `download`, files are only fetched into the local artifacts
+        cache when they are first opened.
+        """
+        return ArtifactView(self)
+
     def file(self, root=None):
         """Download a single file artifact to dir specified by the <root>
 
@@ -2603,9 +2646,9 @@ class Artifact(object):
 
         return self._download_file(list(manifest.entries)[0], root)
 
-    def _download_file(self, name, dirpath):
-        # download file into cache and copy to target dir
-        return self.get_path(name).download(dirpath)
+    def _download_file(self, name, dirpath, materialize="copy", progress_callback=None):
+        # download file into cache and materialize it in the target dir
+        return self.get_path(name).download(dirpath, materialize, progress_callback)
 
     @normalize_exceptions
     def save(self):
@@ -2733,14 +2776,114 @@ class Artifact(object):
     def _load_manifest(self):
         if self._manifest is None:
             index_file_url = self._attrs["currentManifest"]["file"]["directUrl"]
-            with requests.get(index_file_url) as req:
+            with requests.get(index_file_url, stream=True) as req:
                 req.raise_for_status()
-                self._manifest = artifacts.ArtifactManifest.from_manifest_json(
-                    self, json.loads(req.content)
+                self._manifest = artifacts.ArtifactManifest.from_manifest_stream(
+                    self, req.iter_content(chunk_size=1024 * 1024)
                 )
         return self._manifest
 
 
+class ArtifactView(object):
+    """A read-only, lazily fetched view of the files in an artifact.
+
+    Only the manifest is loaded up front. Each file is downloaded into the local
+    artifacts cache the first time it's opened, so reading a handful of files
+    from a large artifact doesn't transfer the rest of it. Paths are the
+    artifact's logical names, with "/" separating directories.
+
+    Example:
+        view = api.artifact("entity/project/dataset:v0").view()
+        view.prefetch(view.listdir("val"))
+        with view.open("val/0001.png") as f:
+            ...
+    """
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    @property
+    def artifact(self):
+        return self._artifact
+
+    def _entries(self):
+        return self._artifact._load_manifest().entries
+
+    def _names_with_prefix(self, prefix):
+        for entry in self._artifact._load_manifest().entries_with_prefix(prefix):
+            yield entry.path
+
+    def isfile(self, path):
+        return path in self._entries()
+
+    def isdir(self, path):
+        prefix = path.strip("/") + "/" if path.strip("/") else ""
+        return any(True for _ in self._names_with_prefix(prefix))
+
+    def exists(self, path):
+        return self.isfile(path) or self.isdir(path)
+
+    def listdir(self, path=""):
+        """Returns the full paths of the files and directories directly under `path`."""
+        prefix = path.strip("/") + "/" if path.strip("/") else ""
+        children = []
+        for name in self._names_with_prefix(prefix):
+            child = prefix + name[len(prefix):].split("/", 1)[0]
+            if not children or children[-1] != child:
+                children.append(child)
+        if not children and not self.isfile(path):
+            raise KeyError("Path not contained in artifact: %s" % path)
+        return children
+
+    def size(self, path):
+        entry = self._entries().get(path)
+        if entry is None:
+            raise KeyError("Path not contained in artifact: %s" % path)
+        return entry.size
+
+    def local_path(self, path):
+        """Fetches the file into the local artifacts cache and returns its path.
+
+        The returned file is shared by every download of the same content and
+        must not be modified.
+        """
+        return self._artifact.get_path(path).download()
+
+    def open(self, path, mode="rb"):
+        return self._artifact.get_path(path).open(mode)
+
+    def prefetch(self, paths):
+        """Starts fetching `paths` into the cache in the background.
+
+        Returns:
+            The `ArtifactDownloader` doing the work, which can be polled with
+            `progress()` or waited on with `join()`.
+        """
+        entries = self._entries()
+        paths = [path for path in paths if path in entries]
+
+        def fetch(path, progress_callback):
+            self._artifact.get_path(path).download(progress_callback=progress_callback)
+
+        downloader = ArtifactDownloader(
+            fetch, [(path, entries[path].size) for path in paths]
+        )
+        downloader.start()
+        return downloader
+
+    def __contains__(self, path):
+        return self.exists(path)
+
+    def __iter__(self):
+        return iter(self._artifact._load_manifest().sorted_paths())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __repr__(self):
+        return "<ArtifactView {}>".format(self._artifact.name)
+
+
 class ArtifactVersions(Paginator):
     """An iterable collection of artifact versions associated with a project and optional filter.
     This is generally used indirectly via the :obj:`Api`.artifact_versions method
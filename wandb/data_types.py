@@ -7,12 +7,13 @@ All of the special data types are subclasses of WBValue. All of the data types
 
 from __future__ import print_function
 
-import hashlib
 import itertools
 import json
 import pprint
 import shutil
 from six.moves import queue
+import sys
+import threading
 import warnings
 
 import numbers
@@ -26,6 +27,7 @@ import uuid
 import json
 import codecs
 import tempfile
+from wandb import env
 from wandb import util
 from wandb.util import has_num
 from wandb.compat import tempfile
@@ -55,6 +57,84 @@ def wb_filename(key, step, id, extension):
     return  '{}_{}_{}{}'.format(key, step, id, extension)
 
 
+class _MediaTask(object):
+    """A unit of work submitted to the media encoder, waited on before the
+    encoded file is needed."""
+
+    def __init__(self, fn):
+        self._fn = fn
+        self._done = threading.Event()
+        self._exc_info = None
+
+    def run(self):
+        try:
+            self._fn()
+        except Exception:
+            self._exc_info = sys.exc_info()
+        finally:
+            self._fn = None
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self):
+        self._done.wait()
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+
+
+class _MediaEncoder(object):
+    """Bounded pool of threads that encode and hash media files off the
+    caller's thread.
+
+    At most `max_pending` tasks are queued, past that `submit` blocks until a
+    worker frees a slot so that buffered pixel data can't grow without bound.
+    With `num_workers` set to 0 tasks run inline in `submit`.
+    """
+
+    def __init__(self, num_workers, max_pending):
+        self._num_workers = num_workers
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn):
+        task = _MediaTask(fn)
+        if self._num_workers <= 0:
+            task.run()
+            return task
+        self._ensure_started()
+        self._queue.put(task)
+        return task
+
+    def _ensure_started(self):
+        with self._lock:
+            # Threads don't survive a fork, so check liveness rather than count.
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self._num_workers:
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            task.run()
+
+
+_media_encoder = None
+
+
+def _get_media_encoder():
+    global _media_encoder
+    if _media_encoder is None:
+        num_workers = env.get_media_encode_workers()
+        _media_encoder = _MediaEncoder(num_workers, max_pending=4 * num_workers)
+    return _media_encoder
+
+
 class WBValue(object):
     """Abstract parent class for things that can be logged by wandb.log() and
         visualized by wandb.
@@ -95,11 +175,20 @@ class Histogram(WBValue):
         wandb.Histogram(np_histogram=hist)
         ```
 
+        Approximate a histogram of a large array from a sample of its values.
+        ```
+        wandb.Histogram(embeddings, max_error=0.01)
+        ```
+
     Arguments:
         sequence (array_like): input data for histogram
         np_histogram (numpy histogram): alternative input of a precoomputed histogram
         num_bins (int): Number of bins for the histogram.  The default number of bins
             is 64.  The maximum number of bins is 512
+        max_error (float): if set, the histogram of sequence is estimated from a
+            uniform sample of its values, large enough that the fraction of values
+            in each bin is within max_error of the exact one with 99% confidence.
+            The bin edges span the sampled values.
 
     Attributes:
         bins ([float]): edges of bins
@@ -107,7 +196,7 @@ class Histogram(WBValue):
     """
     MAX_LENGTH = 512
 
-    def __init__(self, sequence=None, np_histogram=None, num_bins=64):
+    def __init__(self, sequence=None, np_histogram=None, num_bins=64, max_error=None):
 
         if np_histogram:
             if len(np_histogram) == 2:
@@ -120,8 +209,13 @@ class Histogram(WBValue):
             np = util.get_module(
                 "numpy", required="Auto creation of histograms requires numpy")
 
+            scale = 1
+            if max_error:
+                sequence, scale = util.sample_array(sequence, max_error)
             self.histogram, self.bins = np.histogram(
                 sequence, bins=num_bins)
+            if scale != 1:
+                self.histogram = np.rint(self.histogram * scale).astype(np.int64)
             self.histogram = self.histogram.tolist()
             self.bins = self.bins.tolist()
         if len(self.histogram) > self.MAX_LENGTH:
@@ -147,18 +241,33 @@ class Media(WBValue):
         # The run under which this object is bound, if any.
         self._run = None
         self._caption = caption
+        self._encode_task = None
 
-    def _set_file(self, path, is_tmp=False, extension=None):
+    def _set_file(self, path, is_tmp=False, extension=None, sha256=None):
         self._path = path
         self._is_tmp = is_tmp
         self._extension = extension
         if extension is not None and not path.endswith(extension):
             raise ValueError('Media file extension "{}" must occur at the end of path "{}".'.format(extension, path))
 
-        with open(self._path, 'rb') as f:
-            self._sha256 = hashlib.sha256(f.read()).hexdigest()
+        # Writers that hash while encoding pass the digest along, anything
+        # else is hashed in chunks rather than read into memory at once.
+        self._sha256 = sha256 or util.sha256_file(self._path)
         self._size = os.path.getsize(self._path)
 
+    def _set_file_async(self, encode_fn, extension=None):
+        """Like `_set_file` for a temporary file, but `encode_fn` runs on the
+        media encoder pool. It must write the file and return its path and
+        sha256 hex digest, or None if it didn't compute one."""
+        def encode():
+            path, sha256 = encode_fn()
+            self._set_file(path, is_tmp=True, extension=extension, sha256=sha256)
+        self._encode_task = _get_media_encoder().submit(encode)
+
+    def _wait_encoded(self):
+        if self._encode_task is not None:
+            self._encode_task.wait()
+
     @classmethod
     def get_media_subdir(cls):
         raise NotImplementedError
@@ -174,6 +283,7 @@ class Media(WBValue):
         return self._run is not None
 
     def file_is_set(self):
+        self._wait_encoded()
         return self._path is not None
 
     def bind_to_run(self, run, key, step, id_=None):
@@ -197,8 +307,21 @@ class Media(WBValue):
             extension = self._extension
             rootname = os.path.basename(self._path)[:-len(extension)]
 
+        # Content addressed: media identical to a file already stored in this
+        # run refers to that file instead of being stored and uploaded again.
+        # Batches are stored by index since their filenames aren't recorded.
+        # Run-like objects without the index (e.g. public API runs) skip this.
+        media_paths = getattr(self._run, "_media_paths", None)
+        stored_key = (self.get_media_subdir(), extension, self._sha256)
         if id_ is None:
             id_ = self._sha256[:8]
+            stored_path = media_paths.get(stored_key) if media_paths is not None else None
+            if stored_path is not None and os.path.exists(stored_path):
+                if self._is_tmp:
+                    os.remove(self._path)
+                    self._is_tmp = False
+                self._path = stored_path
+                return
 
         file_path = wb_filename(key, step, id_, extension)
         media_path = os.path.join(self.get_media_subdir(), file_path)
@@ -214,6 +337,8 @@ class Media(WBValue):
             shutil.copy(self._path, new_path)
             self._path = new_path
             _datatypes_callback(media_path)
+        if media_paths is not None:
+            media_paths[stored_key] = new_path
 
     def to_json(self, run):
         """Get the JSON-friendly dict that represents this object.
@@ -312,6 +437,248 @@ class Table(Media):
         return json_dict
 
 
+class ColumnarTable(Media):
+    """An append-only table stored column by column, for tables too large for
+    `Table`. Rows are buffered in typed numpy columns and written to disk
+    `chunk_rows` at a time, so memory use doesn't grow with the table.
+
+    Arguments:
+        columns ([str]): Names of the columns in the table.
+        dtypes (dict): Optional numpy dtype for each column name, or "str" for
+            text. Other columns get their type from the first values added and
+            are widened (bool to int to float, or to a larger int) when later
+            values need it. Values that don't fit a column raise a TypeError.
+        chunk_rows (int): Number of rows buffered before a chunk is written.
+
+    Call `close()` to discard a table that won't be logged.
+
+    The `.table.bin` file is a sequence of chunks. Each chunk is a little endian
+    uint32 header length, a JSON header
+        {"rows": n, "columns": [{"name": ..., "dtype": ..., "nbytes": ...}, ...]}
+    and then the column buffers in order. Numeric columns are packed little
+    endian arrays, "str" columns are int64 end offsets followed by utf-8 text.
+    """
+    CHUNK_ROWS = 65536
+
+    def __init__(self, columns, dtypes=None, chunk_rows=CHUNK_ROWS):
+        super(ColumnarTable, self).__init__()
+        if len(set(columns)) != len(columns):
+            raise ValueError("Column names must be unique")
+        self.columns = list(columns)
+        dtypes = dtypes or {}
+        self._dtypes = [self._column_dtype(dtypes[c]) if c in dtypes else None for c in self.columns]
+        self._fixed = [c in dtypes for c in self.columns]
+        self._chunk_rows = max(chunk_rows, 1)
+        self._buffers = None
+        self._buffered = 0
+        self._rows = 0
+        self._closed = False
+
+        self._tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + '.table.bin')
+        # Opened when the first chunk is written
+        self._file = None
+        self._writer = None
+
+    @staticmethod
+    def _column_dtype(dtype):
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        if dtype in ('str', str, six.text_type):
+            return 'str'
+        dtype = np.dtype(dtype)
+        if dtype.kind not in 'biuf':
+            return 'str'
+        return dtype.newbyteorder('<')
+
+    def add_data(self, *data):
+        """Appends a single row"""
+        if len(data) != len(self.columns):
+            raise ValueError("This table expects {} columns: {}".format(
+                len(self.columns), self.columns))
+        self._ensure_buffers(data)
+        self._check_types(data)
+        i = self._buffered
+        for buf, value in zip(self._buffers, data):
+            buf[i] = value
+        self._buffered += 1
+        self._rows += 1
+        if self._buffered == self._chunk_rows:
+            self._flush()
+
+    def add_columns(self, *columns):
+        """Appends many rows at once, given one array of values per column"""
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        if len(columns) != len(self.columns):
+            raise ValueError("This table expects {} columns: {}".format(
+                len(self.columns), self.columns))
+        columns = [np.asarray(col) for col in columns]
+        count = len(columns[0])
+        if any(len(col) != count for col in columns):
+            raise ValueError("All columns must have the same number of rows")
+        if count == 0:
+            return
+        self._ensure_buffers([col[0] for col in columns])
+        self._check_types(columns)
+
+        start = 0
+        while start < count:
+            n = min(count - start, self._chunk_rows - self._buffered)
+            end = self._buffered + n
+            for buf, col in zip(self._buffers, columns):
+                buf[self._buffered:end] = col[start:start + n]
+            self._buffered = end
+            self._rows += n
+            start += n
+            if self._buffered == self._chunk_rows:
+                self._flush()
+
+    def _ensure_buffers(self, values):
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        if self._closed:
+            raise ValueError("Rows can't be added to a ColumnarTable after it has been logged or closed")
+        if self._buffers is not None:
+            return
+        for i, value in enumerate(values):
+            if isinstance(value, WBValue):
+                raise TypeError("wandb.ColumnarTable doesn't support media values")
+            if self._dtypes[i] is None:
+                self._dtypes[i] = 'str' if isinstance(value, six.string_types) else self._column_dtype(
+                    np.asarray(value).dtype)
+        self._buffers = [[None] * self._chunk_rows if dtype == 'str' else np.empty(self._chunk_rows, dtype=dtype)
+                         for dtype in self._dtypes]
+
+    @staticmethod
+    def _fits(value, value_dtype, dtype):
+        """Whether numeric values can be stored in a `dtype` column without
+        wrapping around"""
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        if value_dtype.kind == 'b' or dtype.kind == 'f':
+            return True
+        if value_dtype.kind == 'f' or dtype.kind == 'b':
+            return False
+        if np.can_cast(value_dtype, dtype, 'safe'):
+            return True
+        # Integers of a wider type may still be in range, like python ints
+        info = np.iinfo(dtype)
+        return info.min <= int(np.min(value)) and int(np.max(value)) <= info.max
+
+    def _check_types(self, values):
+        """Widens inferred numeric columns to fit values, or raises TypeError"""
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        for i, value in enumerate(values):
+            dtype = self._dtypes[i]
+            if dtype == 'str':
+                continue
+            value_dtype = value.dtype if isinstance(value, (np.ndarray, np.generic)) else np.asarray(value).dtype
+            if value_dtype == dtype:
+                continue
+            if value_dtype.kind not in 'biuf':
+                raise TypeError("Column {!r} holds {} values, got {}".format(
+                    self.columns[i], dtype.name, value_dtype))
+            if self._fits(value, value_dtype, dtype):
+                continue
+            if self._fixed[i]:
+                raise TypeError("Column {!r} holds {} values, got {} values that don't fit".format(
+                    self.columns[i], dtype.name, value_dtype))
+            # Chunks already written keep their type, read() widens them
+            dtype = np.result_type(dtype, value_dtype).newbyteorder('<')
+            self._dtypes[i] = dtype
+            self._buffers[i] = self._buffers[i].astype(dtype)
+
+    def _flush(self):
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        n = self._buffered
+        if n == 0:
+            return
+        header_columns = []
+        blobs = []
+        for name, dtype, buf in zip(self.columns, self._dtypes, self._buffers):
+            if dtype == 'str':
+                encoded = [six.text_type(v).encode('utf-8') for v in buf[:n]]
+                ends = np.cumsum([len(e) for e in encoded], dtype='<i8')
+                text = b''.join(encoded)
+                header_columns.append({'name': name, 'dtype': 'str', 'nbytes': ends.nbytes + len(text)})
+                blobs.extend([ends.data, text])
+            else:
+                header_columns.append({'name': name, 'dtype': dtype.name, 'nbytes': buf[:n].nbytes})
+                blobs.append(buf[:n].data)
+
+        header = json.dumps({'rows': n, 'columns': header_columns},
+                            separators=(',', ':'), sort_keys=True).encode('utf-8')
+        self._open()
+        try:
+            self._writer.write(np.array([len(header)], dtype='<u4').tobytes())
+            self._writer.write(header)
+            for blob in blobs:
+                self._writer.write(blob)
+        except Exception:
+            self.close()
+            raise
+        self._buffered = 0
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self._tmp_path, 'wb')
+            self._writer = util.HashingWriter(self._file)
+
+    def close(self):
+        """Discards a table that hasn't been logged, releasing its file"""
+        if self._closed:
+            return
+        self._closed = True
+        self._buffers = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    @classmethod
+    def read(cls, path):
+        """Loads a `.table.bin` file into a dict of column name to numpy array"""
+        np = util.get_module("numpy", required="wandb.ColumnarTable requires numpy: pip install numpy")
+        chunks = collections.OrderedDict()
+        with open(path, 'rb') as f:
+            while True:
+                size = f.read(4)
+                if not size:
+                    break
+                header = json.loads(f.read(int(np.frombuffer(size, dtype='<u4')[0])).decode('utf-8'))
+                for col in header['columns']:
+                    raw = f.read(col['nbytes'])
+                    if col['dtype'] == 'str':
+                        rows = header['rows']
+                        ends = np.frombuffer(raw, dtype='<i8', count=rows)
+                        text = raw[ends.nbytes:]
+                        starts = np.concatenate(([0], ends[:-1]))
+                        values = np.array([text[s:e].decode('utf-8') for s, e in zip(starts, ends)], dtype=object)
+                    else:
+                        values = np.frombuffer(raw, dtype=np.dtype(col['dtype']).newbyteorder('<'))
+                    chunks.setdefault(col['name'], []).append(values)
+        return collections.OrderedDict((name, np.concatenate(parts)) for name, parts in chunks.items())
+
+    def bind_to_run(self, *args, **kwargs):
+        if not self._closed:
+            if self._buffers is not None:
+                self._flush()
+            self._open()
+            self._file.close()
+            self._file = None
+            self._closed = True
+            self._set_file(self._tmp_path, is_tmp=True, extension='.table.bin', sha256=self._writer.hexdigest())
+        super(ColumnarTable, self).bind_to_run(*args, **kwargs)
+
+    @classmethod
+    def get_media_subdir(cls):
+        return os.path.join('media', 'table')
+
+    def to_json(self, run):
+        json_dict = super(ColumnarTable, self).to_json(run)
+        json_dict['_type'] = 'columnar-table-file'
+        json_dict['ncols'] = len(self.columns)
+        json_dict['nrows'] = self._rows
+        return json_dict
+
+
 class Audio(BatchableMedia):
     """
         Wandb class for audio clips.
@@ -425,12 +792,19 @@ class Object3D(BatchableMedia):
                 [x y z c],     ...] nx4 where c is a category with supported range [1, 14]
                 [x y z r g b], ...] nx4 where is rgb is color
                 ```
+            binary (boolean): Store numpy point clouds in the compact `.pts.bin`
+                format rather than as JSON, see `Object3D.write_binary_points`.
+            voxel_size (float): Downsample numpy point clouds to one point per
+                voxel of this size before storing them.
 
     """
 
     SUPPORTED_TYPES = set(['obj', 'gltf', 'babylon', 'stl'])
 
-    def __init__(self, data_or_path, **kwargs):
+    # Points written to .pts.bin files at a time, bounds the temporary copies
+    BINARY_CHUNK_POINTS = 1 << 20
+
+    def __init__(self, data_or_path, binary=False, voxel_size=None, **kwargs):
         super(Object3D, self).__init__()
 
         if hasattr(data_or_path, 'name'):
@@ -492,14 +866,73 @@ class Object3D(BatchableMedia):
                                      [x y z c],     ...] nx4 where c is a category with supported range [1, 14]
                                      [x y z r g b], ...] nx4 where is rgb is color""")
 
-            data = data.tolist()
-            tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + '.pts.json')
-            json.dump(data, codecs.open(tmp_path, 'w', encoding='utf-8'),
-                      separators=(',', ':'), sort_keys=True, indent=4)
-            self._set_file(tmp_path, is_tmp=True, extension='.pts.json')
+            if voxel_size:
+                data = Object3D.voxel_downsample(data, voxel_size)
+
+            if binary:
+                tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + '.pts.bin')
+                sha256 = Object3D.write_binary_points(data, tmp_path)
+                self._set_file(tmp_path, is_tmp=True, extension='.pts.bin', sha256=sha256)
+            else:
+                data = data.tolist()
+                tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + '.pts.json')
+                json.dump(data, codecs.open(tmp_path, 'w', encoding='utf-8'),
+                          separators=(',', ':'), sort_keys=True, indent=4)
+                self._set_file(tmp_path, is_tmp=True, extension='.pts.json')
         else:
             raise ValueError("data must be a numpy array, dict or a file object")
 
+    @classmethod
+    def voxel_downsample(cls, points, voxel_size):
+        """
+        Keeps the first point of every `voxel_size` sized voxel, in their
+        original order.
+        """
+        np = util.get_module("numpy", required="Voxel downsampling requires numpy")
+        voxels = np.floor(points[:, :3] / voxel_size).astype(np.int64)
+        _, first = np.unique(voxels, axis=0, return_index=True)
+        return points[np.sort(first)]
+
+    @classmethod
+    def write_binary_points(cls, points, path):
+        """
+        Writes an nx3, nx4 or nx6 point cloud to `path` and returns its sha256.
+
+        The file starts with the length of a JSON header as a little endian
+        uint32, followed by the header itself:
+            {"version": 1, "count": n, "fields": [{"name": ..., "dtype": ..., "components": ...}, ...]}
+        and then one packed little endian buffer per field, in order. Positions
+        are float32, categories and rgb colors uint8.
+        """
+        np = util.get_module("numpy", required="Binary point clouds require numpy")
+        fields = [('position', '<f4', slice(0, 3))]
+        if points.shape[1] == 4:
+            fields.append(('category', 'u1', slice(3, 4)))
+        elif points.shape[1] == 6:
+            fields.append(('rgb', 'u1', slice(3, 6)))
+
+        header = json.dumps({
+            'version': 1,
+            'count': len(points),
+            'fields': [{'name': name, 'dtype': np.dtype(dtype).name, 'components': cols.stop - cols.start}
+                       for name, dtype, cols in fields],
+        }, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            writer = util.HashingWriter(f)
+            writer.write(np.array([len(header)], dtype='<u4').tobytes())
+            writer.write(header)
+            for _, dtype, cols in fields:
+                column = points[:, cols]
+                if column.dtype == np.dtype(dtype) and column.flags.c_contiguous:
+                    # already in the stored layout, write the array's own memory
+                    writer.write(column.data)
+                    continue
+                for start in range(0, len(points), cls.BINARY_CHUNK_POINTS):
+                    chunk = np.ascontiguousarray(column[start:start + cls.BINARY_CHUNK_POINTS], dtype=dtype)
+                    writer.write(chunk.data)
+        return writer.hexdigest()
+
     @classmethod
     def get_media_subdir(self):
         return os.path.join('media', 'object3D')
@@ -684,7 +1117,7 @@ class Video(BatchableMedia):
         Wandb representation of video.
 
         Args:
-            data_or_path (numpy array | string | io):
+            data_or_path (numpy array | string | io | VideoStream):
                 Video can be initialized with a path to a file or an io object.
                     The format must be "gif", "mp4", "webm" or "ogg".
                     The format must be specified with the format argument.
@@ -692,6 +1125,8 @@ class Video(BatchableMedia):
                     The numpy tensor must be either 4 dimensional or 5 dimensional.
                     Channels should be (time, channel, height, width) or
                         (batch, time, channel, height width)
+                Video can be initialized with a finished `VideoStream`, see
+                    `Video.stream`.
             caption (string): caption associated with the video for display
             fps (int): frames per second for video. Default is 4.
             format (string): format of video, necessary if initializing with path or io object.
@@ -711,11 +1146,20 @@ class Video(BatchableMedia):
         if self._format not in Video.EXTS:
             raise ValueError("wandb.Video accepts %s formats" % ", ".join(Video.EXTS))
 
-        if isinstance(data_or_path, six.BytesIO):
+        if isinstance(data_or_path, VideoStream):
+            data_or_path.close()
+            if data_or_path.frames == 0:
+                raise ValueError("wandb.Video can't be created from a VideoStream without frames")
+            self._fps = data_or_path.fps
+            self._format = data_or_path.format
+            self._height, self._width, self._channels = data_or_path.shape
+            self._set_file(data_or_path.path, is_tmp=True)
+        elif isinstance(data_or_path, six.BytesIO):
             filename = os.path.join(MEDIA_TMP.name, util.generate_id() + '.'+ self._format)
             with open(filename, "wb") as f:
-                f.write(data_or_path.read())
-            self._set_file(filename, is_tmp=True)
+                writer = util.HashingWriter(f)
+                shutil.copyfileobj(data_or_path, writer)
+            self._set_file(filename, is_tmp=True, sha256=writer.hexdigest())
         elif isinstance(data_or_path, six.string_types):
             _, ext = os.path.splitext(data_or_path)
             ext = ext[1:].lower()
@@ -732,27 +1176,41 @@ class Video(BatchableMedia):
                 raise ValueError("wandb.Video accepts a file path or numpy like data as input")
             self.encode()
 
+    @classmethod
+    def stream(cls, fps=4, format="gif", max_pending=16):
+        """
+        Returns a `VideoStream` that encodes frames in the background as they
+        are added, so long rollouts never have to be held in memory as a
+        whole. Log it with `wandb.Video(stream)` once all frames are added.
+        """
+        return VideoStream(fps=fps, format=format, max_pending=max_pending)
+
     def encode(self):
-        mpy = util.get_module(
-            "moviepy.editor", required='wandb.Video requires moviepy and imageio when passing raw data.  Install with "pip install moviepy imageio"')
-        tensor = self._prepare_video(self.data)
-        _, self._height, self._width, self._channels = tensor.shape
-
-        # encode sequence of images into gif string
-        clip = mpy.ImageSequenceClip(list(tensor), fps=self._fps)
-
-        filename = os.path.join(MEDIA_TMP.name, util.generate_id() + '.'+ self._format)
-        try:  # older version of moviepy does not support progress_bar argument.
-            if self._format == "gif":
-                clip.write_gif(filename, verbose=False, progress_bar=False)
-            else:
-                clip.write_videofile(filename, verbose=False, progress_bar=False)
-        except TypeError:
-            if self._format == "gif":
-                clip.write_gif(filename, verbose=False)
-            else:
-                clip.write_videofile(filename, verbose=False)
-        self._set_file(filename, is_tmp=True)
+        np = util.get_module(
+            "numpy", required='wandb.Video requires numpy when passing raw data. To get it, run "pip install numpy".')
+        util.get_module(
+            "imageio", required='wandb.Video requires imageio when passing raw data.  Install with "pip install imageio"')
+        V = self.data
+        if V.ndim < 4:
+            raise ValueError("Video must be atleast 4 dimensions: time, channels, height, width")
+        if V.ndim == 4:
+            V = V.reshape(1, *V.shape)
+        b, t, c, h, w = V.shape
+        n_rows, n_cols = self._grid_shape(b)
+        self._height, self._width, self._channels = n_rows * h, n_cols * w, c
+
+        if V.dtype != np.uint8:
+            logging.warning("Converting video data to uint8")
+        # A single uint8 copy, the caller may reuse its buffer while the
+        # frames are tiled and encoded one at a time in the background.
+        V = V.astype(np.uint8)
+
+        def encode():
+            filename = os.path.join(MEDIA_TMP.name, util.generate_id() + '.' + self._format)
+            frames = (self._prepare_video(V[:, i:i + 1])[0] for i in range(t))
+            _write_video(filename, frames, self._fps)
+            return filename, None
+        self._set_file_async(encode)
 
     @classmethod
     def get_media_subdir(cls):
@@ -771,7 +1229,15 @@ class Video(BatchableMedia):
 
         return json_dict
 
-    def _prepare_video(self, V):
+    @classmethod
+    def _grid_shape(cls, batch_size):
+        """Rows and columns of the grid a batch of videos is tiled into"""
+        padded = 2**(batch_size - 1).bit_length()
+        n_rows = 2**((batch_size.bit_length() - 1) // 2)
+        return n_rows, padded // n_rows
+
+    @classmethod
+    def _prepare_video(cls, V):
         """This logic was mostly taken from tensorboardX"""
         np = util.get_module(
             "numpy", required='wandb.Video requires numpy when passing raw data. To get it, run "pip install numpy".')
@@ -792,14 +1258,14 @@ class Video(BatchableMedia):
         if not is_power2(V.shape[0]):
             len_addition = int(2**V.shape[0].bit_length() - V.shape[0])
             V = np.concatenate(
-                (V, np.zeros(shape=(len_addition, t, c, h, w))), axis=0)
+                (V, np.zeros(shape=(len_addition, t, c, h, w), dtype=V.dtype)), axis=0)
 
         n_rows = 2**((b.bit_length() - 1) // 2)
         n_cols = V.shape[0] // n_rows
 
-        V = np.reshape(V, newshape=(n_rows, n_cols, t, c, h, w))
+        V = np.reshape(V, (n_rows, n_cols, t, c, h, w))
         V = np.transpose(V, axes=(2, 0, 4, 1, 5, 3))
-        V = np.reshape(V, newshape=(t, n_rows * h, n_cols * w, c))
+        V = np.reshape(V, (t, n_rows * h, n_cols * w, c))
         return V
 
     @classmethod
@@ -823,6 +1289,109 @@ class Video(BatchableMedia):
             return False
 
 
+def _write_video(path, frames, fps):
+    imageio = util.get_module(
+        "imageio", required='wandb.Video requires imageio when passing raw data.  Install with "pip install imageio"')
+    kwargs = {}
+    if not path.endswith(".gif"):
+        util.get_module(
+            "imageio_ffmpeg",
+            required='wandb.Video requires imageio-ffmpeg to encode mp4, webm and ogg videos.  Install with "pip install imageio-ffmpeg"')
+        # ffmpeg would otherwise resize frames to a multiple of 16 pixels
+        kwargs["macro_block_size"] = 1
+    writer = imageio.get_writer(path, fps=fps, **kwargs)
+    try:
+        for frame in frames:
+            writer.append_data(frame)
+    finally:
+        writer.close()
+
+
+class VideoStream(object):
+    """
+        Encodes a video frame by frame on a background thread, see `Video.stream`.
+
+        Frames are (channel, height, width) arrays, or (batch, channel, height,
+        width) arrays which are tiled like the batches of `wandb.Video`. At most
+        `max_pending` frames wait to be encoded, `add_frame` blocks past that.
+    """
+
+    def __init__(self, fps=4, format="gif", max_pending=16):
+        if format not in Video.EXTS:
+            raise ValueError("wandb.Video accepts %s formats" % ", ".join(Video.EXTS))
+        util.get_module(
+            "imageio", required='wandb.Video requires imageio when passing raw data.  Install with "pip install imageio"')
+        self.fps = fps
+        self.format = format
+        self.path = os.path.join(MEDIA_TMP.name, util.generate_id() + '.' + format)
+        self.shape = None
+        self.frames = 0
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._closed = False
+        self._exc_info = None
+        self._thread = threading.Thread(target=self._encode)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add_frame(self, frame):
+        np = util.get_module(
+            "numpy", required='wandb.Video requires numpy when passing raw data. To get it, run "pip install numpy".')
+        if self._closed:
+            raise ValueError("Frames can't be added to a closed VideoStream")
+        self._raise_error()
+
+        if hasattr(frame, "numpy"):  # TF data eager tensors
+            frame = frame.numpy()
+        if frame.ndim not in (3, 4):
+            raise ValueError("Video frames must be 3 (channel, height, width) or 4 (batch, channel, height, width) dimensions")
+        if frame.dtype != np.uint8 and self.frames == 0:
+            logging.warning("Converting video data to uint8")
+        # always copies, so the caller may reuse the frame's buffer
+        frame = frame.astype(np.uint8)
+        if frame.ndim == 3:
+            frame = frame[None]
+        frame = Video._prepare_video(frame[:, None])[0]
+
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError("All frames of a video must have the same shape, expected %s got %s" % (
+                list(self.shape), list(frame.shape)))
+        self._queue.put(frame)
+        self.frames += 1
+
+    def close(self):
+        """Waits for all frames to be encoded"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+
+    def _frames(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            yield frame
+
+    def _encode(self):
+        frames = self._frames()
+        try:
+            first = next(frames, None)
+            if first is not None:
+                _write_video(self.path, itertools.chain([first], frames), self.fps)
+        except Exception:
+            self._exc_info = sys.exc_info()
+            # keep consuming so add_frame and close never block
+            for _ in frames:
+                pass
+
+
 class Image(BatchableMedia):
     """
         Wandb class for images.
@@ -834,6 +1403,14 @@ class Image(BatchableMedia):
             mode (string): The PIL mode for an image. Most common are "L", "RGB",
                 "RGBA". Full explanation at https://pillow.readthedocs.io/en/4.2.x/handbook/concepts.html#concept-modes.
             caption (string): Label for display of image.
+            file_type (string): "png" (default), "jpg" or "webp". Lossy types are
+                smaller and much faster to encode for photos and samples.
+            quality (int): JPEG/WebP quality, 1 to 100.
+            compress_level (int): PNG compression level, 0 (fastest) to 9.
+            max_dimension (int): Downscale so that neither side is larger than
+                this before encoding, keeping the aspect ratio.
+
+        Passing any of the encoding options with a path re-encodes the file.
     """
 
     MAX_ITEMS = 108
@@ -841,7 +1418,11 @@ class Image(BatchableMedia):
     # PIL limit
     MAX_DIMENSION = 65500
 
-    def __init__(self, data_or_path, mode=None, caption=None, grouping=None, boxes=None, masks=None):
+    # file type -> PIL format
+    FILE_TYPES = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+    def __init__(self, data_or_path, mode=None, caption=None, grouping=None, boxes=None, masks=None,
+                 file_type=None, quality=None, compress_level=None, max_dimension=None):
         super(Image, self).__init__()
         # TODO: We should remove grouping, it's a terrible name and I don't
         # think anyone uses it.
@@ -850,7 +1431,18 @@ class Image(BatchableMedia):
         self._caption = caption
         self._width = None
         self._height = None
-        self._image = None
+        self._pil_image = None
+
+        encode_options = any(opt is not None for opt in (file_type, quality, compress_level, max_dimension))
+        file_type = (file_type or 'png').lower()
+        if file_type not in Image.FILE_TYPES:
+            raise ValueError("wandb.Image file_type must be one of %s" % ", ".join(sorted(Image.FILE_TYPES)))
+        if max_dimension is not None and (boxes or masks):
+            raise ValueError("wandb.Image max_dimension can't be used with boxes or masks")
+        self._file_type = 'jpg' if file_type == 'jpeg' else file_type
+        self._quality = quality
+        self._compress_level = compress_level
+        self._max_dimension = max_dimension
 
         self._boxes = None
         if boxes:
@@ -874,43 +1466,86 @@ class Image(BatchableMedia):
         PILImage = util.get_module(
             "PIL.Image", required='wandb.Image needs the PIL package. To get it, run "pip install pillow".')
 
-        if isinstance(data_or_path, six.string_types):
+        if isinstance(data_or_path, six.string_types) and not encode_options:
             self._set_file(data_or_path, is_tmp=False)
-            self._image = PILImage.open(data_or_path)
+            self._pil_image = PILImage.open(data_or_path)
             ext = os.path.splitext(data_or_path)[1][1:]
             self.format = ext
+            self._width, self._height = self._pil_image.size
         else:
             data = data_or_path
 
-            if util.is_matplotlib_typename(util.get_full_typename(data)):
+            if isinstance(data, six.string_types):
+                self._pil_image = PILImage.open(data)
+            elif util.is_matplotlib_typename(util.get_full_typename(data)):
                 buf = six.BytesIO()
                 util.ensure_matplotlib_figure(data).savefig(buf)
-                self._image = PILImage.open(buf)
+                self._pil_image = PILImage.open(buf)
             elif isinstance(data, PILImage.Image):
-                self._image = data
+                # the caller may keep drawing on its image while it's encoded
+                self._pil_image = data.copy()
             elif util.is_pytorch_tensor_typename(util.get_full_typename(data)):
                 vis_util = util.get_module(
                     "torchvision.utils", "torchvision is required to render images")
                 if hasattr(data, "requires_grad") and data.requires_grad:
                     data = data.detach()
                 data = vis_util.make_grid(data, normalize=True)
-                self._image = PILImage.fromarray(data.mul(255).clamp(
+                self._pil_image = PILImage.fromarray(data.mul(255).clamp(
                     0, 255).byte().permute(1, 2, 0).cpu().numpy())
             else:
                 if hasattr(data, "numpy"):  # TF data eager tensors
                     data = data.numpy()
                 if data.ndim > 2:
                     data = data.squeeze()  # get rid of trivial dimensions as a convenience
-                self._image = PILImage.fromarray(
-                    self.to_uint8(data), mode=mode or self.guess_mode(data))
-
-            tmp_path = os.path.join(
-                MEDIA_TMP.name, util.generate_id() + '.png')
-            self.format = "png"
-            self._image.save(tmp_path, transparency=None)
-            self._set_file(tmp_path, is_tmp=True)
+                mode = mode or self.guess_mode(data)
+                # Copy the pixels so the caller can reuse its buffer while
+                # the image is converted and encoded in the background.
+                data = data.copy()
+                self._height, self._width = data.shape[:2]
+
+            if self._pil_image is not None:
+                self._width, self._height = self._pil_image.size
+            self._width, self._height = self._scaled_size(self._width, self._height)
+            self.format = self._file_type
+            self._set_file_async(lambda: self._encode(data, mode))
 
-        self._width, self._height = self._image.size
+    @property
+    def _image(self):
+        """The PIL image, once any pending conversion has finished"""
+        self._wait_encoded()
+        return self._pil_image
+
+    def _scaled_size(self, width, height):
+        if self._max_dimension is None or max(width, height) <= self._max_dimension:
+            return width, height
+        scale = float(self._max_dimension) / max(width, height)
+        return max(int(round(width * scale)), 1), max(int(round(height * scale)), 1)
+
+    def _encode(self, data, mode):
+        PILImage = util.get_module("PIL.Image")
+        if self._pil_image is None:
+            self._pil_image = PILImage.fromarray(self.to_uint8(data), mode=mode)
+        if self._pil_image.size != (self._width, self._height):
+            self._pil_image = self._pil_image.resize((self._width, self._height), PILImage.BICUBIC)
+
+        pil_format = Image.FILE_TYPES[self._file_type]
+        options = {}
+        if pil_format == 'PNG':
+            options['transparency'] = None
+            if self._compress_level is not None:
+                options['compress_level'] = self._compress_level
+        elif self._quality is not None:
+            options['quality'] = self._quality
+        image = self._pil_image
+        if pil_format == 'JPEG' and image.mode not in ('L', 'RGB', 'CMYK'):
+            image = image.convert('RGB')
+
+        tmp_path = os.path.join(
+            MEDIA_TMP.name, util.generate_id() + '.' + self._file_type)
+        with open(tmp_path, 'wb') as f:
+            writer = util.HashingWriter(f)
+            image.save(writer, format=pil_format, **options)
+        return tmp_path, writer.hexdigest()
 
     @classmethod
     def get_media_subdir(cls):
@@ -985,6 +1620,94 @@ class Image(BatchableMedia):
         #assert issubclass(data.dtype.type, np.integer), 'Illegal image format.'
         return data.clip(0, 255).astype(np.uint8)
 
+    @classmethod
+    def from_batch(cls, data, mode=None, captions=None, boxes=None, masks=None, channels_first=None, **encoding):
+        """
+        Creates a list of Images from a batch of image data, to be logged like
+        any other list of images.
+
+        Normalization is done once for the whole batch with the same rules as
+        `to_uint8` applied to every image, and the images are encoded in
+        parallel.
+
+        Args:
+            data (numpy array | tensor): NHW, NHWC or NCHW image data.
+            mode (string): The PIL mode for all images, guessed if not given.
+            captions (list): Optional caption for each image.
+            boxes (list): Optional `boxes` argument for each image.
+            masks (list): Optional `masks` argument for each image.
+            channels_first (bool): Whether 4 dimensional data is NCHW, guessed
+                from the shape if not given.
+            **encoding: `file_type`, `quality`, `compress_level` or
+                `max_dimension`, applied to every image.
+        """
+        np = util.get_module(
+            "numpy", required="wandb.Image.from_batch requires numpy: pip install numpy")
+        PILImage = util.get_module(
+            "PIL.Image", required='wandb.Image needs the PIL package. To get it, run "pip install pillow".')
+
+        if util.is_pytorch_tensor_typename(util.get_full_typename(data)):
+            data = data.detach().cpu().numpy()
+        elif hasattr(data, "numpy"):  # TF data eager tensors
+            data = data.numpy()
+        data = np.asarray(data)
+        if data.ndim not in (3, 4):
+            raise ValueError(
+                "Image batches must be 3 (NHW) or 4 (NHWC or NCHW) dimensional, got shape %s" % list(data.shape))
+
+        if data.ndim == 4:
+            if channels_first is None:
+                channels_first = data.shape[1] in (1, 3, 4) and data.shape[-1] not in (1, 3, 4)
+            if channels_first:
+                data = data.transpose(0, 2, 3, 1)
+            if data.shape[-1] == 1:
+                data = data[..., 0]
+
+        data = cls.batch_to_uint8(data)
+        if mode is None:
+            mode = "L" if data.ndim == 3 else {3: "RGB", 4: "RGBA"}.get(data.shape[-1])
+            if mode is None:
+                raise ValueError(
+                    "Un-supported shape for image conversion %s" % list(data.shape[1:]))
+
+        n = data.shape[0]
+        captions = captions or [None] * n
+        boxes = boxes or [None] * n
+        masks = masks or [None] * n
+        if not len(captions) == len(boxes) == len(masks) == n:
+            raise ValueError("captions, boxes and masks must have one entry per image")
+
+        return [cls(PILImage.fromarray(data[i], mode=mode), caption=captions[i],
+                    boxes=boxes[i], masks=masks[i], **encoding) for i in range(n)]
+
+    @classmethod
+    def batch_to_uint8(cls, data):
+        """
+        Vectorized `to_uint8` over the first axis of `data`, every image is
+        normalized as if it was converted on its own.
+        """
+        np = util.get_module(
+            "numpy", required="wandb.Image requires numpy if not supplying PIL Images: pip install numpy")
+
+        n = data.shape[0]
+        flat = data.reshape(n, -1)
+        dmin = flat.min(axis=1)
+        dmax = flat.max(axis=1)
+        # per image values, broadcastable against the batch
+        shape = (n,) + (1,) * (data.ndim - 1)
+
+        negative = dmin < 0
+        if negative.any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scaled = (data - dmin.reshape(shape)) / (dmax - dmin).reshape(shape)
+            data = np.where(negative.reshape(shape), scaled, data)
+            dmax = np.where(negative, 1.0, dmax)
+        unit = dmax <= 1.0
+        if unit.any():
+            data = np.where(unit.reshape(shape), (data * 255).astype(np.int32), data)
+
+        return data.clip(0, 255).astype(np.uint8)
+
 
     @classmethod
     def seq_to_json(cls, images, run, key, step):
@@ -1003,8 +1726,13 @@ class Image(BatchableMedia):
                     cls.get_media_subdir(), obj['path']))
 
         num_images_to_log = len(images)
-        width, height = images[0]._image.size
+        width, height = images[0]._width, images[0]._height
         format = jsons[0]["format"]
+        # The frontend finds the files of a batch from a single format
+        if any(obj["format"] != format for obj in jsons):
+            wandb.termwarn('Images logged together have different formats ({}), some may not display. '
+                           'Pass the same file_type to each wandb.Image to avoid this.'.format(
+                               ", ".join(sorted(set(obj["format"] for obj in jsons)))), repeat=False)
 
         meta = {
             "_type": "images/separated",
@@ -1210,14 +1938,19 @@ class ImageMask(Media):
         self._key = key
 
         ext = "." + self.type_name() + ".png"
-        tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + ext)
-
         PILImage = util.get_module(
             "PIL.Image", required='wandb.Image needs the PIL package. To get it, run "pip install pillow".')
-        image = PILImage.fromarray(val["mask_data"].astype(np.int8), mode="L")
+        mask_data = val["mask_data"].astype(np.int8)
 
-        image.save(tmp_path, transparency=None)
-        self._set_file(tmp_path, is_tmp=True, extension=ext)
+        def encode():
+            tmp_path = os.path.join(MEDIA_TMP.name, util.generate_id() + ext)
+            image = PILImage.fromarray(mask_data, mode="L")
+            with open(tmp_path, 'wb') as f:
+                writer = util.HashingWriter(f)
+                image.save(writer, format='PNG', transparency=None)
+            return tmp_path, writer.hexdigest()
+
+        self._set_file_async(encode, extension=ext)
 
     def bind_to_run(self, run, key, step, id_=None):
         # bind_to_run key argument is the Image parent key
@@ -1682,6 +2415,11 @@ def nest(thing):
         return [thing]
 
 
+# Exact types val_to_json returns unchanged, so rows of plain numbers and
+# strings skip its checks entirely.
+_VAL_TO_JSON_PASSTHROUGH = util.JSON_SCALAR_TYPES | util.NUMPY_SCALAR_TYPES | frozenset([str, six.text_type])
+
+
 def history_dict_to_json(run, payload, step=None):
     # Converts a History row dict's elements so they're friendly for JSON serialization.
 
@@ -1689,9 +2427,12 @@ def history_dict_to_json(run, payload, step=None):
         # We should be at the top level of the History row; assume this key is set.
         step = payload['_step']
 
+    passthrough = _VAL_TO_JSON_PASSTHROUGH
     # We use list here because we were still seeing cases of RuntimeError dict changed size
     for key in list(payload):
         val = payload[key]
+        if type(val) in passthrough:
+            continue
         if isinstance(val, dict):
             payload[key] = history_dict_to_json(run, val, step=step)
         else:
@@ -1732,6 +2473,9 @@ def val_to_json(run, key, val, namespace=None):
         raise ValueError(
             "val_to_json must be called with a namespace(a step number, or 'summary') argument")
 
+    if type(val) in _VAL_TO_JSON_PASSTHROUGH:
+        return val
+
     converted = val
     typename = util.get_full_typename(val)
 
@@ -10,6 +10,7 @@ Environment variables are not the authoritative source for
 these values in many cases.
 """
 
+import multiprocessing
 import os
 import sys
 import json
@@ -60,6 +61,9 @@ ANONYMOUS = 'WANDB_ANONYMOUS'
 JUPYTER = 'WANDB_JUPYTER'
 CONFIG_DIR = 'WANDB_CONFIG_DIR'
 CACHE_DIR = 'WANDB_CACHE_DIR'
+ARTIFACT_DOWNLOAD_CHUNK_SIZE = 'WANDB_ARTIFACT_DOWNLOAD_CHUNK_SIZE'
+MEDIA_ENCODE_WORKERS = 'WANDB_MEDIA_ENCODE_WORKERS'
+HISTOGRAM_MAX_ERROR = 'WANDB_HISTOGRAM_MAX_ERROR'
 
 # For testing, to be removed in future version
 USE_V1_ARTIFACTS = '_WANDB_USE_V1_ARTIFACTS'
@@ -257,6 +261,41 @@ def get_cache_dir(env=None):
     return val
 
 
+def get_artifact_download_chunk_size(default=1024 * 1024, env=None):
+    if env is None:
+        env = os.environ
+    val = env.get(ARTIFACT_DOWNLOAD_CHUNK_SIZE, default)
+    try:
+        val = int(val)
+    except ValueError:
+        val = default
+    return val
+
+
+def get_media_encode_workers(default=None, env=None):
+    if env is None:
+        env = os.environ
+    if default is None:
+        default = min(4, multiprocessing.cpu_count())
+    val = env.get(MEDIA_ENCODE_WORKERS, default)
+    try:
+        val = max(int(val), 0)
+    except ValueError:
+        val = default
+    return val
+
+
+def get_histogram_max_error(default=None, env=None):
+    if env is None:
+        env = os.environ
+    val = env.get(HISTOGRAM_MAX_ERROR, default)
+    try:
+        val = float(val) if val is not None else None
+    except ValueError:
+        val = default
+    return val
+
+
 def get_use_v1_artifacts(env=None):
     if env is None:
         env = os.environ
@@ -48,7 +48,10 @@ class PolicyNow(FileEventHandler):
     def on_modified(self, force=False):
         # only upload if we've never uploaded or when .save is called
         if self._last_sync is None or force:
-            self._file_pusher.file_changed(self.save_name, self.file_path)
+            # Media files are written once under a unique name, so there's no
+            # need to snapshot them before uploading.
+            copy = not self.save_name.startswith("media/")
+            self._file_pusher.file_changed(self.save_name, self.file_path, copy=copy)
             self._last_sync = os.path.getmtime(self.file_path)
 
     def finish(self):
@@ -233,6 +233,9 @@ class WandbCallback(keras.callbacks.Callback):
         log_best_prefix (string): if None, no extra summary metrics will be saved.
             If set to a string, the monitored metric and epoch will be prepended with this value
             and stored as summary metrics.
+        image_encoding (dict): Keyword arguments for the `wandb.Image`s logged for
+            `input_type` and `output_type`, e.g. `{"file_type": "webp", "quality": 80,
+            "max_dimension": 256}`. See `wandb.Image` for the options.
     """
 
     def __init__(
@@ -258,6 +261,7 @@ class WandbCallback(keras.callbacks.Callback):
         log_batch_frequency=None,
         log_best_prefix="best_",
         save_graph=True,
+        image_encoding=None,
     ):
         if wandb.run is None:
             raise wandb.Error("You must call wandb.init() before WandbCallback()")
@@ -294,6 +298,7 @@ class WandbCallback(keras.callbacks.Callback):
         self.class_colors = np.array(class_colors) if class_colors is not None else None
         self.log_batch_frequency = log_batch_frequency
         self.log_best_prefix = log_best_prefix
+        self.image_encoding = image_encoding or {}
 
         self._prediction_batch_size = None
 
@@ -507,6 +512,10 @@ class WandbCallback(keras.callbacks.Callback):
         imgs = class_colors[np.argmax(masks, axis=-1)]
         return imgs
 
+    def _make_image(self, data, **kwargs):
+        kwargs.update(self.image_encoding)
+        return wandb.Image(data, **kwargs)
+
     def _log_images(self, num_images=36):
         validation_X = self.validation_data[0]
         validation_y = self.validation_data[1]
@@ -553,11 +562,11 @@ class WandbCallback(keras.callbacks.Callback):
                     else test_output
                 )
                 output_images = [
-                    wandb.Image(data, caption=captions[i], grouping=2)
+                    self._make_image(data, caption=captions[i], grouping=2)
                     for i, data in enumerate(output_image_data)
                 ]
                 reference_images = [
-                    wandb.Image(data, caption=captions[i])
+                    self._make_image(data, caption=captions[i])
                     for i, data in enumerate(reference_image_data)
                 ]
                 return list(chain.from_iterable(zip(output_images, reference_images)))
@@ -571,7 +580,7 @@ class WandbCallback(keras.callbacks.Callback):
                 # we just use the predicted label as the caption for now
                 captions = self._logits_to_captions(predictions)
                 return [
-                    wandb.Image(data, caption=captions[i])
+                    self._make_image(data, caption=captions[i])
                     for i, data in enumerate(test_data)
                 ]
             elif self.output_type in ("image", "images", "segmentation_mask"):
@@ -586,14 +595,14 @@ class WandbCallback(keras.callbacks.Callback):
                     else test_output
                 )
                 input_images = [
-                    wandb.Image(data, grouping=3)
+                    self._make_image(data, grouping=3)
                     for i, data in enumerate(input_image_data)
                 ]
                 output_images = [
-                    wandb.Image(data) for i, data in enumerate(output_image_data)
+                    self._make_image(data) for i, data in enumerate(output_image_data)
                 ]
                 reference_images = [
-                    wandb.Image(data) for i, data in enumerate(reference_image_data)
+                    self._make_image(data) for i, data in enumerate(reference_image_data)
                 ]
                 return list(
                     chain.from_iterable(
@@ -602,7 +611,7 @@ class WandbCallback(keras.callbacks.Callback):
                 )
             else:
                 # unknown output, just log the input images
-                return [wandb.Image(img) for img in test_data]
+                return [self._make_image(img) for img in test_data]
         elif self.output_type in ("image", "images", "segmentation_mask"):
             # unknown input, just log the predicted and reference outputs without captions
             output_image_data = (
@@ -616,11 +625,11 @@ class WandbCallback(keras.callbacks.Callback):
                 else test_output
             )
             output_images = [
-                wandb.Image(data, grouping=2)
+                self._make_image(data, grouping=2)
                 for i, data in enumerate(output_image_data)
             ]
             reference_images = [
-                wandb.Image(data) for i, data in enumerate(reference_image_data)
+                self._make_image(data) for i, data in enumerate(reference_image_data)
             ]
             return list(chain.from_iterable(zip(output_images, reference_images)))
 
@@ -3,6 +3,12 @@ wandb integration tensorboard module.
 """
 
 from .monkeypatch import patch
-from .log import log, tf_summary_to_dict, reset_state
+from .log import (  # noqa: F401
+    log,
+    log_events,
+    reset_state,
+    tf_summaries_to_dicts,
+    tf_summary_to_dict,
+)
 
 __all__ = ["patch"]
@@ -1,4 +1,6 @@
+from multiprocessing.pool import ThreadPool
 import re
+import threading
 import time
 
 import six
@@ -13,6 +15,7 @@ STEPS = {"": {"step": 0}, "global": {"step": 0, "last_log": None}}
 RATE_LIMIT_SECONDS = None
 IGNORE_KINDS = []
 tensor_util = wandb.util.get_module("tensorboard.util.tensor_util")
+np = wandb.util.get_module("numpy")
 
 
 pb = wandb.util.get_module(
@@ -61,127 +64,263 @@ def history_image_key(key, namespace=""):
     return namespaced_tag(re.sub(r"[/\\]", "_", key), namespace)
 
 
-def tf_summary_to_dict(tf_summary_str_or_pb, namespace=""):  # noqa: C901
+def tf_summary_to_dict(tf_summary_str_or_pb, namespace=""):
     """Convert a Tensorboard Summary to a dictionary
 
     Accepts either a tensorflow.summary.Summary
     or one encoded as a string.
     """
-    values = {}
-    if hasattr(tf_summary_str_or_pb, "summary"):
-        summary_pb = tf_summary_str_or_pb.summary
-        values[namespaced_tag("global_step", namespace)] = tf_summary_str_or_pb.step
-        values["_timestamp"] = tf_summary_str_or_pb.wall_time
-    elif isinstance(tf_summary_str_or_pb, (str, bytes, bytearray)):
-        summary_pb = Summary()
-        summary_pb.ParseFromString(tf_summary_str_or_pb)
-    else:
-        summary_pb = tf_summary_str_or_pb
+    converter = _SummaryConverter()
+    values = converter.add(tf_summary_str_or_pb, namespace)
+    converter.finish()
+    return values
 
-    if not hasattr(summary_pb, "value") or len(summary_pb.value) == 0:
-        # Ignore these, caller is responsible for handling None
-        return None
 
-    def encode_images(img_strs, value):
-        from PIL import Image
+def tf_summaries_to_dicts(summaries):
+    """Convert many Tensorboard Summaries to dictionaries at once
+
+    Accepts a sequence of (summary, namespace) tuples and returns the list of
+    dictionaries (or None) tf_summary_to_dict would return for each.  Scalar
+    tensors are decoded together per dtype and images are decoded by a pool
+    of threads.
+    """
+    converter = _SummaryConverter()
+    dicts = [converter.add(summary, namespace) for summary, namespace in summaries]
+    converter.finish()
+    return dicts
+
+
+# TensorProto dtypes (tensorboard.compat.proto.types_pb2) decoded in bulk when
+# the tensor is a scalar, with the field holding unpacked values
+_SCALAR_DTYPES = {
+    1: ("float32", "float_val"),  # DT_FLOAT
+    2: ("float64", "double_val"),  # DT_DOUBLE
+    3: ("int32", "int_val"),  # DT_INT32
+    9: ("int64", "int64_val"),  # DT_INT64
+}
+
+IMAGE_DECODE_THREADS = 4
+_image_pool = None
+_image_pool_lock = threading.Lock()
+
 
+def _get_image_pool():
+    global _image_pool
+    with _image_pool_lock:
+        if _image_pool is None:
+            _image_pool = ThreadPool(IMAGE_DECODE_THREADS)
+        return _image_pool
+
+
+def _decode_image(img_str):
+    from PIL import Image
+
+    # Supports gifs from TboardX
+    if img_str.startswith(b"GIF"):
+        return wandb.Video(six.BytesIO(img_str), format="gif")
+    image = Image.open(six.BytesIO(img_str))
+    # Image.open is lazy, decode here rather than when the row is saved
+    image.load()
+    return wandb.Image(image)
+
+
+def _try_decode_image(img_str):
+    """Returns the decoded image and None, or None and why it failed"""
+    try:
+        return _decode_image(img_str), None
+    except Exception as e:
+        return None, e
+
+
+class _SummaryConverter(object):
+    """Converts summaries to dictionaries, deferring the decoding of scalar
+    tensors and images to finish() so that it can be done in bulk.  Until then
+    the returned dictionaries hold placeholders for those values.
+    """
+
+    def __init__(self):
+        # numpy dtype -> [(values, key, raw bytes or unpacked value)]
+        self._scalars = {}
+        # (values, key, list, index, encoded image)
+        self._images = []
+
+    def add(self, tf_summary_str_or_pb, namespace=""):  # noqa: C901
+        values = {}
+        if hasattr(tf_summary_str_or_pb, "summary"):
+            summary_pb = tf_summary_str_or_pb.summary
+            values[namespaced_tag("global_step", namespace)] = tf_summary_str_or_pb.step
+            values["_timestamp"] = tf_summary_str_or_pb.wall_time
+        elif isinstance(tf_summary_str_or_pb, (str, bytes, bytearray)):
+            summary_pb = Summary()
+            summary_pb.ParseFromString(tf_summary_str_or_pb)
+        else:
+            summary_pb = tf_summary_str_or_pb
+
+        if not hasattr(summary_pb, "value") or len(summary_pb.value) == 0:
+            # Ignore these, caller is responsible for handling None
+            return None
+
+        for value in summary_pb.value:
+            kind = value.WhichOneof("value")
+            if kind in IGNORE_KINDS:
+                continue
+            if kind == "simple_value":
+                values[namespaced_tag(value.tag, namespace)] = value.simple_value
+            elif kind == "tensor":
+                plugin_name = value.metadata.plugin_data.plugin_name
+                if plugin_name == "scalars" or plugin_name == "":
+                    self._add_scalar(
+                        values, namespaced_tag(value.tag, namespace), value.tensor
+                    )
+                elif plugin_name == "images":
+                    img_strs = value.tensor.string_val[2:]  # First two items are dims.
+                    self._add_images(values, img_strs, value, namespace)
+            elif kind == "image":
+                img_str = value.image.encoded_image_string
+                self._add_images(values, [img_str], value, namespace)
+
+            # Coming soon...
+            # elif kind == "audio":
+            #     audio = wandb.Audio(
+            #         six.BytesIO(value.audio.encoded_audio_string),
+            #         sample_rate=value.audio.sample_rate,
+            #         content_type=value.audio.content_type,
+            #     )
+            elif kind == "histo":
+                self._add_histogram(values, value, namespace)
+            # TODO(jhr): figure out how to share this between userspace and internal process or dont
+            # elif value.tag == "_hparams_/session_start_info":
+            #     if wandb.util.get_module("tensorboard.plugins.hparams"):
+            #         from tensorboard.plugins.hparams import plugin_data_pb2
+            #
+            #         plugin_data = plugin_data_pb2.HParamsPluginData()        #
+            #         plugin_data.ParseFromString(value.metadata.plugin_data.content)
+            #         for key, param in six.iteritems(plugin_data.session_start_info.hparams):
+            #             if not wandb.run.config.get(key):
+            #                 wandb.run.config[key] = (
+            #                     param.number_value or param.string_value or param.bool_value
+            #                 )
+            #     else:
+            #         wandb.termerror(
+            #             "Received hparams tf.summary, but could not import "
+            #             "the hparams plugin from tensorboard"
+            #         )
+        return values
+
+    def _add_scalar(self, values, key, tensor):
+        scalar = _SCALAR_DTYPES.get(tensor.dtype)
+        if np is not None and scalar is not None and len(tensor.tensor_shape.dim) == 0:
+            dtype, field = scalar
+            if len(tensor.tensor_content) == np.dtype(dtype).itemsize:
+                raw = tensor.tensor_content
+            elif len(getattr(tensor, field)) == 1:
+                raw = getattr(tensor, field)[0]
+            else:
+                raw = None
+            if raw is not None:
+                # Placeholder keeps the order of the keys
+                values[key] = None
+                self._scalars.setdefault(dtype, []).append((values, key, raw))
+                return
+        values[key] = make_ndarray(tensor)
+
+    def _add_images(self, values, img_strs, value, namespace):
         if len(img_strs) == 0:
             return
 
-        images = []
-        for img_str in img_strs:
-            # Supports gifs from TboardX
-            if img_str.startswith(b"GIF"):
-                images.append(wandb.Video(six.BytesIO(img_str), format="gif"))
-            else:
-                images.append(wandb.Image(Image.open(six.BytesIO(img_str))))
         tag_idx = value.tag.rsplit("/", 1)
         if len(tag_idx) > 1 and tag_idx[1].isdigit():
             tag, idx = tag_idx
-            values.setdefault(history_image_key(tag, namespace), []).extend(images)
+            key = history_image_key(tag, namespace)
+            images = values.setdefault(key, [])
         else:
-            values[history_image_key(value.tag, namespace)] = images
+            key = history_image_key(value.tag, namespace)
+            images = values[key] = []
+        for img_str in img_strs:
+            self._images.append((values, key, images, len(images), img_str))
+            images.append(None)
 
-    for value in summary_pb.value:
-        kind = value.WhichOneof("value")
-        if kind in IGNORE_KINDS:
-            continue
-        if kind == "simple_value":
-            values[namespaced_tag(value.tag, namespace)] = value.simple_value
-        elif kind == "tensor":
-            plugin_name = value.metadata.plugin_data.plugin_name
-            if plugin_name == "scalars" or plugin_name == "":
-                values[namespaced_tag(value.tag, namespace)] = make_ndarray(
-                    value.tensor
-                )
-            elif plugin_name == "images":
-                img_strs = value.tensor.string_val[2:]  # First two items are dims.
-                encode_images(img_strs, value)
-        elif kind == "image":
-            img_str = value.image.encoded_image_string
-            encode_images([img_str], value)
-
-        # Coming soon...
-        # elif kind == "audio":
-        #     audio = wandb.Audio(
-        #         six.BytesIO(value.audio.encoded_audio_string),
-        #         sample_rate=value.audio.sample_rate,
-        #         content_type=value.audio.content_type,
-        #     )
-        elif kind == "histo":
-            tag = namespaced_tag(value.tag, namespace)
-            if len(value.histo.bucket_limit) >= 3:
-                first = (
-                    value.histo.bucket_limit[0]
-                    + value.histo.bucket_limit[0]  # noqa: W503
-                    - value.histo.bucket_limit[1]  # noqa: W503
-                )
-                last = (
-                    value.histo.bucket_limit[-2]
-                    + value.histo.bucket_limit[-2]  # noqa: W503
-                    - value.histo.bucket_limit[-3]  # noqa: W503
-                )
-                np_histogram = (
-                    list(value.histo.bucket),
-                    [first] + value.histo.bucket_limit[:-1] + [last],
+    def _add_histogram(self, values, value, namespace):
+        tag = namespaced_tag(value.tag, namespace)
+        if len(value.histo.bucket_limit) >= 3:
+            first = (
+                value.histo.bucket_limit[0]
+                + value.histo.bucket_limit[0]  # noqa: W503
+                - value.histo.bucket_limit[1]  # noqa: W503
+            )
+            last = (
+                value.histo.bucket_limit[-2]
+                + value.histo.bucket_limit[-2]  # noqa: W503
+                - value.histo.bucket_limit[-3]  # noqa: W503
+            )
+            np_histogram = (
+                list(value.histo.bucket),
+                [first] + value.histo.bucket_limit[:-1] + [last],
+            )
+            try:
+                # TODO: we should just re-bin if there are too many buckets
+                values[tag] = wandb.Histogram(np_histogram=np_histogram)
+            except ValueError:
+                wandb.termwarn(
+                    'Not logging key "{}". '
+                    "Histograms must have fewer than {} bins".format(
+                        tag, wandb.Histogram.MAX_LENGTH
+                    ),
+                    repeat=False,
                 )
-                try:
-                    # TODO: we should just re-bin if there are too many buckets
-                    values[tag] = wandb.Histogram(np_histogram=np_histogram)
-                except ValueError:
-                    wandb.termwarn(
-                        'Not logging key "{}". '
-                        "Histograms must have fewer than {} bins".format(
-                            tag, wandb.Histogram.MAX_LENGTH
-                        ),
-                        repeat=False,
-                    )
+        else:
+            # TODO: is there a case where we can render this?
+            wandb.termwarn(
+                'Not logging key "{}".  Found a histogram with only 2 bins.'.format(
+                    tag
+                ),
+                repeat=False,
+            )
+
+    def finish(self):
+        """Decodes the deferred values into the dictionaries returned by add()"""
+        for dtype, scalars in six.iteritems(self._scalars):
+            if all(isinstance(raw, bytes) for _, _, raw in scalars):
+                decoded = np.frombuffer(
+                    b"".join(raw for _, _, raw in scalars), dtype=dtype
+                ).copy()
             else:
-                # TODO: is there a case where we can render this?
+                decoded = np.array(
+                    [
+                        np.frombuffer(raw, dtype=dtype)[0]
+                        if isinstance(raw, bytes)
+                        else raw
+                        for _, _, raw in scalars
+                    ],
+                    dtype=dtype,
+                )
+            # 0-d arrays, like make_ndarray returns for scalars
+            for (values, key, _), scalar in zip(scalars, decoded.reshape(-1, 1)):
+                values[key] = scalar.reshape(())
+        self._scalars = {}
+
+        img_strs = [img_str for _, _, _, _, img_str in self._images]
+        if len(img_strs) > 1:
+            decoded = _get_image_pool().map(_try_decode_image, img_strs)
+        else:
+            decoded = [_try_decode_image(img_str) for img_str in img_strs]
+        # Images that fail to decode are left out, not the rest of the batch
+        failed = {}
+        for (values, key, images, idx, _), (image, error) in zip(
+            self._images, decoded
+        ):
+            images[idx] = image
+            if error is not None:
                 wandb.termwarn(
-                    'Not logging key "{}".  Found a histogram with only 2 bins.'.format(
-                        tag
-                    ),
+                    'Not logging an image of key "{}": {}'.format(key, error),
                     repeat=False,
                 )
-        # TODO(jhr): figure out how to share this between userspace and internal process or dont
-        # elif value.tag == "_hparams_/session_start_info":
-        #     if wandb.util.get_module("tensorboard.plugins.hparams"):
-        #         from tensorboard.plugins.hparams import plugin_data_pb2
-        #
-        #         plugin_data = plugin_data_pb2.HParamsPluginData()        #
-        #         plugin_data.ParseFromString(value.metadata.plugin_data.content)
-        #         for key, param in six.iteritems(plugin_data.session_start_info.hparams):
-        #             if not wandb.run.config.get(key):
-        #                 wandb.run.config[key] = (
-        #                     param.number_value or param.string_value or param.bool_value
-        #                 )
-        #     else:
-        #         wandb.termerror(
-        #             "Received hparams tf.summary, but could not import "
-        #             "the hparams plugin from tensorboard"
-        #         )
-    return values
+                failed[id(images)] = (values, key, images)
+        for values, key, images in six.itervalues(failed):
+            images[:] = [image for image in images if image is not None]
+            if not images and values.get(key) is images:
+                del values[key]
+        self._images = []
 
 
 def reset_state():
@@ -199,9 +338,42 @@ def log(tf_summary_str_or_pb, history=None, step=0, namespace="", **kwargs):
 
     NOTE: This assumes that events being passed in are in chronological order
     """
-    global STEPS
-    global RATE_LIMIT
     history = history or wandb.run.history
+    log_dict = tf_summary_to_dict(tf_summary_str_or_pb, namespace)
+    if log_dict is None:
+        # not an event, just return
+        return
+    _log_dict(log_dict, history, step, namespace, **kwargs)
+
+
+def log_events(events, history=None, **kwargs):
+    """Logs many tfsummaries to wandb
+
+    Accepts a sequence of (tf_summary_str_or_pb, step, namespace) tuples in
+    chronological order and logs them like consecutive calls to `log`.  The
+    summaries are converted together, and consecutive summaries of the same
+    step and namespace are merged before they are added to history.
+    """
+    history = history or wandb.run.history
+    events = list(events)
+    log_dicts = tf_summaries_to_dicts(
+        [(summary, namespace) for summary, _, namespace in events]
+    )
+    pending = None
+    for (_, step, namespace), log_dict in zip(events, log_dicts):
+        if log_dict is None:
+            continue
+        if pending and pending[1:] == (step, namespace):
+            pending[0].update(log_dict)
+            continue
+        if pending:
+            _log_dict(pending[0], history, pending[1], pending[2], **kwargs)
+        pending = (log_dict, step, namespace)
+    if pending:
+        _log_dict(pending[0], history, pending[1], pending[2], **kwargs)
+
+
+def _log_dict(log_dict, history, step, namespace, **kwargs):
     # To handle multiple global_steps, we keep track of them here instead
     # of the global log
     last_step = STEPS.get(namespace, {"step": 0})
@@ -211,11 +383,6 @@ def log(tf_summary_str_or_pb, history=None, step=0, namespace="", **kwargs):
     if last_step["step"] < step:
         commit = True
 
-    log_dict = tf_summary_to_dict(tf_summary_str_or_pb, namespace)
-    if log_dict is None:
-        # not an event, just return
-        return
-
     # Pass timestamp to history for loading historic data
     timestamp = log_dict.get("_timestamp", time.time())
     # Store our initial timestamp
@@ -1,6 +1,9 @@
 import base64
+import bisect
 import codecs
 import hashlib
+import json
+import re
 
 
 def md5_string(string):
@@ -30,6 +33,125 @@ def bytes_to_hex(bytestr):
     return codecs.getencoder("hex")(bytestr)[0]
 
 
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JSONChunkReader(object):
+    """Reads consecutive JSON tokens and values from an iterable of chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+
+    def _fill(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character, or None at the end."""
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError("Invalid manifest JSON, expected '%s'" % char)
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end < len(self._buf) or not self._fill():
+                self._pos = end
+                return value
+
+
+def iter_manifest_json(chunks):
+    """Incrementally parses a manifest JSON document from text or byte chunks.
+
+    Yields a `(key, value)` pair for each top-level field, except for
+    "contents" which yields `("contents", (path, entry_json))` once per entry,
+    so the whole document never needs to be held in memory.
+    """
+    reader = _JSONChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "contents":
+            reader.expect("{")
+            while reader.peek() != "}":
+                path = reader.value()
+                reader.expect(":")
+                yield key, (path, reader.value())
+                if reader.peek() != ",":
+                    break
+                reader.expect(",")
+            reader.expect("}")
+        else:
+            yield key, reader.value()
+        if reader.peek() != ",":
+            break
+        reader.expect(",")
+    reader.expect("}")
+
+
+class _ManifestEntries(dict):
+    """The entries of a manifest by path, counting changes to its keys."""
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        super(_ManifestEntries, self).__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super(_ManifestEntries, self).__delitem__(key)
+        self.version += 1
+
+    def clear(self):
+        super(_ManifestEntries, self).clear()
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super(_ManifestEntries, self).pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super(_ManifestEntries, self).popitem()
+
+    def setdefault(self, *args):
+        self.version += 1
+        return super(_ManifestEntries, self).setdefault(*args)
+
+    def update(self, *args, **kwargs):
+        super(_ManifestEntries, self).update(*args, **kwargs)
+        self.version += 1
+
+
 class ArtifactManifest(object):
     @classmethod
     # TODO: we don't need artifact here.
@@ -41,6 +163,34 @@ class ArtifactManifest(object):
             if sub.version() == version:
                 return sub.from_manifest_json(artifact, manifest_json)
 
+    @classmethod
+    def from_manifest_stream(cls, artifact, chunks):
+        """Like from_manifest_json, but parses the manifest from an iterable of
+        text or byte chunks, building entries as they are read."""
+        manifest_cls = None
+        header = {}
+        entries = {}
+        for key, value in iter_manifest_json(chunks):
+            if key == "contents":
+                path, entry_json = value
+                if manifest_cls is not None:
+                    entry_json = manifest_cls.entry_from_json(path, entry_json)
+                entries[path] = entry_json
+                continue
+            header[key] = value
+            if key == "version":
+                for sub in cls.__subclasses__():
+                    if sub.version() == value:
+                        manifest_cls = sub
+                if manifest_cls is None:
+                    raise ValueError("Unknown manifest version: %s" % value)
+                # Convert entries that came before the version field
+                for path, entry_json in entries.items():
+                    entries[path] = manifest_cls.entry_from_json(path, entry_json)
+        if manifest_cls is None:
+            raise ValueError("Invalid manifest format. Must contain version field.")
+        return manifest_cls.from_manifest_header(artifact, header, entries)
+
     @classmethod
     def version(cls):
         pass
@@ -56,11 +206,36 @@ class ArtifactManifest(object):
     def digest(self):
         raise NotImplementedError()
 
+    @property
+    def entries(self):
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        self._entries = _ManifestEntries(entries)
+        self._sorted_paths = None
+        self._sorted_version = None
+
     def add_entry(self, entry):
         if entry.path in self.entries:
             raise ValueError("Cannot add the same path twice: %s" % entry.path)
         self.entries[entry.path] = entry
 
+    def sorted_paths(self):
+        """Returns the entry paths in sorted order, cached until entries change."""
+        if self._sorted_version != self._entries.version:
+            self._sorted_paths = sorted(self._entries)
+            self._sorted_version = self._entries.version
+        return self._sorted_paths
+
+    def entries_with_prefix(self, prefix):
+        """Yields the entries whose path starts with `prefix`, in path order."""
+        paths = self.sorted_paths()
+        for i in range(bisect.bisect_left(paths, prefix), len(paths)):
+            if not paths[i].startswith(prefix):
+                break
+            yield self.entries[paths[i]]
+
 
 class StorageLayout(object):
     V1 = "V1"
@@ -86,7 +261,7 @@ class StoragePolicy(object):
     def config(self):
         pass
 
-    def load_file(self, artifact, name, manifest_entry):
+    def load_file(self, artifact, name, manifest_entry, progress_callback=None):
         raise NotImplementedError
 
     def store_file(self, artifact_id, entry, preparer, progress_callback=None):
@@ -202,7 +202,8 @@ class BackendSender(object):
             cfg.key = k
             cfg.value_json = json.dumps(v)
 
-        for entry in sorted(artifact_manifest.entries.values(), key=lambda k: k.path):
+        for path in artifact_manifest.sorted_paths():
+            entry = artifact_manifest.entries[path]
             proto_entry = proto_manifest.contents.add()
             proto_entry.path = entry.path
             proto_entry.digest = entry.digest
@@ -36,7 +36,7 @@ class HandleManager(object):
         # keep track of config and summary from key/val updates
         # self._consolidated_config = dict()
         self._consolidated_summary = dict()
-        self._sampled_history = dict()
+        self._sampled_history = sample.SampledHistory()
 
     def handle(self, record):
         record_type = record.WhichOneof("record_type")
@@ -116,19 +116,16 @@ class HandleManager(object):
         elif not self._settings._offline:
             self._sender_q.put(record)
 
-    def _save_history(self, record):
-        for item in record.history.item:
+    def _save_history(self, history_dict):
+        for k, v in six.iteritems(history_dict):
             # TODO(jhr) save nested keys?
-            k = item.key
-            v = json.loads(item.value_json)
             if isinstance(v, numbers.Real):
-                self._sampled_history.setdefault(k, sample.UniformSampleAccumulator())
-                self._sampled_history[k].add(v)
+                self._sampled_history.add(k, v)
 
     def handle_history(self, record):
         self._dispatch_record(record)
-        self._save_history(record)
         history_dict = proto_util.dict_from_proto_list(record.history.item)
+        self._save_history(history_dict)
         self._consolidated_summary.update(history_dict)
         self._save_summary(self._consolidated_summary)
 
@@ -196,8 +193,15 @@ class HandleManager(object):
         assert run_start.run
 
         if not self._settings._disable_stats:
-            pid = os.getpid()
-            self._system_stats = stats.SystemStats(pid=pid, interface=self._interface,)
+            # Monitor the user process that started us, and its other children,
+            # unless we run standalone (see ProcessCheck)
+            if self._settings._internal_check_process:
+                pid = os.getppid()
+            else:
+                pid = os.getpid()
+            self._system_stats = stats.SystemStats(
+                pid=pid, interface=self._interface, settings=self._settings,
+            )
             self._system_stats.start()
 
         if not self._settings._disable_meta:
@@ -246,10 +250,9 @@ class HandleManager(object):
 
     def handle_request_sampled_history(self, data):
         result = wandb_internal_pb2.Result(uuid=data.uuid)
-        for key, sampled in six.iteritems(self._sampled_history):
+        for key, values in self._sampled_history.items():
             item = wandb_internal_pb2.SampledHistoryItem()
             item.key = key
-            values = sampled.get()
             if all(isinstance(i, numbers.Integral) for i in values):
                 item.values_int.extend(values)
             elif all(isinstance(i, numbers.Real) for i in values):
@@ -2,71 +2,199 @@
 sample.
 """
 
+from array import array
+from collections import OrderedDict
 import math
 
+import six
 
-class UniformSampleAccumulator(object):
-    def __init__(self, min_samples=None):
+# Most keys sampled at once, about 3.5KB each with the default min_samples
+MAX_SAMPLED_KEYS = 10000
+
+try:
+    _INT_TYPECODE = array("q").typecode
+except ValueError:
+    # python 2 has no "q", "l" is 64 bits on most of its platforms
+    _INT_TYPECODE = "l"
+
+
+class SampledHistory(object):
+    """Uniform samples of the values logged for many keys.
+
+    Every key keeps log2(2 * min_samples) buckets of up to min_samples values
+    each.  As values are added, the sampling rate is halved whenever the
+    buckets fill up, so the samples stay spread evenly over all values seen.
+    The buckets and per-key state of all keys live in shared arrays.  Keys
+    that only logged integers keep their samples as 64 bit integers, so they
+    come back exact, and move to doubles when a float is logged.  Once
+    `max_keys` keys are tracked, the least recently logged key is dropped to
+    make room for a new one.
+    """
+
+    def __init__(self, max_keys=MAX_SAMPLED_KEYS, min_samples=None):
+        self._max_keys = max_keys
         self._samples = min_samples or 64
         # force power of 2 samples
         self._samples = 2 ** int(math.ceil(math.log(self._samples, 2)))
         # target oversample by factor of 2
-        self._samples2 = self._samples * 2
+        samples2 = self._samples * 2
         # max size of each buffer
-        self._max = self._samples2 // 2
-        self._shift = 0
-        self._mask = (1 << self._shift) - 1
-        self._buckets = int(math.log(self._samples2, 2))
-        self._buckets_bits = int(math.log(self._buckets, 2))
-        self._buckets_mask = (1 << self._buckets_bits + 1) - 1
-        self._buckets_index = 0
-        self._bucket = []
-        self._index = [0] * self._buckets
-        self._count = 0
-        self._log2 = [0]
-
-        # pre-allocate buckets
-        for _ in range(self._buckets):
-            self._bucket.append([0] * self._max)
+        self._max = samples2 // 2
+        self._buckets = int(math.log(samples2, 2))
         # compute integer log2
-        self._log2 += [int(math.log(i, 2)) for i in range(1, 2 ** self._buckets + 1)]
+        self._log2 = [0] + [int(math.log(i, 2)) for i in range(1, 2 ** self._buckets + 1)]
+        # slots of a key's buckets
+        self._block_size = self._buckets * self._max
 
-    def _show(self):
-        print("=" * 20)
-        for b in range(self._buckets):
-            b = (b + self._buckets_index) % self._buckets
-            vals = [self._bucket[b][i] for i in range(self._index[b])]
-            print("{}: {}".format(b, vals))
+        self._rows = OrderedDict()
+        # OrderedDict.move_to_end is only available on python 3
+        self._touch = getattr(self._rows, "move_to_end", self._reinsert)
+        # per key
+        self._count = array("L")
+        self._shift = array("B")
+        self._buckets_index = array("B")
+        self._integral = array("B")
+        # block of the key's slots in _int_values or _values
+        self._block = array("L")
+        # per key and bucket
+        self._index = array("H")
+        # per key, bucket and slot, integer keys and the others
+        self._int_values = array(_INT_TYPECODE)
+        self._values = array("d")
+        # unused blocks of _values and _int_values, indexed by integral
+        self._free_blocks = ([], [])
 
-    def add(self, val):
-        self._count += 1
-        cnt = self._count
-        if cnt & self._mask:
+    def __len__(self):
+        return len(self._rows)
+
+    def keys(self):
+        return list(self._rows)
+
+    def _reinsert(self, key):
+        self._rows[key] = self._rows.pop(key)
+
+    def _new_block(self, integral):
+        free = self._free_blocks[integral]
+        if free:
+            return free.pop()
+        values = self._int_values if integral else self._values
+        block = len(values) // self._block_size
+        values.extend([0] * self._block_size)
+        return block
+
+    def _to_floats(self, row):
+        size = self._block_size
+        block = self._block[row]
+        new_block = self._new_block(0)
+        start = block * size
+        new_start = new_block * size
+        self._values[new_start:new_start + size] = array(
+            "d", self._int_values[start:start + size]
+        )
+        self._free_blocks[1].append(block)
+        self._block[row] = new_block
+        self._integral[row] = 0
+
+    def _new_row(self):
+        if len(self._rows) < self._max_keys:
+            row = len(self._rows)
+            self._count.append(0)
+            self._shift.append(0)
+            self._buckets_index.append(0)
+            self._integral.append(1)
+            self._block.append(self._new_block(1))
+            self._index.extend([0] * self._buckets)
+            return row
+        _, row = self._rows.popitem(last=False)
+        self._count[row] = 0
+        self._shift[row] = 0
+        self._buckets_index[row] = 0
+        if not self._integral[row]:
+            self._free_blocks[0].append(self._block[row])
+            self._block[row] = self._new_block(1)
+            self._integral[row] = 1
+        for i in range(row * self._buckets, (row + 1) * self._buckets):
+            self._index[i] = 0
+        return row
+
+    def add(self, key, val):
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = self._new_row()
+        else:
+            self._touch(key)
+        if self._integral[row] and not isinstance(val, six.integer_types):
+            self._to_floats(row)
+
+        cnt = self._count[row] + 1
+        self._count[row] = cnt
+        shift = self._shift[row]
+        if cnt & ((1 << shift) - 1):
             return
-        b = cnt >> self._shift
-        b = self._log2[b]  # b = int(math.log(b, 2))
-        if b >= self._buckets:
-            self._index[self._buckets_index] = 0
-            self._buckets_index = (self._buckets_index + 1) % self._buckets
-            self._shift += 1
-            self._mask = (self._mask << 1) | 1
-            b += self._buckets - 1
-        b = (b + self._buckets_index) % self._buckets
-        self._bucket[b][self._index[b]] = val
-        self._index[b] += 1
+        b = self._log2[cnt >> shift]
+        buckets = self._buckets
+        buckets_index = self._buckets_index[row]
+        if b >= buckets:
+            self._index[row * buckets + buckets_index] = 0
+            buckets_index = (buckets_index + 1) % buckets
+            self._buckets_index[row] = buckets_index
+            self._shift[row] = shift + 1
+            b += buckets - 1
+        k = (b + buckets_index) % buckets
+        i = row * buckets + k
+        offset = k * self._max + self._index[i]
+        if self._integral[row]:
+            try:
+                self._int_values[self._block[row] * self._block_size + offset] = val
+            except OverflowError:
+                # Beyond 64 bits, keep the key's samples as doubles
+                self._to_floats(row)
+        if not self._integral[row]:
+            try:
+                self._values[self._block[row] * self._block_size + offset] = val
+            except OverflowError:
+                # Not representable, leave it out of the samples
+                return
+        self._index[i] += 1
 
-    def get(self):
+    def get(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            return ()
         full = []
         sampled = []
-        # self._show()
+        buckets_index = self._buckets_index[row]
+        values = self._int_values if self._integral[row] else self._values
+        block_start = self._block[row] * self._block_size
         for b in range(self._buckets):
             max_num = 2 ** b
-            b = (b + self._buckets_index) % self._buckets
-            modb = self._index[b] // max_num
-            for i in range(self._index[b]):
-                if not modb or i % modb == 0:
-                    sampled.append(self._bucket[b][i])
-                full.append(self._bucket[b][i])
+            k = (b + buckets_index) % self._buckets
+            i = row * self._buckets + k
+            count = self._index[i]
+            modb = count // max_num
+            start = block_start + k * self._max
+            for j in range(count):
+                val = values[start + j]
+                if not modb or j % modb == 0:
+                    sampled.append(val)
+                full.append(val)
         if len(sampled) < self._samples:
             return tuple(full)
         return tuple(sampled)
+
+    def items(self):
+        for key in self._rows:
+            yield key, self.get(key)
+
+
+class UniformSampleAccumulator(object):
+    """Uniform samples of the values of a single key, see SampledHistory"""
+
+    def __init__(self, min_samples=None):
+        self._history = SampledHistory(max_keys=1, min_samples=min_samples)
+
+    def add(self, val):
+        self._history.add(None, val)
+
+    def get(self):
+        return self._history.get(None)
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 from numbers import Number
+import os
 import threading
 import time
 
@@ -10,11 +11,134 @@ from wandb.vendor.pynvml import pynvml  # type: ignore[import]
 
 psutil = util.get_module("psutil")
 
+# Used when the settings don't specify the sampling schedule
+SAMPLE_RATE_SECONDS = 1
+SAMPLES_TO_AVERAGE = 4
 
-def gpu_in_use_by_this_process(gpu_handle):
-    if not psutil:
-        return False
+# Bounds on the cost of the process tree stats, see ProcessTree
+TREE_REFRESH_SECONDS = 10
+MAX_TRACKED_CHILDREN = 256
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def read_proc_stat(pid):
+    """Returns (rss bytes, number of threads) of a process from /proc/<pid>/stat,
+    or None where procfs isn't available.
+    """
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/%i/stat" % pid, "rb") as f:
+            data = f.read()
+    except (IOError, OSError):
+        return None
+    # The command name may contain spaces and parentheses, so split after the
+    # last ")". fields[0] is then the state, field 3 in proc(5).
+    start = data.rfind(b")") + 2
+    fields = data[start:].split()
+    return int(fields[21]) * _PAGE_SIZE, int(fields[17])
+
+
+def process_usage(proc):
+    """Returns [rss bytes, cpu percent, read bytes, write bytes, open fds] of a
+    psutil.Process, or None if it is gone. Counters the platform or our
+    permissions don't give are 0.
+    """
+    try:
+        with proc.oneshot():
+            proc_stat = read_proc_stat(proc.pid)
+            rss = proc_stat[0] if proc_stat is not None else proc.memory_info().rss
+            usage = [rss, proc.cpu_percent(), 0, 0, 0]
+            try:
+                io = proc.io_counters()
+                usage[2] = io.read_bytes
+                usage[3] = io.write_bytes
+            except (AttributeError, psutil.AccessDenied):
+                pass
+            try:
+                usage[4] = proc.num_fds()
+            except (AttributeError, psutil.AccessDenied):
+                pass
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    return usage
+
+
+class ProcessTree(object):
+    """Tracks the descendants of a process, like DataLoader workers or the
+    ranks started by torch.distributed.launch.
+
+    The psutil.Process objects are kept between samples, so cpu_percent
+    measures the time since the previous sample. Finding new children walks
+    every process of the system, so it only happens every `refresh_seconds`,
+    while exited children are dropped as soon as they are sampled. At most
+    `max_children` are tracked, the rest are counted in `untracked`. The
+    `exclude` process and its descendants, like the wandb internal process,
+    are left out.
+    """
+
+    def __init__(
+        self,
+        proc,
+        refresh_seconds=TREE_REFRESH_SECONDS,
+        max_children=MAX_TRACKED_CHILDREN,
+        exclude=None,
+    ):
+        self._proc = proc
+        self._exclude = exclude
+        self._refresh_seconds = refresh_seconds
+        self._max_children = max_children
+        self._children = {}
+        self._last_refresh = None
+        self.untracked = 0
+
+    def _refresh(self):
+        try:
+            children = self._proc.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        if self._exclude is not None:
+            excluded = set([self._exclude.pid])
+            try:
+                excluded.update(c.pid for c in self._exclude.children(recursive=True))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            children = [child for child in children if child.pid not in excluded]
+        children.sort(key=lambda child: child.pid)
+        self.untracked = max(0, len(children) - self._max_children)
+        known = self._children
+        self._children = {}
+        for child in children[: self._max_children]:
+            # Keep the tracked object, it holds the cpu_percent baseline. psutil
+            # compares create times too, so a reused pid is a new process.
+            tracked = known.get(child.pid)
+            self._children[child.pid] = tracked if tracked == child else child
+
+    def children_usage(self, now):
+        """Returns the summed process_usage of the children and their count"""
+        if (
+            self._last_refresh is None
+            or now - self._last_refresh >= self._refresh_seconds
+        ):
+            self._refresh()
+            self._last_refresh = now
+        total = [0, 0.0, 0, 0, 0]
+        for pid, child in list(self._children.items()):
+            usage = process_usage(child)
+            if usage is None:
+                del self._children[pid]
+                continue
+            for i, value in enumerate(usage):
+                total[i] += value
+        return total, len(self._children)
 
+
+def our_pids():
+    """Returns the pids of the process tree that wandb is monitoring"""
     # NOTE: this optimizes for the case where wandb was initialized from
     # iniside the user script (i.e. `wandb.init()`). If we ran using
     # `wandb run` on the command line, the shell will be detected as the
@@ -26,7 +150,15 @@ def gpu_in_use_by_this_process(gpu_handle):
     our_processes = base_process.children(recursive=True)
     our_processes.append(base_process)
 
-    our_pids = set([process.pid for process in our_processes])
+    return set([process.pid for process in our_processes])
+
+
+def gpu_in_use_by_this_process(gpu_handle, pids=None):
+    if not psutil:
+        return False
+
+    if pids is None:
+        pids = our_pids()
 
     compute_pids = set(
         [
@@ -43,11 +175,19 @@ def gpu_in_use_by_this_process(gpu_handle):
 
     pids_using_device = compute_pids | graphics_pids
 
-    return len(pids_using_device & our_pids) > 0
+    return len(pids_using_device & pids) > 0
 
 
 class SystemStats(object):
-    def __init__(self, pid=None, api=None, interface=None):
+    """Samples system metrics in a background thread.
+
+    Every `sample_rate_seconds` the metrics are sampled, and every
+    `samples_to_average` samples they are published: numbers as the mean of
+    the samples. With the system_sample_spread setting, their min and max are
+    published too, as "<name>.min" and "<name>.max".
+    """
+
+    def __init__(self, pid=None, api=None, interface=None, settings=None):
         try:
             pynvml.nvmlInit()
             self.gpu_count = pynvml.nvmlDeviceGetCount()
@@ -57,9 +197,16 @@ class SystemStats(object):
         self._pid = pid
         self._api = api
         self._interface = interface
+        self._settings = settings
+        self._proc = None
+        self._process_tree = None
+        self._gpu_handles = None
+        # stat -> [count, sum, min, max]
         self.sampler = {}
         self.samples = 0
+        self._last_stats = {}
         self._shutdown = False
+        self._shutdown_event = threading.Event()
         if psutil:
             net = psutil.net_io_counters()
             self.network_init = {"sent": net.bytes_sent, "recv": net.bytes_recv}
@@ -72,6 +219,7 @@ class SystemStats(object):
     def start(self):
         if self._thread is None:
             self._shutdown = False
+            self._shutdown_event.clear()
             self._thread = threading.Thread(target=self._thread_body)
             self._thread.daemon = True
         if not self._thread.is_alive():
@@ -79,56 +227,86 @@ class SystemStats(object):
 
     @property
     def proc(self):
-        return psutil.Process(pid=self._pid)
+        if self._proc is None:
+            self._proc = psutil.Process(pid=self._pid)
+        return self._proc
+
+    @property
+    def process_tree(self):
+        if self._process_tree is None:
+            # When monitoring the user process, leave out ourselves
+            exclude = None
+            if self.proc.pid != os.getpid():
+                exclude = psutil.Process()
+            self._process_tree = ProcessTree(self.proc, exclude=exclude)
+        return self._process_tree
+
+    def _setting(self, name):
+        return getattr(self._settings, name, None) if self._settings else None
 
     @property
     def sample_rate_seconds(self):
-        """Sample system stats every this many seconds, defaults to 2, min is 0.5"""
-        return 1
-        # return max(0.5, self._api.dynamic_settings["system_sample_seconds"])
+        """Sample system stats every this many seconds, the system_sample_seconds
+        setting, defaults to 1, min is 0.5"""
+        seconds = self._setting("system_sample_seconds") or SAMPLE_RATE_SECONDS
+        return max(0.5, seconds)
 
     @property
     def samples_to_average(self):
-        """The number of samples to average before pushing, defaults to 15 valid range (2:30)"""
-        return 4
-        # return min(30, max(2, self._api.dynamic_settings["system_samples"]))
+        """The number of samples to aggregate before pushing, the system_samples
+        setting, defaults to 4 valid range (1:30)"""
+        samples = self._setting("system_samples") or SAMPLES_TO_AVERAGE
+        return min(30, max(1, samples))
 
     def _thread_body(self):
         while True:
-            stats = self.stats()
-            for stat, value in stats.items():
-                if isinstance(value, Number):
-                    self.sampler[stat] = self.sampler.get(stat, [])
-                    self.sampler[stat].append(value)
-            self.samples += 1
+            self.sample()
             if self._shutdown or self.samples >= self.samples_to_average:
                 self.flush()
                 if self._shutdown:
                     break
-            seconds = 0
-            while seconds < self.sample_rate_seconds:
-                time.sleep(0.1)
-                seconds += 0.1
-                if self._shutdown:
-                    self.flush()
-                    return
+            if self._shutdown_event.wait(self.sample_rate_seconds):
+                self.flush()
+                return
 
     def shutdown(self):
         self._shutdown = True
+        self._shutdown_event.set()
         try:
             if self._thread is not None:
                 self._thread.join()
         finally:
             self._thread = None
 
-    def flush(self):
+    def sample(self):
         stats = self.stats()
+        sampler = self.sampler
         for stat, value in stats.items():
-            # TODO: a bit hacky, we assume all numbers should be averaged.  If you want
-            # max for a stat, you must put it in a sub key, like ["network"]["sent"]
             if isinstance(value, Number):
-                samples = list(self.sampler.get(stat, [stats[stat]]))
-                stats[stat] = round(sum(samples) / len(samples), 2)
+                acc = sampler.get(stat)
+                if acc is None:
+                    sampler[stat] = [1, value, value, value]
+                else:
+                    acc[0] += 1
+                    acc[1] += value
+                    if value < acc[2]:
+                        acc[2] = value
+                    if value > acc[3]:
+                        acc[3] = value
+        self._last_stats = stats
+        self.samples += 1
+
+    def flush(self):
+        if not self.samples:
+            return
+        # Values that aren't numbers, like the network counters, are published as last sampled
+        stats = dict(self._last_stats)
+        spread = self._setting("system_sample_spread")
+        for stat, (count, total, low, high) in self.sampler.items():
+            stats[stat] = round(total / float(count), 2)
+            if spread:
+                stats[stat + ".min"] = round(low, 2)
+                stats[stat + ".max"] = round(high, 2)
         # self.run.events.track("system", stats, _wandb=True)
         self._interface.publish_stats(stats)
         self.samples = 0
@@ -136,15 +314,20 @@ class SystemStats(object):
 
     def stats(self):
         stats = {}
+        if self.gpu_count and self._gpu_handles is None:
+            self._gpu_handles = [
+                pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(self.gpu_count)
+            ]
+        pids = our_pids() if self.gpu_count and psutil else None
         for i in range(0, self.gpu_count):
-            handle = pynvml.nvmlDeviceGetHandleByIndex(i)
+            handle = self._gpu_handles[i]
             try:
                 util = pynvml.nvmlDeviceGetUtilizationRates(handle)
                 memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
                 temp = pynvml.nvmlDeviceGetTemperature(
                     handle, pynvml.NVML_TEMPERATURE_GPU
                 )
-                in_use_by_us = gpu_in_use_by_this_process(handle)
+                in_use_by_us = gpu_in_use_by_this_process(handle, pids)
 
                 stats["gpu.{}.{}".format(i, "gpu")] = util.gpu
                 stats["gpu.{}.{}".format(i, "memory")] = util.memory
@@ -195,10 +378,43 @@ class SystemStats(object):
             # TODO: maybe show other partitions, will likely need user to configure
             stats["disk"] = psutil.disk_usage("/").percent
             stats["proc.memory.availableMB"] = sysmem.available / 1048576.0
+            proc_stat = read_proc_stat(self._pid or os.getpid())
             try:
-                stats["proc.memory.rssMB"] = self.proc.memory_info().rss / 1048576.0
-                stats["proc.memory.percent"] = self.proc.memory_percent()
-                stats["proc.cpu.threads"] = self.proc.num_threads()
+                if proc_stat is not None:
+                    rss, threads = proc_stat
+                else:
+                    rss = self.proc.memory_info().rss
+                    threads = self.proc.num_threads()
+                stats["proc.memory.rssMB"] = rss / 1048576.0
+                stats["proc.memory.percent"] = rss * 100.0 / sysmem.total
+                stats["proc.cpu.threads"] = threads
             except psutil.NoSuchProcess:
                 pass
+            stats.update(self._process_tree_stats(sysmem))
+        return stats
+
+    def _process_tree_stats(self, sysmem):
+        """Usage of the monitored process ("proc"), its descendants
+        ("proc.children") and both together ("proc.tree")"""
+        main = process_usage(self.proc)
+        if main is None:
+            return {}
+        children, count = self.process_tree.children_usage(time.time())
+        tree = [a + b for a, b in zip(main, children)]
+        stats = {
+            "proc.children.count": count,
+            "proc.children.untracked": self.process_tree.untracked,
+        }
+        for role, usage in (("proc", main), ("proc.children", children), ("proc.tree", tree)):
+            rss, cpu, read_bytes, write_bytes, fds = usage
+            if role != "proc":
+                stats[role + ".memory.rssMB"] = rss / 1048576.0
+                stats[role + ".memory.percent"] = rss * 100.0 / sysmem.total
+            stats[role + ".cpu.percent"] = cpu
+            stats[role + ".fds"] = fds
+            # Cumulative counters, not aggregated like the network counters
+            stats[role + ".io"] = {
+                "readMB": read_bytes / 1048576.0,
+                "writeMB": write_bytes / 1048576.0,
+            }
         return stats
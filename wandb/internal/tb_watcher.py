@@ -17,6 +17,10 @@ from wandb.internal import run as internal_run
 # Give some time for tensorboard data to be flushed
 SHUTDOWN_DELAY = 5
 REMOTE_FILE_TOKEN = "://"
+# Threads reading tfevents files, shared by all watched logdirs
+READER_THREADS = 4
+# Most events converted before the resulting history rows are published
+MAX_BATCH_EVENTS = 1000
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +45,7 @@ class TBWatcher(object):
     def __init__(self, settings, run_proto, interface):
         self._logdirs = {}
         self._consumer = None
+        self._reader_pool = None
         self._settings = settings
         self._interface = interface
         self._run_proto = run_proto
@@ -81,8 +86,13 @@ class TBWatcher(object):
                 self, self._watcher_queue, self._run_proto, self._settings
             )
             self._consumer.start()
+        if not self._reader_pool:
+            self._reader_pool = TBReaderPool(READER_THREADS)
+            self._reader_pool.start()
 
-        tbdir_watcher = TBDirWatcher(self, logdir, save, namespace, self._watcher_queue)
+        tbdir_watcher = TBDirWatcher(
+            self, logdir, save, namespace, self._watcher_queue, self._reader_pool
+        )
         self._logdirs[logdir] = tbdir_watcher
         tbdir_watcher.start()
 
@@ -91,16 +101,30 @@ class TBWatcher(object):
             tbdirwatcher.shutdown()
         for tbdirwatcher in six.itervalues(self._logdirs):
             tbdirwatcher.finish()
+        if self._reader_pool:
+            self._reader_pool.finish()
         if self._consumer:
             self._consumer.finish()
 
 
 class TBDirWatcher(object):
-    def __init__(self, tbwatcher, logdir, save, namespace, queue):
+    """Watches a logdir for tfevents files.
+
+    Every second the logdir is listed and each file that grew since it was
+    last read is handed to the reader pool, so files are read in parallel and
+    idle files cost a stat. Paths that aren't new tfevents files are
+    remembered and not checked again.
+    """
+
+    def __init__(self, tbwatcher, logdir, save, namespace, queue, reader_pool):
         self.directory_watcher = util.get_module(
             "tensorboard.backend.event_processing.directory_watcher",
             required="Please install tensorboard package",
         )
+        self.io_wrapper = util.get_module(
+            "tensorboard.backend.event_processing.io_wrapper",
+            required="Please install tensorboard package",
+        )
         self.event_file_loader = util.get_module(
             "tensorboard.backend.event_processing.event_file_loader",
             required="Please install tensorboard package",
@@ -112,9 +136,12 @@ class TBDirWatcher(object):
         # but it doesn't give us mtime
         self.tf_io = util.get_module("tensorflow.io.gfile")
         self._tbwatcher = tbwatcher
-        self._generator = self.directory_watcher.DirectoryWatcher(
-            logdir, self._loader(save, namespace), self._is_new_tensorflow_events_file
-        )
+        self._loader_class = self._loader(save, namespace)
+        self._reader_pool = reader_pool
+        self._readers = {}
+        self._rejected = set()
+        # process_event runs on the reader pool threads
+        self._lock = threading.Lock()
         self._thread = threading.Thread(target=self._thread_body)
         self._first_event_timestamp = None
         self._shutdown = None
@@ -126,12 +153,18 @@ class TBDirWatcher(object):
     def start(self):
         self._thread.start()
 
-    def _is_new_tensorflow_events_file(self, path):
-        """Checks if a path has been modified since launch and contains tfevents"""
+    def _is_tensorflow_events_file(self, path):
+        """Checks if the name of a path is the name of a tfevents file"""
         if not path:
             raise ValueError("Path must be a nonempty string")
+        base = os.path.basename(self.tf_compat.tf.compat.as_str_any(path))
+        return "tfevents" in base and not base.endswith(".profile-empty")
+
+    def _is_new_tensorflow_events_file(self, path):
+        """Checks if a path has been modified since launch and contains tfevents"""
+        if not self._is_tensorflow_events_file(path):
+            return False
         path = self.tf_compat.tf.compat.as_str_any(path)
-        base = os.path.basename(path)
         start_time = self._tbwatcher._settings._start_time
         if REMOTE_FILE_TOKEN in path:
             if self.tf_io:
@@ -141,11 +174,7 @@ class TBDirWatcher(object):
                 return False
         else:
             modified_time = os.stat(path).st_mtime
-        return (
-            "tfevents" in base
-            and modified_time >= start_time  # noqa: W503
-            and not base.endswith(".profile-empty")  # noqa: W503
-        )
+        return modified_time >= start_time
 
     def _loader(self, save=True, namespace=None):
         """Incredibly hacky class generator to optionally save / prefix tfevent files"""
@@ -176,13 +205,48 @@ class TBDirWatcher(object):
 
         return EventFileLoader
 
+    def _file_size(self, path):
+        if REMOTE_FILE_TOKEN in path:
+            return self.tf_compat.tf.io.gfile.stat(path).length
+        return os.path.getsize(path)
+
+    def _list_logdir(self):
+        try:
+            return sorted(self.io_wrapper.ListDirectoryAbsolute(self._logdir))
+        except self.tf_compat.tf.errors.OpError:
+            if not self.tf_compat.tf.io.gfile.exists(self._logdir):
+                raise self.directory_watcher.DirectoryDeletedError(
+                    "Directory %s has been permanently deleted" % self._logdir
+                )
+            raise
+
+    def _poll(self):
+        """Schedules a read of every tfevents file that grew since its last read"""
+        for path in self._list_logdir():
+            reader = self._readers.get(path)
+            if reader is None:
+                if path in self._rejected:
+                    continue
+                if not self._is_tensorflow_events_file(path):
+                    self._rejected.add(path)
+                    continue
+                # Files written before launch may still be written to, so
+                # their mtime is checked again on the next poll
+                if not self._is_new_tensorflow_events_file(path):
+                    continue
+                reader = TBFileReader(
+                    path, self._loader_class, self._file_size, self.process_event
+                )
+                self._readers[path] = reader
+            if reader.has_new_data():
+                self._reader_pool.schedule(reader)
+
     def _thread_body(self):
         """Check for new events every second"""
         shutdown_time = None
         while True:
             try:
-                for event in self._generator.Load():
-                    self.process_event(event)
+                self._poll()
             except self.directory_watcher.DirectoryDeletedError:
                 break
             if self._shutdown:
@@ -192,14 +256,17 @@ class TBDirWatcher(object):
                 elif now > shutdown_time:
                     break
             time.sleep(1)
+        for reader in six.itervalues(self._readers):
+            reader.wait()
 
     def process_event(self, event):
         # print("\nEVENT:::", self._logdir, self._namespace, event, "\n")
-        if self._first_event_timestamp is None:
-            self._first_event_timestamp = event.wall_time
+        with self._lock:
+            if self._first_event_timestamp is None:
+                self._first_event_timestamp = event.wall_time
 
-        if event.HasField("file_version"):
-            self._file_version = event.file_version
+            if event.HasField("file_version"):
+                self._file_version = event.file_version
 
         if event.HasField("summary"):
             self._queue.put(Event(event, self._namespace))
@@ -212,6 +279,81 @@ class TBDirWatcher(object):
         self._thread.join()
 
 
+class TBFileReader(object):
+    """Reads the events of one tfevents file.
+
+    The loader resumes where its previous read stopped. `offset` is the size
+    the file had when it was last read to the end, so a poll can tell with a
+    stat whether there is anything new to read.
+    """
+
+    def __init__(self, path, loader_class, file_size, callback):
+        self.path = path
+        self.offset = 0
+        self._loader = loader_class(path)
+        self._file_size = file_size
+        self._callback = callback
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def has_new_data(self):
+        if not self._idle.is_set():
+            return False
+        try:
+            return self._file_size(self.path) != self.offset
+        except Exception:
+            return False
+
+    def schedule(self):
+        self._idle.clear()
+
+    def load(self):
+        try:
+            size = self._file_size(self.path)
+            for event in self._loader.Load():
+                self._callback(event)
+            self.offset = size
+        except Exception:
+            logger.exception("error reading tfevents file: %s", self.path)
+        finally:
+            self._idle.set()
+
+    def wait(self):
+        self._idle.wait()
+
+
+class TBReaderPool(object):
+    """Threads reading scheduled tfevents files in parallel"""
+
+    def __init__(self, num_threads):
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._thread_body) for _ in range(num_threads)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def schedule(self, reader):
+        reader.schedule()
+        self._queue.put(reader)
+
+    def finish(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _thread_body(self):
+        while True:
+            reader = self._queue.get()
+            if reader is None:
+                break
+            reader.load()
+
+
 class Event(object):
     """An event wrapper to enable priority queueing"""
 
@@ -228,14 +370,15 @@ class TBEventConsumer(object):
     """Consumes tfevents from a priority queue.  There should always
     only be one of these per run_manager.  We wait for 10 seconds of queued
     events to reduce the chance of multiple tfevent files triggering
-    out of order steps.
+    out of order steps.  Events are then taken from the queue in batches and
+    the history rows they complete are published after each batch.
     """
 
     def __init__(self, tbwatcher, queue, run_proto, settings, delay=10):
         self._tbwatcher = tbwatcher
         self._queue = queue
         self._thread = threading.Thread(target=self._thread_body)
-        self._shutdown = None
+        self._shutdown = threading.Event()
         self._delay = delay
 
         # This is a bit of a hack to get file saving to work as it does in the user
@@ -253,39 +396,44 @@ class TBEventConsumer(object):
 
     def finish(self):
         self._delay = 0
-        self._shutdown = True
+        self._shutdown.set()
         self._thread.join()
 
+    def _get_events(self):
+        try:
+            events = [self._queue.get(True, 1)]
+        except queue.Empty:
+            return []
+        while len(events) < MAX_BATCH_EVENTS:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
     def _thread_body(self):
+        # Wait self._delay seconds from consumer start before logging events,
+        # finish() ends the wait early
+        self._shutdown.wait(max(0, self._start_time + self._delay - time.time()))
         tb_history = TBHistory()
         while True:
-            try:
-                event = self._queue.get(True, 1)
-                # Wait self._delay seconds from consumer start before logging events
-                if time.time() < self._start_time + self._delay and not self._shutdown:
-                    self._queue.put(event)
-                    time.sleep(0.1)
-                    continue
-            except queue.Empty:
-                event = None
-                if self._shutdown:
+            events = self._get_events()
+            if not events:
+                if self._shutdown.is_set():
                     break
-            if event:
-                self._handle_event(event, history=tb_history)
-                items = tb_history._get_and_reset()
-                for item in items:
-                    self._save_row(item,)
+                continue
+            self._handle_events(events, history=tb_history)
+            for item in tb_history._get_and_reset():
+                self._save_row(item)
         # flush uncommitted data
         tb_history._flush()
         items = tb_history._get_and_reset()
         for item in items:
             self._save_row(item)
 
-    def _handle_event(self, event, history=None):
-        wandb.tensorboard.log(
-            event.event,
-            step=event.event.step,
-            namespace=event.namespace,
+    def _handle_events(self, events, history=None):
+        wandb.tensorboard.log_events(
+            [(event.event, event.event.step, event.namespace) for event in events],
             history=history,
         )
 
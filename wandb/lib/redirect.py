@@ -3,17 +3,26 @@
 util/redirect.
 """
 
+from collections import deque
 import io
 import logging
 import os
 import sys
+import tempfile
 import threading
+import time
 
 
 logger = logging.getLogger("wandb")
 
 _LAST_WRITE_TOKEN = "L@stWr!t3T0k3n\n"
 
+# Bytes read from a capture pipe at a time
+_READ_SIZE = 65536
+
+# Captured output kept in memory for slow consumers before spilling to disk
+RELAY_BUFFER_SIZE = 16 * 1024 * 1024
+
 
 class Unbuffered(object):
     def __init__(self, stream):
@@ -98,20 +107,197 @@ class StreamWrapper(object):
             self.installed = False
 
 
-def _pipe_relay(stopped, fd, name, cb, tee, output_writer):
+class BufferedCallback(object):
+    """Coalesces console output before passing it on to cb(name, data).
+
+    Once `max_bytes` of a stream are buffered, its data is passed on up to the
+    last newline, so that large writes reach cb as whole lines; a partial line
+    is only split off when it alone exceeds `max_bytes`. Once the oldest
+    buffered data is `max_seconds` old, all of it is passed on, including a
+    trailing partial line, so progress bars and prompts written without a
+    newline still show up. close() passes on whatever is left.
+    """
+
+    def __init__(self, cb, max_bytes=65536, max_seconds=1.0):
+        self._cb = cb
+        self._max_bytes = max_bytes
+        self._max_seconds = max_seconds
+        # cb is called with the lock held, so the output of a stream stays in order
+        self._lock = threading.Lock()
+        # name -> [chunks, size, time of the oldest chunk]
+        self._buffers = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(name="ConsoleFlush", target=self._flush_thread)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __call__(self, name, data):
+        if not data:
+            return
+        with self._lock:
+            buf = self._buffers.get(name)
+            if buf is not None and type(buf[0][0]) is not type(data):
+                # bytes from a pipe and text from a wrapped stream don't join
+                self._emit(name, buf, force=True)
+                buf = None
+            if buf is None:
+                buf = self._buffers[name] = [[], 0, time.time()]
+            buf[0].append(data)
+            buf[1] += len(data)
+            if buf[1] >= self._max_bytes:
+                self._emit(name, buf)
+
+    def _emit(self, name, buf, force=False):
+        # Must be called with self._lock held
+        data = buf[0][0][:0].join(buf[0])
+        newline = b"\n" if isinstance(data, bytes) else "\n"
+        end = len(data) if force else data.rfind(newline) + 1
+        if end == 0 and len(data) >= self._max_bytes:
+            end = len(data)
+        rest = data[end:]
+        if rest:
+            self._buffers[name] = [[rest], len(rest), time.time()]
+        else:
+            del self._buffers[name]
+        if end == 0 or self._cb is None:
+            return
+        try:
+            self._cb(name, data[:end])
+        except Exception:
+            logger.exception("problem in console callback")
+            # Prevent further callbacks
+            self._cb = None
+
+    def flush(self, force=False):
+        """Passes on the streams with output older than max_seconds, or all"""
+        now = time.time()
+        with self._lock:
+            for name, buf in list(self._buffers.items()):
+                if force or now - buf[2] >= self._max_seconds:
+                    self._emit(name, buf, force=True)
+
+    def _flush_thread(self):
+        while not self._stopped.wait(self._max_seconds / 2.0):
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        self.flush(force=True)
+
+
+class RelayBuffer(object):
+    """Buffers captured output between the thread draining the pipe and the
+    consumers (tee, output file and callback), so that a slow consumer never
+    lets the pipe fill up and block the user's writes.
+
+    Up to `max_bytes` are held in memory. Beyond that, output goes to a spill
+    file and is read back in order once the consumers catch up; while the
+    spill file has unread output, new output is appended to it too. Bytes that
+    went through the spill file are counted in `delayed_bytes`, and bytes lost
+    because the spill file could not be written in `dropped_bytes`.
+    """
+
+    def __init__(self, max_bytes=RELAY_BUFFER_SIZE):
+        self._max_bytes = max_bytes
+        self._cond = threading.Condition(threading.Lock())
+        self._chunks = deque()
+        self._size = 0
+        self._spill = None
+        self._spill_read = 0
+        self._spill_written = 0
+        self._closed = False
+        self.delayed_bytes = 0
+        self.dropped_bytes = 0
+
+    def put(self, data):
+        with self._cond:
+            if self._spill_read == self._spill_written and self._size + len(data) <= self._max_bytes:
+                self._chunks.append(data)
+                self._size += len(data)
+            else:
+                self._write_spill(data)
+            self._cond.notify()
+
+    def _write_spill(self, data):
+        # Must be called with self._cond held
+        try:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile()
+            self._spill.seek(self._spill_written)
+            self._spill.write(data)
+            self._spill_written += len(data)
+            self.delayed_bytes += len(data)
+        except (IOError, OSError):
+            self.dropped_bytes += len(data)
+
+    def get(self):
+        """Returns the next output, or None once closed and drained"""
+        with self._cond:
+            while not self._chunks and self._spill_read == self._spill_written:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            if self._chunks:
+                # Coalesce small writes so consumers see few, large chunks
+                chunks = [self._chunks.popleft()]
+                size = len(chunks[0])
+                while self._chunks and size + len(self._chunks[0]) <= _READ_SIZE:
+                    chunks.append(self._chunks.popleft())
+                    size += len(chunks[-1])
+                self._size -= size
+                return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+            self._spill.flush()
+            self._spill.seek(self._spill_read)
+            data = self._spill.read(min(_READ_SIZE, self._spill_written - self._spill_read))
+            self._spill_read += len(data)
+            if self._spill_read == self._spill_written:
+                # Drained, reuse the file from the start
+                self._spill.seek(0)
+                self._spill.truncate()
+                self._spill_read = self._spill_written = 0
+            return data
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def release(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+def _pipe_relay(stopped, fd, name, buf):
+    """Drains the pipe into buf as fast as the user writes"""
     while True:
         try:
-            data = os.read(fd, 4096)
+            data = os.read(fd, _READ_SIZE)
         except OSError:
             # TODO(jhr): handle this
-            return
+            break
         if len(data) == 0:
             break
         if stopped.isSet():
             # TODO(jhr): Is this going to capture all timings?
             if data.endswith(_LAST_WRITE_TOKEN.encode()):
                 logger.info("relay done saw last write: %s", name)
+                # Larger reads may have picked up the end of the output too
+                data = data[:-len(_LAST_WRITE_TOKEN)]
+                if data:
+                    buf.put(data)
                 break
+        buf.put(data)
+    buf.close()
+    logger.info("relay done done: %s", name)
+
+
+def _relay_consumer(buf, name, cb, tee, output_writer):
+    while True:
+        data = buf.get()
+        if data is None:
+            break
         if tee:
             os.write(tee, data)
         if output_writer:
@@ -126,7 +312,7 @@ def _pipe_relay(stopped, fd, name, cb, tee, output_writer):
                 cb = None
                 # exc_info = sys.exc_info()
                 # six.reraise(*exc_info)
-    logger.info("relay done done: %s", name)
+    logger.info("relay consumer done: %s", name)
 
 
 class Redirect(object):
@@ -211,13 +397,16 @@ class Redirect(object):
 
 
 class Capture(object):
-    def __init__(self, name, cb, output_writer):
+    def __init__(self, name, cb, output_writer, buffer_size=RELAY_BUFFER_SIZE):
         self._started = False
         self._name = name
         self._cb = cb
         self._output_writer = output_writer
+        self._buffer_size = buffer_size
+        self._buffer = None
         self._stopped = None
         self._thread = None
+        self._consumer_thread = None
         self._tee = None
 
         self._pipe_rd = None
@@ -237,18 +426,34 @@ class Capture(object):
         self._started = True
 
         self._stopped = threading.Event()
+        self._buffer = RelayBuffer(self._buffer_size)
         # NB: daemon thread is used because we use atexit to determine when a user
         #     process is finished.  the atexit handler is responsible for flushing,
         #     joining, and closing
         read_thread = threading.Thread(
             name=self._name,
             target=_pipe_relay,
-            args=(self._stopped, self._pipe_rd, self._name, self._cb, self._tee,
-                  self._output_writer),
+            args=(self._stopped, self._pipe_rd, self._name, self._buffer),
         )
         read_thread.daemon = True
         read_thread.start()
         self._thread = read_thread
+        consumer_thread = threading.Thread(
+            name=self._name + "-consumer",
+            target=_relay_consumer,
+            args=(self._buffer, self._name, self._cb, self._tee, self._output_writer),
+        )
+        consumer_thread.daemon = True
+        consumer_thread.start()
+        self._consumer_thread = consumer_thread
+
+    @property
+    def delayed_bytes(self):
+        return self._buffer.delayed_bytes if self._buffer else 0
+
+    @property
+    def dropped_bytes(self):
+        return self._buffer.dropped_bytes if self._buffer else 0
 
     def _stop(self):
         name = self._name
@@ -261,9 +466,24 @@ class Capture(object):
         logger.info("_stop closed: %s", name)
         # TODO: need to shut this down cleanly since it is a daemon thread
         self._thread.join(timeout=30)
-        if self._thread.isAlive():
+        if self._thread.is_alive():
             logger.error("Thread did not join: %s", self._name)
             # TODO(jhr): do something better
         logger.info("_stop joined: %s", name)
         os.close(self._pipe_rd)
         logger.info("_stop rd closed: %s", name)
+        self._consumer_thread.join(timeout=30)
+        if self._consumer_thread.is_alive():
+            logger.error("Consumer thread did not join: %s", self._name)
+        else:
+            self._buffer.release()
+        logger.info(
+            "_stop consumer joined: %s (delayed %i bytes, dropped %i bytes)",
+            name,
+            self._buffer.delayed_bytes,
+            self._buffer.dropped_bytes,
+        )
+        if self._buffer.dropped_bytes:
+            logger.warning(
+                "Lost %i bytes of %s output", self._buffer.dropped_bytes, name
+            )
@@ -1,14 +1,19 @@
 #
+import base64
+import hashlib
+import json
 import re
 import os
 import time
 import shutil
+import threading
 import requests
 from six.moves.urllib.parse import urlparse
 
 from wandb.compat import tempfile as compat_tempfile
 from wandb import env
 from wandb.interface.artifacts import *
+from wandb.interface.artifacts import md5_hash_file
 from wandb.internal.progress import Progress
 from wandb.apis import InternalApi
 from wandb.errors.error import CommError
@@ -27,6 +32,11 @@ _REQUEST_POOL_CONNECTIONS = 64
 
 _REQUEST_POOL_MAXSIZE = 64
 
+# How many times an interrupted download is resumed before giving up.
+_DOWNLOAD_RESUME_ATTEMPTS = 5
+
+_NUM_CACHE_LOCKS = 64
+
 
 class ArtifactsCache(object):
     def __init__(self, cache_dir):
@@ -34,6 +44,11 @@ class ArtifactsCache(object):
         util.mkdir_exists_ok(self._cache_dir)
         self._md5_obj_dir = os.path.join(self._cache_dir, "obj", "md5")
         self._etag_obj_dir = os.path.join(self._cache_dir, "obj", "etag")
+        self._locks = [threading.Lock() for _ in range(_NUM_CACHE_LOCKS)]
+
+    def lock_obj_path(self, path):
+        """Returns a lock that serializes writers of the cache object at `path`."""
+        return self._locks[hash(path) % len(self._locks)]
 
     def check_md5_obj_path(self, b64_md5, size):
         hex_md5 = util.bytes_to_hex(base64.b64decode(b64_md5))
@@ -51,6 +66,128 @@ class ArtifactsCache(object):
         return path, False
 
 
+def download_to_cache_path(
+    session,
+    url,
+    path,
+    size=None,
+    md5_digest=None,
+    check_response=None,
+    headers=None,
+    progress_callback=None,
+    **kwargs
+):
+    """Streams `url` into the cache object at `path`.
+
+    Data is written to `path` + ".partial" and atomically renamed into place
+    once complete, so a truncated object is never visible in the cache. A
+    partial file left behind by an interrupted download is resumed with an
+    HTTP range request. When `md5_digest` is given, the md5 of the data is
+    computed while streaming and the download fails on a mismatch.
+    `check_response` is called with each response before any data is written.
+    `progress_callback(new_bytes, total_bytes)` is called as data is received.
+    """
+    tmp_path = path + ".partial"
+    chunk_size = env.get_artifact_download_chunk_size()
+    attempt = 0
+    while True:
+        attempt += 1
+        offset = os.path.getsize(tmp_path) if os.path.isfile(tmp_path) else 0
+        if size is not None and offset > size:
+            offset = 0
+        try:
+            hasher = _fetch_to_path(
+                session,
+                url,
+                tmp_path,
+                offset,
+                size,
+                chunk_size,
+                check_response,
+                headers,
+                progress_callback,
+                kwargs,
+            )
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt >= _DOWNLOAD_RESUME_ATTEMPTS:
+                raise
+            continue
+
+        if md5_digest is not None:
+            digest = base64.b64encode(hasher.digest()).decode("ascii")
+            if digest != md5_digest:
+                os.remove(tmp_path)
+                # A stale partial file may have been resumed, retry from scratch.
+                if offset > 0 and attempt < _DOWNLOAD_RESUME_ATTEMPTS:
+                    continue
+                raise ValueError(
+                    "Digest mismatch for %s: expected %s but found %s"
+                    % (url, md5_digest, digest)
+                )
+        util.rename_replace(tmp_path, path)
+        return path
+
+
+def _fetch_to_path(
+    session,
+    url,
+    tmp_path,
+    offset,
+    size,
+    chunk_size,
+    check_response,
+    headers,
+    progress_callback,
+    kwargs,
+):
+    if offset > 0 and offset == size:
+        # Everything was written before we were interrupted, just verify it.
+        return md5_hash_file(tmp_path)
+
+    headers = dict(headers or {})
+    if offset > 0:
+        headers["Range"] = "bytes=%d-" % offset
+    else:
+        headers.pop("Range", None)
+        headers.pop("If-Range", None)
+    response = session.get(url, stream=True, headers=headers, **kwargs)
+    if offset > 0 and response.status_code == 416:
+        # Our partial file doesn't match the object anymore, start over.
+        return _fetch_to_path(
+            session,
+            url,
+            tmp_path,
+            0,
+            size,
+            chunk_size,
+            check_response,
+            headers,
+            progress_callback,
+            kwargs,
+        )
+    response.raise_for_status()
+    if check_response is not None:
+        check_response(response)
+    if response.status_code != 206:
+        # The server ignored our range request and is sending the whole object.
+        offset = 0
+
+    hasher = md5_hash_file(tmp_path) if offset > 0 else hashlib.md5()
+    total = offset
+    with open(tmp_path, "ab" if offset > 0 else "wb") as file:
+        for data in response.iter_content(chunk_size=chunk_size):
+            hasher.update(data)
+            file.write(data)
+            total += len(data)
+            if progress_callback is not None:
+                progress_callback(len(data), total)
+    return hasher
+
+
 _artifacts_cache = None
 
 
@@ -264,29 +401,51 @@ class ArtifactManifestV1(ArtifactManifest):
                 "Expected manifest version 1, got %s" % manifest_json["version"]
             )
 
+        entries = {
+            name: cls.entry_from_json(name, val)
+            for name, val in manifest_json["contents"].items()
+        }
+        return cls.from_manifest_header(artifact, manifest_json, entries)
+
+    @classmethod
+    def from_manifest_header(cls, artifact, manifest_json, entries):
         storage_policy_name = manifest_json["storagePolicy"]
         storage_policy_config = manifest_json.get("storagePolicyConfig", {})
         storage_policy_cls = StoragePolicy.lookup_by_name(storage_policy_name)
         if storage_policy_cls is None:
             raise ValueError('Failed to find storage policy "%s"' % storage_policy_name)
 
-        entries = {
-            name: ArtifactManifestEntry(
-                path=name,
-                digest=val["digest"],
-                birth_artifact_id=val.get("birthArtifactID"),
-                ref=val.get("ref"),
-                size=val.get("size"),
-                extra=val.get("extra"),
-                local_path=val.get("local_path"),
-            )
-            for name, val in manifest_json["contents"].items()
-        }
-
         return cls(
             artifact, storage_policy_cls.from_config(storage_policy_config), entries
         )
 
+    @staticmethod
+    def entry_from_json(name, val):
+        return ArtifactManifestEntry(
+            path=name,
+            digest=val["digest"],
+            birth_artifact_id=val.get("birthArtifactID"),
+            ref=val.get("ref"),
+            size=val.get("size"),
+            extra=val.get("extra"),
+            local_path=val.get("local_path"),
+        )
+
+    @staticmethod
+    def entry_to_json(entry):
+        json_entry = {
+            "digest": entry.digest,
+        }
+        if entry.birth_artifact_id:
+            json_entry["birthArtifactID"] = entry.birth_artifact_id
+        if entry.ref:
+            json_entry["ref"] = entry.ref
+        if entry.extra:
+            json_entry["extra"] = entry.extra
+        if entry.size is not None:
+            json_entry["size"] = entry.size
+        return json_entry
+
     def __init__(self, artifact, storage_policy, entries=None):
         super(ArtifactManifestV1, self).__init__(
             artifact, storage_policy, entries=entries
@@ -301,19 +460,8 @@ class ArtifactManifestV1(ArtifactManifest):
         contents.
         """
         contents = {}
-        for entry in sorted(self.entries.values(), key=lambda k: k.path):
-            json_entry = {
-                "digest": entry.digest,
-            }
-            if entry.birth_artifact_id:
-                json_entry["birthArtifactID"] = entry.birth_artifact_id
-            if entry.ref:
-                json_entry["ref"] = entry.ref
-            if entry.extra:
-                json_entry["extra"] = entry.extra
-            if entry.size is not None:
-                json_entry["size"] = entry.size
-            contents[entry.path] = json_entry
+        for path in self.sorted_paths():
+            contents[path] = self.entry_to_json(self.entries[path])
         return {
             "version": self.__class__.version(),
             "storagePolicy": self.storage_policy.name(),
@@ -321,15 +469,45 @@ class ArtifactManifestV1(ArtifactManifest):
             "contents": contents,
         }
 
+    def write_manifest_json(self, fp):
+        """Writes the JSON returned by to_manifest_json to `fp`, one entry at a
+        time, without building the whole document in memory."""
+        header = json.dumps(
+            {
+                "version": self.__class__.version(),
+                "storagePolicy": self.storage_policy.name(),
+                "storagePolicyConfig": self.storage_policy.config() or {},
+            }
+        )
+        fp.write(header[:-1] + ', "contents": {')
+        separator = "\n"
+        for path in self.sorted_paths():
+            fp.write(separator)
+            fp.write(json.dumps(path))
+            fp.write(": ")
+            fp.write(json.dumps(self.entry_to_json(self.entries[path])))
+            separator = ",\n"
+        fp.write("\n}}\n")
+
     def digest(self):
         hasher = hashlib.md5()
         hasher.update("wandb-artifact-manifest-v1\n".encode())
-        for (name, entry) in sorted(self.entries.items(), key=lambda kv: kv[0]):
-            hasher.update("{}:{}\n".format(name, entry.digest).encode())
+        for name in self.sorted_paths():
+            hasher.update("{}:{}\n".format(name, self.entries[name].digest).encode())
         return hasher.hexdigest()
 
 
 class ArtifactManifestEntry(object):
+    __slots__ = (
+        "path",
+        "ref",
+        "digest",
+        "birth_artifact_id",
+        "size",
+        "extra",
+        "local_path",
+    )
+
     def __init__(
         self,
         path,
@@ -399,24 +577,29 @@ class WandbStoragePolicy(StoragePolicy):
     def config(self):
         return self._config
 
-    def load_file(self, artifact, name, manifest_entry):
+    def load_file(self, artifact, name, manifest_entry, progress_callback=None):
         path, hit = self._cache.check_md5_obj_path(
             manifest_entry.digest, manifest_entry.size
         )
         if hit:
             return path
 
-        response = self._session.get(
-            self._file_url(self._api, artifact.entity, manifest_entry),
-            auth=("api", self._api.api_key),
-            stream=True,
-        )
-        response.raise_for_status()
-
-        with open(path, "wb") as file:
-            for data in response.iter_content(chunk_size=16 * 1024):
-                file.write(data)
-        return path
+        with self._cache.lock_obj_path(path):
+            # Another thread may have fetched the same object while we waited.
+            path, hit = self._cache.check_md5_obj_path(
+                manifest_entry.digest, manifest_entry.size
+            )
+            if hit:
+                return path
+            return download_to_cache_path(
+                self._session,
+                self._file_url(self._api, artifact.entity, manifest_entry),
+                path,
+                size=manifest_entry.size,
+                md5_digest=manifest_entry.digest,
+                progress_callback=progress_callback,
+                auth=("api", self._api.api_key),
+            )
 
     def store_reference(
         self, artifact, path, name=None, checksum=True, max_objects=None
@@ -1051,21 +1234,28 @@ class HTTPHandler(StorageHandler):
         if hit:
             return path
 
-        response = self._session.get(manifest_entry.ref, stream=True)
-        response.raise_for_status()
+        def check_response(response):
+            digest, size, extra = self._entry_from_headers(response.headers)
+            if manifest_entry.digest != digest:
+                raise ValueError(
+                    "Digest mismatch for url %s: expected %s but found %s"
+                    % (manifest_entry.ref, manifest_entry.digest, digest)
+                )
 
-        digest, size, extra = self._entry_from_headers(response.headers)
-        if manifest_entry.digest != digest:
-            raise ValueError(
-                "Digest mismatch for url %s: expected %s but found %s"
-                % (manifest_entry.ref, manifest_entry.digest, digest)
+        headers = {}
+        if manifest_entry.extra.get("etag"):
+            # Only resume a partial download if the object hasn't changed.
+            headers["If-Range"] = manifest_entry.extra["etag"]
+        with self._cache.lock_obj_path(path):
+            return download_to_cache_path(
+                self._session,
+                manifest_entry.ref,
+                path,
+                size=manifest_entry.size,
+                check_response=check_response,
+                headers=headers,
             )
 
-        with open(path, "wb") as file:
-            for data in response.iter_content(chunk_size=16 * 1024):
-                file.write(data)
-        return path
-
     def store_path(self, artifact, path, name=None, checksum=True, max_objects=None):
         name = name or os.path.basename(path)
         if not checksum:
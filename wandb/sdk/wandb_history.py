@@ -6,10 +6,116 @@ Track history from Run.log() calls.
 
 """
 
+import random
 import time
 
+import six
+from wandb import util
 from wandb.wandb_torch import TorchHistory
 
+# Exact types of the values that are aggregated, see History.aggregate
+_NUMBER_TYPES = frozenset(
+    t for t in util.JSON_SCALAR_TYPES | util.NUMPY_SCALAR_TYPES
+    if t not in (bool, type(None)) and not (util.np and issubclass(t, util.np.bool_))
+)
+
+
+class HistoryAggregator(object):
+    """Accumulates history rows into a single row per window of steps or seconds.
+
+    Numbers are reduced to their mean, which is logged under the original key,
+    plus the requested `stats` logged as "key/stat". Any other value is logged
+    as it was last seen in the window, and so are the "_step", "_runtime" and
+    "_timestamp" of the last row.
+    """
+
+    STATS = ("min", "max", "last", "count")
+    # Values kept per key for the optional histogram, by reservoir sampling
+    HISTOGRAM_SAMPLES = 1024
+
+    def __init__(self, steps=None, seconds=None, stats=("min", "max"), histogram=False):
+        if not steps and not seconds:
+            raise ValueError("Aggregation needs a window of steps or seconds")
+        unknown = set(stats) - set(self.STATS)
+        if unknown:
+            raise ValueError(
+                "Unknown aggregation stats %s, expected some of %s"
+                % (", ".join(sorted(unknown)), ", ".join(self.STATS))
+            )
+        self._steps = steps
+        self._seconds = seconds
+        self._stats = tuple(stats)
+        self._histogram = histogram
+        # A private generator, so sampling doesn't change the user's random stream
+        self._random = random.Random()
+        self._reset()
+
+    def _reset(self):
+        # key -> [count, sum, min, max, last]
+        self._numbers = dict()
+        self._samples = dict()
+        self._other = dict()
+        self._rows = 0
+        self._start = None
+
+    def add(self, row):
+        """Adds a row, returns the aggregated row if it completed a window"""
+        now = time.time()
+        if self._start is None:
+            self._start = now
+        numbers = self._numbers
+        for key, val in six.iteritems(row):
+            if type(val) not in _NUMBER_TYPES or key.startswith("_"):
+                self._other[key] = val
+                continue
+            acc = numbers.get(key)
+            if acc is None:
+                numbers[key] = [1, val, val, val, val]
+            else:
+                acc[0] += 1
+                acc[1] += val
+                if val < acc[2]:
+                    acc[2] = val
+                if val > acc[3]:
+                    acc[3] = val
+                acc[4] = val
+            if self._histogram:
+                self._sample(key, val, numbers[key][0])
+        self._rows += 1
+
+        if (self._steps and self._rows >= self._steps) or (
+            self._seconds and now - self._start >= self._seconds
+        ):
+            return self.flush()
+        return None
+
+    def _sample(self, key, val, count):
+        samples = self._samples.setdefault(key, [])
+        if len(samples) < self.HISTOGRAM_SAMPLES:
+            samples.append(val)
+        else:
+            i = self._random.randint(0, count - 1)
+            if i < self.HISTOGRAM_SAMPLES:
+                samples[i] = val
+
+    def flush(self):
+        """Returns the aggregated row of the current window and starts a new one"""
+        if self._rows == 0:
+            return None
+        row = dict(self._other)
+        for key, (count, total, lo, hi, last) in six.iteritems(self._numbers):
+            row[key] = total / float(count)
+            values = {"min": lo, "max": hi, "last": last, "count": count}
+            for stat in self._stats:
+                row["%s/%s" % (key, stat)] = values[stat]
+        if self._histogram:
+            import wandb
+
+            for key, samples in six.iteritems(self._samples):
+                row["%s/histogram" % key] = wandb.Histogram(samples, num_bins=32)
+        self._reset()
+        return row
+
 
 class History(object):
     """Time series data for Runs.
@@ -21,6 +127,7 @@ class History(object):
         self._data = dict()
         self._callback = None
         self._torch = None
+        self._aggregator = None
         self.compute = True
 
     def _set_callback(self, cb):
@@ -45,10 +152,40 @@ class History(object):
                 self._data.get("_runtime", time.time() - self.start_time)
             )
             self._data["_timestamp"] = int(self._data.get("_timestamp", time.time()))
-            if self._callback:
-                self._callback(row=self._data, step=self._step)
+            row = self._data
+            if self._aggregator is not None:
+                row = self._aggregator.add(row)
+            if row and self._callback:
+                self._callback(row=row, step=row["_step"])
             self._data = dict()
 
+    def _flush_aggregate(self):
+        """Emits the partial window of an aggregating history"""
+        if self._aggregator is None:
+            return
+        row = self._aggregator.flush()
+        if row and self._callback:
+            self._callback(row=row, step=row["_step"])
+
+    def aggregate(self, steps=None, seconds=None, stats=("min", "max"), histogram=False):
+        """Aggregates logged numbers on the client, for loops that log far more
+        often than the few times per second wandb.log is meant for.
+
+        Instead of a row per step, one row is logged per window of `steps`
+        steps or `seconds` seconds, whichever ends first. Each number is logged
+        as its mean over the window, along with the `stats` ("min", "max",
+        "last" and "count") as "key/stat" and, if `histogram` is set, a
+        histogram of the window's values as "key/histogram". Call without a
+        window to stop aggregating.
+        """
+        self._flush_aggregate()
+        if steps or seconds:
+            self._aggregator = HistoryAggregator(
+                steps=steps, seconds=seconds, stats=stats, histogram=histogram
+            )
+        else:
+            self._aggregator = None
+
     @property
     def start_time(self):
         return self._run.start_time
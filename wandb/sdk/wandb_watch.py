@@ -15,7 +15,15 @@ logger = logging.getLogger("wandb")
 _global_watch_idx = 0
 
 
-def watch(models, criterion=None, log="gradients", log_freq=1000, idx=None):
+def watch(
+    models,
+    criterion=None,
+    log="gradients",
+    log_freq=1000,
+    idx=None,
+    batched=False,
+    histogram_max_error=None,
+):
     """
     Hooks into the torch model to collect gradients and the topology.  Should be extended
     to accept arbitrary ML models.
@@ -25,6 +33,10 @@ def watch(models, criterion=None, log="gradients", log_freq=1000, idx=None):
     :param (str) log: One of "gradients", "parameters", "all", or None
     :param (int) log_freq: log gradients and parameters every N batches
     :param (int) idx: an index to be used when calling wandb.watch on multiple models
+    :param (bool) batched: compute the gradient histograms of a backward pass together,
+        with a single device to host transfer instead of several per parameter
+    :param (float) histogram_max_error: estimate the histograms of large tensors from a
+        sample of their values, see wandb.Histogram
     :return: (wandb.Graph) The graph object that will populate after the first backward pass
     """
     global _global_watch_idx
@@ -69,6 +81,8 @@ def watch(models, criterion=None, log="gradients", log_freq=1000, idx=None):
             prefix=prefix,
             log_freq=log_freq,
             jupyter_run=wandb.run if in_jupyter else None,
+            batched=batched,
+            histogram_max_error=histogram_max_error,
         )
 
         graph = wandb.wandb_torch.TorchGraph.hook_torch(
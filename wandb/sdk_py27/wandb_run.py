@@ -240,6 +240,8 @@ class Run(RunBase):
         self._wl = None
         self._reporter = None
         self._data = dict()
+        # Media files stored in this run, by (subdir, extension, sha256)
+        self._media_paths = dict()
 
         self._entity = None
         self._project = None
@@ -662,7 +664,8 @@ class Run(RunBase):
 
         wandb.log is not intended to be called more than a few times per second.
             If you want to log more frequently than that it's better to aggregate
-            the data on the client side or you may get degraded performance.
+            the data on the client side or you may get degraded performance,
+            see `run.history.aggregate()`.
 
         Args:
             row (dict, optional): A dict of serializable python objects i.e str,
@@ -1137,8 +1140,8 @@ class Run(RunBase):
         atexit.register(lambda: self._atexit_cleanup())
 
         if self._use_redirect:
-            # setup fake callback
-            self._redirect_cb = self._console_callback
+            # setup fake callback, output is published in batches of whole lines
+            self._redirect_cb = redirect.BufferedCallback(self._console_callback)
 
         output_log_path = os.path.join(self.dir, filenames.OUTPUT_FNAME)
         self._output_writer = WriteSerializingFile(open(output_log_path, "wb"))
@@ -1146,6 +1149,9 @@ class Run(RunBase):
 
     def _console_stop(self):
         self._restore()
+        if self._redirect_cb:
+            self._redirect_cb.close()
+            self._redirect_cb = None
         self._output_writer.close()
         self._output_writer = None
 
@@ -1232,6 +1238,7 @@ class Run(RunBase):
 
         # make sure all uncommitted history is flushed
         self.history._flush()
+        self.history._flush_aggregate()
 
         self._console_stop()
         print("")
@@ -1400,8 +1407,19 @@ class Run(RunBase):
             print(s, file=f)
         self.save(spec_filename)
 
-    def watch(self, models, criterion=None, log="gradients", log_freq=100, idx=None):
-        wandb.watch(models, criterion, log, log_freq, idx)
+    def watch(
+        self,
+        models,
+        criterion=None,
+        log="gradients",
+        log_freq=100,
+        idx=None,
+        batched=False,
+        histogram_max_error=None,
+    ):
+        wandb.watch(
+            models, criterion, log, log_freq, idx, batched, histogram_max_error
+        )
 
     def use_artifact(self, artifact_or_name, type=None, aliases=None):
         """ Declare an artifact as an input to a run, call `download` or `file` on \
@@ -45,6 +45,7 @@ from wandb.lib.runid import generate_id
 
 if wandb.TYPE_CHECKING:  # type: ignore
     from typing import (  # noqa: F401 pylint: disable=unused-import
+        Any,
         Dict,
         List,
         Optional,
@@ -93,10 +94,17 @@ env_settings = dict(
     run_notes="WANDB_NOTES",
     run_tags="WANDB_TAGS",
     run_job_type="WANDB_JOB_TYPE",
+    system_sample_seconds=None,
+    system_samples=None,
+    system_sample_spread=None,
 )
 
 env_convert = dict(
-    run_tags=lambda s: s.split(","), ignore_globs=lambda s: s.split(","),
+    run_tags=lambda s: s.split(","),
+    ignore_globs=lambda s: s.split(","),
+    system_sample_seconds=float,
+    system_samples=int,
+    system_sample_spread=lambda s: s.lower() in ("true", "1", "yes"),
 )
 
 
@@ -257,8 +265,10 @@ class Settings(object):
         # strict=None,  # set to "on" to enforce current best practices (also "warn")
         problem="fatal",
         # dynamic settings
-        system_sample_seconds=2,
-        system_samples=15,
+        # system stats sampling, defaults are applied in wandb/internal/stats.py
+        system_sample_seconds=None,
+        system_samples=None,
+        system_sample_spread=None,
         heartbeat_seconds=30,
         config_paths=None,
         _config_dict=None,
@@ -524,7 +534,13 @@ class Settings(object):
             if setting_key:
                 conv = env_convert.get(setting_key, None)
                 if conv:
-                    v = conv(v)
+                    try:
+                        v = conv(v)
+                    except ValueError:
+                        wandb.termwarn(
+                            "Ignoring invalid value for {}: {}".format(k, v)
+                        )
+                        continue
                 env_dict[setting_key] = v
             else:
                 _logger.info("Unhandled environment var: {}".format(k))
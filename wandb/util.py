@@ -8,11 +8,13 @@ import codecs
 import errno
 import hashlib
 import json
+import math
 import getpass
 import logging
 import os
 import re
 import shlex
+import shutil
 import subprocess
 import sys
 import threading
@@ -209,6 +211,15 @@ class PreInitObject(object):
 
 np = get_module('numpy')
 
+# Exact types (not subclasses, which may behave differently) that are already
+# JSON friendly, and numpy scalar types that only need .item(). Checked first
+# since most logged values are plain numbers.
+JSON_SCALAR_TYPES = frozenset(six.integer_types + (float, bool, type(None)))
+NUMPY_SCALAR_TYPES = frozenset(
+    t for t in set(np.sctypeDict.values())
+    if issubclass(t, (np.bool_, np.integer, np.floating)) and not issubclass(t, np.timedelta64)
+) if np else frozenset()
+
 MAX_SLEEP_SECONDS = 60 * 5
 # TODO: Revisit these limits
 VALUE_BYTES_LIMIT = 100000
@@ -333,6 +344,12 @@ def ensure_matplotlib_figure(obj):
 
 def json_friendly(obj):
     """Convert an object into something that's more becoming of JSON"""
+    obj_type = type(obj)
+    if obj_type in JSON_SCALAR_TYPES:
+        return obj, False
+    if obj_type in NUMPY_SCALAR_TYPES:
+        return obj.item(), True
+
     converted = True
     typename = get_full_typename(obj)
 
@@ -373,8 +390,9 @@ def json_friendly(obj):
         obj = obj.isoformat()
     else:
         converted = False
-    if getsizeof(obj) > VALUE_BYTES_LIMIT:
-        wandb.termwarn("Serializing object of type {} that is {} bytes".format(type(obj).__name__, getsizeof(obj)))
+    size = getsizeof(obj)
+    if size > VALUE_BYTES_LIMIT:
+        wandb.termwarn("Serializing object of type {} that is {} bytes".format(type(obj).__name__, size))
 
     return obj, converted
 
@@ -391,9 +409,42 @@ def convert_plots(obj):
         return obj
 
 
+def histogram_sample_size(max_error, confidence=0.99):
+    """Returns how many uniformly sampled values are needed for every bin of a
+    histogram to be within max_error of its true fraction of the values.
+
+    By the Dvoretzky-Kiefer-Wolfowitz inequality the empirical CDF of n samples
+    is within eps of the true CDF everywhere with probability
+    1 - 2 * exp(-2 * n * eps^2). A bin is the difference of two CDF values, so
+    eps is half of max_error.
+    """
+    eps = max_error / 2.0
+    return int(math.ceil(math.log(2.0 / (1 - confidence)) / (2 * eps * eps)))
+
+
+_sample_rng = None
+
+
+def sample_array(array, max_error):
+    """Returns a uniform sample of array with enough values for histograms within
+    max_error (see histogram_sample_size) and how many values each sampled value
+    stands for. Small arrays are returned whole."""
+    global _sample_rng
+    flat = np.asarray(array).reshape(-1)
+    size = histogram_sample_size(max_error)
+    if flat.size <= size:
+        return flat, 1
+    # A private generator, so sampling doesn't change the user's random stream
+    if _sample_rng is None:
+        _sample_rng = np.random.RandomState()
+    index = _sample_rng.randint(0, flat.size, size)
+    return flat[index], flat.size / float(size)
+
+
 def maybe_compress_history(obj):
     if np and isinstance(obj, np.ndarray) and obj.size > 32:
-        return wandb.Histogram(obj, num_bins=32).to_json(), True
+        return wandb.Histogram(
+            obj, num_bins=32, max_error=env.get_histogram_max_error()).to_json(), True
     else:
         return obj, False
 
@@ -522,6 +573,9 @@ def json_dump_uncompressed(obj, fp, **kwargs):
 
 def json_dumps_safer_history(obj, **kwargs):
     """Convert obj to json, with some extra encodable types, including histograms"""
+    if not kwargs and type(obj) in JSON_SCALAR_TYPES:
+        # The custom encoder is only consulted for other types, skip creating one
+        return json.dumps(obj)
     return json.dumps(obj, cls=WandBHistoryJSONEncoder, **kwargs)
 
 
@@ -561,6 +615,73 @@ def mkdir_exists_ok(path):
             raise
 
 
+# Ways a file from the artifacts cache can be placed in a download root.
+# "auto" tries a copy-on-write reflink, then a hardlink, and copies otherwise.
+MATERIALIZE_MODES = ("copy", "hardlink", "symlink", "reflink", "auto")
+
+# ioctl request number for FICLONE on Linux (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, "rb") as src_file:
+        with open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+
+
+def materialize_file(src, dst, mode="copy"):
+    """Place the file at `src` at `dst` using the requested materialization mode.
+
+    Link modes fall back to a plain copy when the link can't be created, for
+    example across filesystems or on platforms without reflink support. Files
+    created with "hardlink" or "symlink" share their contents with `src`, so
+    they must be treated as read-only.
+
+    Returns:
+        The mode that was actually used.
+    """
+    if mode not in MATERIALIZE_MODES:
+        raise ValueError(
+            "Invalid materialize mode %s, must be one of: %s"
+            % (mode, ", ".join(MATERIALIZE_MODES))
+        )
+    # Never write through an existing link into the source file.
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    attempts = ["reflink", "hardlink"] if mode == "auto" else [mode]
+    for attempt in attempts:
+        try:
+            if attempt == "copy":
+                break
+            elif attempt == "hardlink":
+                os.link(src, dst)
+            elif attempt == "symlink":
+                os.symlink(os.path.abspath(src), dst)
+            else:
+                _reflink(src, dst)
+            return attempt
+        except (AttributeError, ImportError, IOError, OSError):
+            if os.path.lexists(dst):
+                os.remove(dst)
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def rename_replace(src, dst):
+    """Atomically renames `src` to `dst`, replacing `dst` if it exists."""
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+        return
+    # python2: rename replaces atomically on posix, but not on windows
+    if platform.system() == "Windows" and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+
 def no_retry_auth(e):
     if hasattr(e, "exception"):
         e = e.exception
@@ -683,6 +804,37 @@ def md5_file(path):
     return base64.b64encode(hash_md5.digest()).decode('ascii')
 
 
+def sha256_file(path, chunk_size=1024 * 1024):
+    hash_sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hash_sha256.update(chunk)
+    return hash_sha256.hexdigest()
+
+
+class HashingWriter(object):
+    """Wraps a binary file object and hashes everything written through it,
+    so a file's digest is known as soon as it has been written.
+
+    Deliberately has no fileno(): writers like PIL would otherwise write to the
+    descriptor directly and bypass the hash.
+    """
+
+    def __init__(self, fileobj, hash_fn=hashlib.sha256):
+        self._fileobj = fileobj
+        self._hash = hash_fn()
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._fileobj.write(data)
+
+    def flush(self):
+        self._fileobj.flush()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
 def get_log_file_path():
     """Log file path used in error messages.
 
@@ -5,6 +5,7 @@
 
 from collections import namedtuple
 import itertools
+import threading
 import weakref
 from six.moves import reduce
 from distutils.version import LooseVersion
@@ -78,16 +79,35 @@ class TorchHistory(object):
         self._num_bins = 64
         self._is_cuda_histc_supported = None
         self._jupyter_run = None
-
-    def add_log_hooks_to_pytorch_module(self, module, name=None, prefix='', log_parameters=True, log_gradients=True, log_freq=0, jupyter_run=None):
+        # (name, tensor) pairs waiting for the end of the backward pass, hooks
+        # run on the autograd device threads
+        self._stats_lock = threading.Lock()
+        self._pending_stats = []
+        self._stats_queued = False
+        self._pending_task = None
+        # Batched histograms work on this many elements of a tensor at a time
+        self._chunk_size = 1 << 22
+        # If set, histograms of large tensors are estimated from a sample, see
+        # util.histogram_sample_size
+        self._histogram_max_error = None
+        self._sample_generator = None
+
+    def add_log_hooks_to_pytorch_module(self, module, name=None, prefix='', log_parameters=True, log_gradients=True, log_freq=0, jupyter_run=None, batched=False, histogram_max_error=None):
         """ This instuments hooks into the pytorch module
         log_parameters - log parameters after a forward pass
         log_gradients - log gradients after a backward pass
         log_freq - log gradients/parameters every N batches
+        batched - compute the histograms of all gradients of a backward pass
+            together, see log_tensor_stats_batch
+        histogram_max_error - estimate histograms from a sample of each tensor,
+            see wandb.Histogram
         """
         if name is not None:
             prefix = prefix + name
 
+        if histogram_max_error is not None:
+            self._histogram_max_error = histogram_max_error
+
         if jupyter_run:
             self._jupyter_run = weakref.ref(jupyter_run)
 
@@ -97,14 +117,16 @@ class TorchHistory(object):
             def parameter_log_hook(module, input_, output, log_track):
                 if not log_track_update(log_track):
                     return
+                named_tensors = []
                 for name, parameter in module.named_parameters():
                     # for pytorch 0.3 Variables
                     if isinstance(parameter, torch.autograd.Variable):
                         data = parameter.data
                     else:
                         data = parameter
-                    self.log_tensor_stats(
-                        data.cpu(), 'parameters/' + prefix + name)
+                    named_tensors.append(('parameters/' + prefix + name, data))
+                # Computed where the parameters live, only the histograms are copied
+                self.log_tensor_stats_batch(named_tensors)
             log_track_params = log_track_init(log_freq)
             hook = module.register_forward_hook(
                 lambda mod, inp, outp: parameter_log_hook(mod, inp, outp, log_track_params))
@@ -117,7 +139,7 @@ class TorchHistory(object):
                     log_track_grad = log_track_init(log_freq)
                     module._wandb_hook_names.append('gradients/' + prefix + name)
                     self._hook_variable_gradient_stats(
-                        parameter, 'gradients/' + prefix + name, log_track_grad)
+                        parameter, 'gradients/' + prefix + name, log_track_grad, batched=batched)
 
     def log_tensor_stats(self, tensor, name):
         """Add distribution statistics on a tensor's elements to the current History entry
@@ -134,14 +156,7 @@ class TorchHistory(object):
             cls = type(tensor)
             raise TypeError('Expected Tensor, not {}.{}'.format(
                 cls.__module__, cls.__name__))
-        history = self._history()
-
-        # recover history from run if using jupyter
-        if history is None and self._jupyter_run:
-            jupyter_run = self._jupyter_run()
-            if jupyter_run:
-                history = jupyter_run.history
-
+        history = self._get_history()
         if history is None or not history.compute:
             return
 
@@ -168,10 +183,12 @@ class TorchHistory(object):
         if not hasattr(flat, "detach"):
             tensor = flat.cpu().clone().numpy()
             history._row_update({
-                name: wandb.Histogram(tensor)
+                name: wandb.Histogram(tensor, max_error=self._histogram_max_error)
             })
             return
 
+        flat, scale = self._sample_tensor(flat)
+
         if flat.is_cuda:
             # TODO(jhr): see if pytorch will accept something upstream to check cuda support for ops
             # until then, we are going to have to catch a specific exception to check for histc support.
@@ -216,6 +233,8 @@ class TorchHistory(object):
             tmin, tmax = tmax, tmin
         tensor = flat.histc(bins=self._num_bins, min=tmin, max=tmax)
         tensor = tensor.cpu().clone().detach()
+        if scale != 1:
+            tensor = (tensor * scale).round()
         bins = torch.linspace(tmin, tmax, steps=self._num_bins + 1)
 
         # Add back zeroes from a sparse tensor.
@@ -244,7 +263,159 @@ class TorchHistory(object):
                 tensor.tolist(), bins.tolist()))
         })
 
-    def _hook_variable_gradient_stats(self, var, name, log_track):
+    def _get_history(self):
+        history = self._history()
+
+        # recover history from run if using jupyter
+        if history is None and self._jupyter_run:
+            jupyter_run = self._jupyter_run()
+            if jupyter_run:
+                history = jupyter_run.history
+        return history
+
+    def log_tensor_stats_batch(self, named_tensors):
+        """Add distribution statistics of several tensors to the current History entry
+
+        Bins values like calling log_tensor_stats for each (name, tensor) pair, but
+        the tensors on a device are binned without syncing with the host and all
+        of their histograms are copied to the host in a single transfer. Large
+        tensors are read in chunks, so the scratch memory is bounded by the chunk
+        size rather than by the size of the tensor.
+        """
+        history = self._get_history()
+        if history is None or not history.compute:
+            return
+
+        by_device = {}
+        for name, tensor in named_tensors:
+            # Sparse tensors and pytorch 0.3 take the per tensor path
+            if tensor.is_sparse or not hasattr(tensor, "detach"):
+                self.log_tensor_stats(tensor, name)
+                continue
+            if tensor.numel() == 0:
+                continue
+            flat, scale = self._sample_tensor(tensor.detach().reshape(-1))
+            by_device.setdefault(tensor.device, []).append((name, flat, scale))
+
+        row = {}
+        for device_tensors in by_device.values():
+            row.update(self._batch_histograms(device_tensors))
+        if row:
+            history._row_update(row)
+
+    def _batch_histograms(self, named_tensors):
+        """Returns {name: wandb.Histogram} for (name, flat tensor, count scale)
+        triples of tensors that live on the same device
+        """
+        num_bins = self._num_bins
+        device = named_tensors[0][1].device
+        # One extra bin per tensor collects its nan and inf values
+        counts = torch.zeros(len(named_tensors) * (num_bins + 1), dtype=torch.long, device=device)
+        ones = torch.ones(
+            min(self._chunk_size, max(t.numel() for _, t, _ in named_tensors)),
+            dtype=torch.long, device=device)
+        bounds = []
+        for i, (name, flat, scale) in enumerate(named_tensors):
+            chunks = flat.split(self._chunk_size)
+            lows, highs = zip(*[self._finite_bounds(chunk) for chunk in chunks])
+            tmin = torch.stack(lows).min()
+            tmax = torch.stack(highs).max()
+            # histc widens the range of constant tensors by one on each side
+            constant = (tmin == tmax).double()
+            tmin = tmin - constant
+            tmax = tmax + constant
+            for chunk in chunks:
+                chunk = self._float_chunk(chunk)
+                low = tmin.to(chunk.dtype)
+                index = (chunk - low).mul_(num_bins).div_(tmax.to(chunk.dtype) - low)
+                index = index.floor_().clamp_(0, num_bins - 1).masked_fill_(~torch.isfinite(chunk), num_bins)
+                index = index.long().add_(i * (num_bins + 1))
+                counts.scatter_add_(0, index, ones[:len(index)])
+            bounds.append(tmin)
+            bounds.append(tmax)
+
+        host = torch.cat([counts.double(), torch.stack(bounds)]).cpu().tolist()
+        histograms = {}
+        for i, (name, flat, scale) in enumerate(named_tensors):
+            tmin, tmax = host[len(counts) + 2 * i:len(counts) + 2 * i + 2]
+            if tmin == float("inf"):
+                # Often the whole tensor is nan or inf. Just don't log it in that case.
+                continue
+            start = i * (num_bins + 1)
+            hist = [int(round(c * scale)) for c in host[start:start + num_bins]]
+            bins = [tmin + (tmax - tmin) * b / num_bins for b in range(num_bins + 1)]
+            histograms[name] = wandb.Histogram(np_histogram=(hist, bins))
+        return histograms
+
+    def _sample_tensor(self, flat):
+        """Returns a uniform sample of a flat tensor for histograms within
+        self._histogram_max_error, and how many values each sampled value stands for
+        """
+        if not self._histogram_max_error:
+            return flat, 1
+        size = util.histogram_sample_size(self._histogram_max_error)
+        if flat.numel() <= size:
+            return flat, 1
+        # A private generator, so sampling doesn't change the user's random stream
+        if self._sample_generator is None:
+            self._sample_generator = torch.Generator()
+            # seeded from entropy, a new Generator starts from the same seed
+            self._sample_generator.seed()
+        index = torch.randint(flat.numel(), (size,), generator=self._sample_generator, dtype=torch.long)
+        return flat[index.to(flat.device)], flat.numel() / float(size)
+
+    def _float_chunk(self, chunk):
+        if chunk.dtype in (torch.float32, torch.float64):
+            return chunk
+        return chunk.float()
+
+    def _finite_bounds(self, chunk):
+        """Returns the min and max of the finite values of chunk, as device tensors"""
+        chunk = self._float_chunk(chunk)
+        finite = torch.isfinite(chunk)
+        return (chunk.masked_fill(~finite, float("inf")).min().double(),
+                chunk.masked_fill(~finite, float("-inf")).max().double())
+
+    def _queue_tensor_stats(self, tensor, name):
+        """Collects a gradient for log_tensor_stats_batch, which runs once the
+        current backward pass has finished.
+        """
+        # The end of pass callback doesn't run if backward() raises, so the
+        # pass is identified to drop what an earlier pass left behind. Without
+        # pass ids, a callback is queued for every gradient instead.
+        get_task_id = getattr(torch._C, '_current_graph_task_id', None)
+        task = get_task_id() if get_task_id is not None else None
+        with self._stats_lock:
+            if self._stats_queued and task != self._pending_task:
+                self._pending_stats = []
+                self._stats_queued = False
+            if not self._stats_queued or task is None:
+                try:
+                    torch.autograd.Variable._execution_engine.queue_callback(
+                        self._flush_tensor_stats)
+                except (AttributeError, RuntimeError):
+                    # No backward callbacks in this version of pytorch
+                    queued = False
+                else:
+                    queued = True
+                    self._stats_queued = True
+                    self._pending_task = task
+            else:
+                queued = True
+            if queued:
+                self._pending_stats.append((name, tensor))
+        if not queued:
+            self.log_tensor_stats(tensor, name)
+
+    def _flush_tensor_stats(self):
+        with self._stats_lock:
+            pending, self._pending_stats = self._pending_stats, []
+            self._stats_queued = False
+            self._pending_task = None
+        if pending:
+            self.log_tensor_stats_batch(pending)
+
+    def _hook_variable_gradient_stats(self, var, name, log_track, batched=False):
         """Logs a Variable's gradient's distribution statistics next time backward()
         is called on it.
         """
@@ -261,7 +432,10 @@ class TorchHistory(object):
         def _callback(grad, log_track):
             if not log_track_update(log_track):
                 return
-            self.log_tensor_stats(grad.data, name)
+            if batched:
+                self._queue_tensor_stats(grad.data, name)
+            else:
+                self.log_tensor_stats(grad.data, name)
 
         handle = var.register_hook(lambda grad: _callback(grad, log_track))
         self._hook_handles[name] = handle